@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+"""Micro-benchmark of the screener and entitlement table clean-up.
+
+Compares the current ``KLSEScreener._post_process_dataframe`` and ``screener`` clean-up with the
+previous row-by-row implementations on synthetic tables of the live sizes, checks that both
+produce identical frames and prints the speedup.
+
+    python libs/klsescreener/benchmarks/bench_post_process.py
+"""
+
+# Import standard libraries
+from urllib.parse import urljoin
+from unittest.mock import patch
+import random
+import timeit
+import re
+
+# Import third-party libraries
+import pandas
+
+# Import internal libraries
+from klsescreener.screener import _urljoin
+from klsescreener import KLSEScreener
+
+
+SCREENER_ROWS = 1100
+ENTITLEMENT_ROWS = 500
+REPEAT = 5
+
+
+def legacy_post_process_dataframe(url: str, dataframe_raw: pandas.DataFrame) -> pandas.DataFrame:
+    dataframe = pandas.DataFrame()
+    for (column, _), series in dataframe_raw.items():
+        values = series.apply(lambda x: x[0])
+        links = series.apply(lambda x: x[1])
+        if values.isna().all():
+            dataframe[column] = links
+        elif links.isna().all():
+            dataframe[column] = values
+        else:
+            dataframe[f"{column}Link"] = links.apply(lambda x: urljoin(url, x) if x else "")
+            dataframe[column] = values
+    number_of_columns = len(dataframe.columns)
+    rows_to_drop = []
+    for index, row in dataframe.iterrows():
+        if len(row.unique()) < (0.5 * number_of_columns):
+            rows_to_drop.append(index)
+    for index in reversed(rows_to_drop):
+        dataframe.drop(labels=index, inplace=True)
+    dataframe = dataframe.loc[:, ~(dataframe.isin(["", "View"])).all()]
+    dataframe.reset_index(inplace=True)
+    return dataframe
+
+
+def legacy_screener_cleanup(url: str, dataframe: pandas.DataFrame) -> pandas.DataFrame:
+
+    def remove_consecutive_duplicates(text):
+        return re.sub(r"\b(\w+)\b(\s+\1\b)+", r"\1", text, flags=re.IGNORECASE)
+
+    pattern = r"\b(?:Main Market|Ace Market|Leap Market)|ETF\b"
+    dataframe["Name"] = dataframe["Name"].str.strip("[s]").str.strip("")
+    dataframe["Market"] = dataframe["Category"].str.extract(f"({pattern})", flags=re.IGNORECASE)
+    dataframe["Category"] = dataframe["Category"].str.replace(pattern, "", case=False, regex=True).str.replace(r"[ ,]+", " ", regex=True).str.strip().apply(remove_consecutive_duplicates)
+    dataframe["KLSEScreener"] = dataframe["Code"].apply(lambda x: f"{url}/stocks/view/{x}")
+    dataframe["KLSEScreener Chart"] = dataframe["Code"].apply(lambda x: f"{url}/charting/chart/{x}")
+    return dataframe
+
+
+def entitlement_table(rows: int) -> pandas.DataFrame:
+    """Table shaped like ``fetch_html(..., extract_links="all")`` on the entitlement pages."""
+    random.seed(0)
+    columns = {
+        ("Name", None): [(f"STOCK{i % 300}", f"/v2/stocks/view/{i % 300:04d}") for i in range(rows)],
+        ("Announced", None): [(f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}", None) for i in range(rows)],
+        ("Ex-Date", None): [(f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}", None) for i in range(rows)],
+        ("Payment", None): [(f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}", None) for i in range(rows)],
+        ("Amount", None): [(f"{random.random():.4f}", None) for _ in range(rows)],
+        ("Type", None): [(random.choice(["Interim", "Final", "Special"]), None) for _ in range(rows)],
+        ("Subject", None): [("", f"/v2/entitlements/{i}") for i in range(rows)],
+        ("", None): [("View", None) for _ in range(rows)],
+    }
+    # Spacer rows as found between announcement groups
+    for index in range(0, rows, 25):
+        for key in columns:
+            columns[key][index] = ("2025-01-01", None)
+    return pandas.DataFrame(data=columns)
+
+
+def screener_table(rows: int) -> pandas.DataFrame:
+    """Table shaped like ``fetch_html(url=".../screener/quote_results")[0]``."""
+    random.seed(1)
+    sectors = ["Technology", "Property", "Industrial Products & Services", "Consumer Products & Services", "Financial Services", "Energy", "Plantation", "Utilities"]
+    markets = ["Main Market", "Ace Market", "Leap Market", "ETF"]
+    return pandas.DataFrame(data={
+        "Name": [f"STOCK{i} [s]" for i in range(rows)],
+        "Code": [f"{i:04d}" for i in range(rows)],
+        "Category": [f"{(s := random.choice(sectors))}, {s} , {random.choice(markets)}" for _ in range(rows)],
+        "Price": [random.random() * 10 for _ in range(rows)],
+    })
+
+
+def measure(function) -> float:
+    # Start every run with a cold link cache so the numbers reflect a first call
+    return min(timeit.repeat(function, setup=_urljoin.cache_clear, number=1, repeat=REPEAT))
+
+
+def main():
+    klsescreener = KLSEScreener()
+
+    raw = entitlement_table(rows=ENTITLEMENT_ROWS)
+    pandas.testing.assert_frame_equal(klsescreener._post_process_dataframe(raw), legacy_post_process_dataframe(klsescreener.url, raw))
+    legacy = measure(lambda: legacy_post_process_dataframe(klsescreener.url, raw))
+    current = measure(lambda: klsescreener._post_process_dataframe(raw))
+    print(f"_post_process_dataframe ({ENTITLEMENT_ROWS} rows): legacy {legacy * 1000:8.2f} ms, current {current * 1000:8.2f} ms, speedup {legacy / current:6.1f}x")
+
+    raw = screener_table(rows=SCREENER_ROWS)
+    with patch.object(KLSEScreener, "fetch_html", side_effect=lambda url, **kwargs: [raw.copy()]):
+        pandas.testing.assert_frame_equal(klsescreener.screener(), legacy_screener_cleanup(klsescreener.url, raw.copy()))
+        legacy = measure(lambda: legacy_screener_cleanup(klsescreener.url, raw.copy()))
+        current = measure(klsescreener.screener)
+    print(f"screener clean-up       ({SCREENER_ROWS} rows): legacy {legacy * 1000:8.2f} ms, current {current * 1000:8.2f} ms, speedup {legacy / current:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+"""Benchmark suite of the parse, post-process and dashboard hot paths.
+
+Every benchmark runs on the recorded fixtures of ``libs/klsescreener/tests/fixtures`` (the
+dashboard one through a local ``ReplayServer``) and reports the best and median time per run,
+the throughput and the peak memory traced during one run. Results are compared with a saved
+baseline and the run fails when a benchmark is slower, or uses more memory, than the baseline
+by more than the threshold.
+
+    python libs/klsescreener/benchmarks/run.py                    # run and compare with the baseline
+    python libs/klsescreener/benchmarks/run.py --save             # run and save the results as baseline
+    python libs/klsescreener/benchmarks/run.py -k history --threshold 0.1
+
+The ``import`` benchmark also fails when a bare ``import klsescreener`` takes longer than
+``IMPORT_BUDGET``, whatever the baseline.
+"""
+
+# Import standard libraries
+from unittest.mock import patch
+import contextlib
+import statistics
+import subprocess
+import tracemalloc
+import argparse
+import tempfile
+import pathlib
+import shutil
+import timeit
+import json
+import sys
+import io
+
+# Import third-party libraries
+import pandas
+import numpy
+
+# Import internal libraries
+from bench_post_process import entitlement_table, screener_table, SCREENER_ROWS, ENTITLEMENT_ROWS
+from klsescreener.replay import ReplayServer, ReplayTransport
+from klsescreener.history import compact_history, post_process_history
+from klsescreener.indicators import IndicatorEngine
+from klsescreener.transport import configure_transport
+from klsescreener.stock import generate_dashboard
+from klsescreener import KLSEScreener
+
+
+FIXTURES = pathlib.Path(__file__).resolve().parents[1] / "tests" / "fixtures"
+BASELINE = pathlib.Path(__file__).resolve().parent / "baseline.json"
+
+# Seconds allowed for a bare ``import klsescreener``, which must not load pandas or requests
+IMPORT_BUDGET = 0.02
+
+
+@contextlib.contextmanager
+def bench_fetch_html_tables():
+    """Table extraction of a recorded stock page, as done by ``fetch_html``."""
+    text = (FIXTURES / "pages" / "v2" / "stocks" / "view" / "1818.html").read_text()
+    yield lambda: KLSEScreener.read_html(text=text, match="Financial Year", extract_links="all", index=slice(None)), 1, "pages"
+
+
+@contextlib.contextmanager
+def bench_post_process_dataframe():
+    """``_post_process_dataframe`` of an entitlement table."""
+    klsescreener = KLSEScreener()
+    dataframe = entitlement_table(rows=ENTITLEMENT_ROWS)
+    yield lambda: klsescreener._post_process_dataframe(dataframe), ENTITLEMENT_ROWS, "rows"
+
+
+@contextlib.contextmanager
+def bench_screener_cleanup():
+    """``screener`` clean-up of a screener sized table."""
+    klsescreener = KLSEScreener()
+    dataframe = screener_table(rows=SCREENER_ROWS)
+    with patch.object(KLSEScreener, "fetch_html", side_effect=lambda url, **kwargs: [dataframe.copy()]):
+        yield klsescreener.screener, SCREENER_ROWS, "rows"
+
+
+def minute_bars(days: int = 250) -> pandas.DataFrame:
+    minutes = numpy.r_[numpy.arange(9 * 60, 12 * 60 + 30), numpy.arange(14 * 60 + 30, 17 * 60)] * 60
+    t = (1704067200 + numpy.arange(days)[:, None] * 86400 + minutes[None, :] - 8 * 3600).ravel()
+    c = 1 + numpy.random.default_rng(seed=0).random(len(t))
+    return pandas.DataFrame(data={"t": t, "o": c, "h": c + 0.01, "l": c - 0.01, "c": c, "v": 100})
+
+
+@contextlib.contextmanager
+def bench_historical_data():
+    """``historical_data`` post-processing of one year of 1-minute bars, full layout."""
+    dataframe = minute_bars()
+    yield lambda: post_process_history(dataframe=dataframe.copy(), resolution="1"), len(dataframe), "bars"
+
+
+@contextlib.contextmanager
+def bench_historical_data_compact():
+    """``historical_data`` post-processing of one year of 1-minute bars, compact layout."""
+    dataframe = minute_bars()
+    yield lambda: compact_history(dataframe=dataframe, resolution="1"), len(dataframe), "bars"
+
+
+def market_bars(symbols: int = 1000, days: int = 2500) -> pandas.DataFrame:
+    """Ten years of daily bars for a market of ``symbols`` stocks, in ``fetch_history`` layout."""
+    rng = numpy.random.default_rng(seed=0)
+    c = 10 * numpy.exp(numpy.cumsum(rng.normal(0, 0.02, (symbols, days)), axis=1)).ravel()
+    return pandas.DataFrame(data={
+        "symbol": pandas.Categorical(numpy.repeat([f"{code:04d}" for code in range(symbols)], days)),
+        "t": numpy.tile(1104537600 + numpy.arange(days) * 86400, symbols),
+        "o": c, "h": c * 1.01, "l": c * 0.99, "c": c, "v": rng.integers(100, 100000, symbols * days),
+    })
+
+
+@contextlib.contextmanager
+def bench_indicators():
+    """Every indicator over ten years of daily bars of 1000 stocks."""
+    dataframe = market_bars()
+    yield lambda: IndicatorEngine(vwap=20).compute(dataframe=dataframe), len(dataframe), "bars"
+
+
+@contextlib.contextmanager
+def bench_indicators_update():
+    """Every indicator for one new daily bar of 1000 stocks, continuing from ten years of history."""
+    dataframe = market_bars()
+    engine = IndicatorEngine(vwap=20)
+    engine.compute(dataframe=dataframe)
+    last = dataframe.groupby("symbol", observed=True).tail(1)
+    bars = [last.assign(t=last["t"] + day * 86400) for day in range(1, 1000)]
+
+    def run():
+        engine.update(dataframe=bars.pop(0))
+
+    yield run, len(last), "bars"
+
+
+@contextlib.contextmanager
+def bench_generate_dashboard():
+    """End-to-end ``generate_dashboard`` against a local stand-in of the site."""
+    with tempfile.TemporaryDirectory() as directory:
+        fixtures = pathlib.Path(directory)
+        shutil.copytree(FIXTURES, fixtures, dirs_exist_ok=True)
+        # Serve the recorded stock page and bars for every code of the recorded screener
+        codes = KLSEScreener.read_html(text=(fixtures / "pages" / "v2" / "screener" / "quote_results.html").read_text(), index=0)[0]["Code"].astype(str)
+        for code in codes[codes != "1818"]:
+            shutil.copyfile(fixtures / "pages" / "v2" / "stocks" / "view" / "1818.html", fixtures / "pages" / "v2" / "stocks" / "view" / f"{code}.html")
+            shutil.copytree(fixtures / "history" / "1818", fixtures / "history" / code, dirs_exist_ok=True)
+
+        def run():
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_dashboard(thread_count=8)
+
+        with ReplayServer(fixtures=fixtures) as server:
+            configure_transport(transport=ReplayTransport(target=server.url))
+            try:
+                yield run, len(codes), "stocks"
+            finally:
+                configure_transport()
+
+
+def import_time(module: str = "klsescreener") -> float:
+    """Seconds ``module`` takes to import in a fresh interpreter, as reported by ``-X importtime``.
+    """
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, check=True).stderr
+    return sum(int(line.split("|")[1]) for line in output.splitlines() if line.rsplit("|", 1)[-1].strip() == module) / 1e6
+
+
+@contextlib.contextmanager
+def bench_import():
+    """Bare ``import klsescreener`` in a fresh interpreter."""
+    yield import_time, 1, "imports"
+
+
+BENCHMARKS = {
+    "import.klsescreener": bench_import,
+    "fetch_html.tables": bench_fetch_html_tables,
+    "post_process_dataframe": bench_post_process_dataframe,
+    "screener.cleanup": bench_screener_cleanup,
+    "historical_data.full": bench_historical_data,
+    "historical_data.compact": bench_historical_data_compact,
+    "indicators.market": bench_indicators,
+    "indicators.update": bench_indicators_update,
+    "generate_dashboard.replay": bench_generate_dashboard,
+}
+
+
+def measure(function, items: int, unit: str, repeat: int) -> dict:
+    function()  # Warm up caches and lazy imports
+    if function is import_time:
+        # Time the import itself, not the interpreter start-up
+        timings = [import_time() for _ in range(repeat)]
+    else:
+        timings = timeit.repeat(function, number=1, repeat=repeat)
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    best = min(timings)
+    return {"best": best, "median": statistics.median(timings), "throughput": items / best, "unit": unit, "peak_bytes": peak}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Return a message for every benchmark slower or heavier than its baseline beyond ``threshold``.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for key, label in (("best", "time"), ("peak_bytes", "memory")):
+            ratio = result[key] / baseline[name][key] if baseline[name][key] else 1.0
+            if ratio > 1 + threshold:
+                regressions.append(f"{name}: {label} {ratio:.2f}x the baseline (threshold {1 + threshold:.2f}x)")
+    return regressions
+
+
+def main(argv: list | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the klsescreener hot paths on recorded fixtures.")
+    parser.add_argument("-k", dest="select", default="", help="only run the benchmarks whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown or memory growth, 0.25 means 25%%")
+    parser.add_argument("--baseline", type=pathlib.Path, default=BASELINE, help="baseline file to compare with or save to")
+    parser.add_argument("--save", action="store_true", help="save the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, benchmark in BENCHMARKS.items():
+        if args.select not in name:
+            continue
+        with benchmark() as (function, items, unit):
+            results[name] = measure(function=function, items=items, unit=unit, repeat=args.repeat)
+        result = results[name]
+        print(f"{name:26} best {result['best'] * 1000:9.2f} ms  median {result['median'] * 1000:9.2f} ms  {result['throughput']:12,.0f} {result['unit']}/s  peak {result['peak_bytes'] / 2 ** 20:8.2f} MiB")
+
+    regressions = []
+    if "import.klsescreener" in results and results["import.klsescreener"]["best"] > IMPORT_BUDGET:
+        regressions.append(f"import.klsescreener: {results['import.klsescreener']['best'] * 1000:.2f} ms over the budget of {IMPORT_BUDGET * 1000:.2f} ms")
+
+    if args.save is True:
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        args.baseline.write_text(json.dumps({**baseline, **results}, indent=2) + "\n")
+        print(f"Saved baseline to {args.baseline}")
+    elif not args.baseline.exists():
+        print(f"No baseline at {args.baseline}, run with --save to create one")
+    else:
+        regressions.extend(compare(results=results, baseline=json.loads(args.baseline.read_text()), threshold=args.threshold))
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,46 @@
 
 # -*- coding: utf-8 -*-
 
-from .resolution import Resolution
-from .screener import KLSEScreener
-from .stock import Stock, generate_dashboard
+# Import standard libraries
+import importlib
+
+
+# Public names and the module defining them, imported on first access so that a bare
+# ``import klsescreener`` does not load pandas, requests, lxml or bs4
+_EXPORTS = {
+    "Resolution": "resolution",
+    "Transport": "transport",
+    "configure_transport": "transport",
+    "get_transport": "transport",
+    "ResponseCache": "httpcache",
+    "RateLimiter": "limiter",
+    "KLSEScreener": "screener",
+    "ScreenerSnapshot": "screener",
+    "Document": "document",
+    "BarStore": "store",
+    "StatsIndex": "stats",
+    "fetch_history": "history",
+    "resample": "resample",
+    "IndicatorEngine": "indicators",
+    "indicators": "indicators",
+    "Stock": "stock",
+    "generate_dashboard": "stock",
+    "refresh_dashboard": "stock",
+    "generate_dashboard_async": "stock",
+    "iter_dashboard": "stock",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list:
+    return sorted({*globals(), *__all__})
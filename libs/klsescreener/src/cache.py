@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import standard libraries
+from typing import Any, Callable, Hashable
+import threading
+import time
+
+# Import internal libraries
+from shared.metrics import metrics
+
+
+class TTLCache:
+    """Thread-safe in-memory cache whose entries expire ``ttl`` seconds after they are loaded.
+
+    Concurrent callers that miss the same key wait for a single ``loader`` call instead of
+    each loading the value themselves.
+    """
+
+    def __init__(self, ttl: float, name: str = "ttl"):
+        self.ttl = ttl
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, key: Hashable) -> tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            metrics.count("cache_hits", cache=self.name)
+            return True, entry[1]
+        return False, None
+
+    def get(self, key: Hashable, loader: Callable[[], Any], ttl: float | None = None) -> Any:
+        """Return the cached value for ``key`` or load it with ``loader``.
+        """
+        with self._lock:
+            found, value = self._lookup(key)
+            if found is True:
+                return value
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Another caller may have loaded the value while we were waiting
+            with self._lock:
+                found, value = self._lookup(key)
+                if found is True:
+                    return value
+                self.misses += 1
+                metrics.count("cache_misses", cache=self.name)
+            value = loader()
+            with self._lock:
+                self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            return value
+
+    def invalidate(self, key: Hashable | None = None):
+        """Drop one entry, or every entry when ``key`` is None.
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+class _Flight:
+
+    __slots__ = ["done", "value", "error"]
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one call whose result every caller shares.
+
+    Nothing is kept once the call returns, the next call with that key starts a new one.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, function: Callable[[], Any]) -> Any:
+        """Return ``function()``, or wait for the result of the identical call already in flight.
+        """
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader is True:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if leader is False:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = function()
+            return flight.value
+        except BaseException as exception:
+            flight.error = exception
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
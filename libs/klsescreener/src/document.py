@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import standard libraries
+from typing import Callable
+import threading
+import logging
+
+# Import third-party libraries
+import lxml.html
+
+# Import internal libraries
+from klsescreener.tables import parse_document
+from klsescreener.screener import KLSEScreener
+from shared.metrics import metrics
+
+
+class Document:
+    """Cache of one downloaded html page, its lxml tree and the tables extracted from it.
+
+    The page is downloaded and parsed once on first use, and every table is extracted from that
+    tree at most once per ``(match, extract_links, index)`` until ``refresh()`` is called.
+    """
+
+    def __init__(self, url: str, fetch_text: Callable[[str], str]):
+        self.url = url
+        self._fetch_text = fetch_text
+        self._lock = threading.RLock()
+        self._text = None
+        self._tree = None
+        self._tables = {}
+        self.hits = 0
+        self.misses = 0
+        self.from_cache = False
+
+    def _record(self, hit: bool):
+        self.from_cache = hit
+        if hit is True:
+            self.hits += 1
+            metrics.count("cache_hits", cache="document")
+        else:
+            self.misses += 1
+            metrics.count("cache_misses", cache="document")
+
+    def _load_text(self) -> bool:
+        if self._text is not None:
+            return True
+        logging.debug(f"Downloading document {self.url}.")
+        self._text = self._fetch_text(url=self.url)
+        return False
+
+    @property
+    def text(self) -> str:
+        with self._lock:
+            self._record(hit=self._load_text())
+            return self._text
+
+    def _load_tree(self) -> bool:
+        hit = self._load_text() and self._tree is not None
+        if self._tree is None:
+            self._tree = parse_document(text=self._text)
+        return hit
+
+    @property
+    def tree(self) -> lxml.html.HtmlElement:
+        with self._lock:
+            self._record(hit=self._load_tree())
+            return self._tree
+
+    def tables(self, match: str = ".+", extract_links: str | None = None, index: int | slice | None = None) -> list:
+        """Return copies of the tables matching ``match``, extracting them only once.
+        """
+        key = (match, extract_links, str(index) if isinstance(index, slice) else index)
+        with self._lock:
+            hit = self._load_tree() and key in self._tables
+            if key not in self._tables:
+                self._tables[key] = KLSEScreener.read_html(text=self._tree, match=match, extract_links=extract_links, index=index)
+            self._record(hit=hit)
+            return [dataframe.copy() for dataframe in self._tables[key]]
+
+    def refresh(self):
+        """Drop the downloaded page and every table parsed from it.
+        """
+        with self._lock:
+            self._text = None
+            self._tree = None
+            self._tables.clear()
+            self.from_cache = False
+
+    def cache_info(self) -> dict:
+        return {"url": self.url, "hits": self.hits, "misses": self.misses, "tables": len(self._tables), "from_cache": self.from_cache}
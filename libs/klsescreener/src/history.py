@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import standard libraries
+import concurrent.futures
+import datetime
+import logging
+import time
+
+# Import third-party libraries
+import pandas
+
+# Import internal libraries
+from klsescreener.resolution import Resolution
+from klsescreener.screener import KLSEScreener
+from klsescreener.store import BarStore
+
+
+# Columns of the history endpoint response that describe the request rather than the bars
+META_COLUMNS = ["s", "from", "to", "exact_from", "server", "ip", "qt"]
+
+# Compact dtypes of the raw bar columns
+BAR_DTYPES = {"t": "int64", "o": "float32", "h": "float32", "l": "float32", "c": "float32", "v": "int64"}
+
+# Span of one request for intraday resolutions, longer ranges are split into windows of this size
+WINDOW_SECONDS = {
+    Resolution.MINUTE_1.value : 14 * 24 * 60 * 60,
+    Resolution.MINUTE_5.value : 60 * 24 * 60 * 60,
+    Resolution.MINUTE_15.value: 120 * 24 * 60 * 60,
+    Resolution.MINUTE_30.value: 180 * 24 * 60 * 60,
+    Resolution.HOUR_1.value   : 360 * 24 * 60 * 60,
+    Resolution.HOUR_4.value   : 720 * 24 * 60 * 60,
+}
+
+# Default countback, i.e. every bar in the range
+COUNTBACK = 99999999
+
+
+def history_url(url: str, code: str, resolution: str, stimestamp: int, etimestamp: int, countback: int = COUNTBACK) -> str:
+    return f"{url}/trading_view/history?symbol={code}&resolution={resolution}&from={stimestamp}&to={etimestamp}&countback={countback}&currencyCode=MYR"
+
+
+def fetch_bars(klsescreener: KLSEScreener, code: str, resolution: str, stimestamp: int, etimestamp: int, countback: int = COUNTBACK) -> pandas.DataFrame:
+    """Fetch raw ``t``/``o``/``h``/``l``/``c``/``v`` bars from the history endpoint in one request.
+    """
+    url = history_url(url=klsescreener.url, code=code, resolution=resolution, stimestamp=stimestamp, etimestamp=etimestamp, countback=countback)
+    logging.debug(f"Fetching historical data for stockcode \"{code}\" with resolution {resolution} from {datetime.datetime.fromtimestamp(stimestamp)} ({stimestamp}) to {datetime.datetime.fromtimestamp(etimestamp)} ({etimestamp}). {url}")
+    dataframe = klsescreener.fetch_json(url=url)
+    if "t" not in dataframe.columns:
+        logging.debug(f"No historical data for stockcode \"{code}\" with resolution {resolution} from {stimestamp} to {etimestamp}.")
+        return pandas.DataFrame(columns=list(BAR_DTYPES))
+    dataframe.drop(columns=META_COLUMNS, axis=1, inplace=True, errors="ignore")
+    return dataframe
+
+
+def windows(resolution: str, stimestamp: int, etimestamp: int) -> list:
+    """Split ``[stimestamp, etimestamp]`` into consecutive, non-overlapping request windows.
+    """
+    size = WINDOW_SECONDS.get(resolution)
+    if size is None or etimestamp - stimestamp <= size:
+        return [(stimestamp, etimestamp)]
+    return [(start, min(start + size - 1, etimestamp)) for start in range(stimestamp, etimestamp + 1, size)]
+
+
+def iter_bars(klsescreener: KLSEScreener, code: str, resolution: str, stimestamp: int, etimestamp: int, max_workers: int = 4, retries: int = 3):
+    """Yield the raw bars of every window in chronological order while later windows download.
+    """
+
+    def fetch(start: int, end: int) -> pandas.DataFrame:
+        for attempt in range(retries + 1):
+            try:
+                return fetch_bars(klsescreener=klsescreener, code=code, resolution=resolution, stimestamp=start, etimestamp=end)
+            except Exception as exception:
+                if attempt == retries:
+                    raise
+                logging.warning(f"Retrying window {start}-{end} of stockcode \"{code}\" after {type(exception).__name__}: {exception}")
+                time.sleep(0.5 * 2 ** attempt)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(fetch, start, end) for start, end in windows(resolution=resolution, stimestamp=stimestamp, etimestamp=etimestamp)]
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def fetch_range(klsescreener: KLSEScreener, code: str, resolution: str, stimestamp: int, etimestamp: int, countback: int = COUNTBACK) -> pandas.DataFrame:
+    """Fetch raw bars for a range, in parallel windows when an intraday range is too long for one request.
+
+    The merged windows are deduplicated on ``t`` so the result has the same bars as one request.
+    """
+    if countback != COUNTBACK or len(windows(resolution=resolution, stimestamp=stimestamp, etimestamp=etimestamp)) == 1:
+        return fetch_bars(klsescreener=klsescreener, code=code, resolution=resolution, stimestamp=stimestamp, etimestamp=etimestamp, countback=countback)
+    frames = [frame for frame in iter_bars(klsescreener=klsescreener, code=code, resolution=resolution, stimestamp=stimestamp, etimestamp=etimestamp) if not frame.empty]
+    if not frames:
+        return pandas.DataFrame(columns=list(BAR_DTYPES))
+    dataframe = pandas.concat(objs=frames, ignore_index=True)
+    return dataframe.drop_duplicates(subset=["t"], keep="last").reset_index(drop=True)
+
+
+def post_process_history(dataframe: pandas.DataFrame, resolution: str) -> pandas.DataFrame:
+    """Add the calendar columns used by ``Stock.historical_data`` and sort the newest bar first.
+    """
+    dataframe.insert(loc=0, column="d", value=pandas.to_datetime(dataframe["t"], unit="s") + pandas.to_timedelta("8 hours"))
+    dataframe.insert(loc=0, column="Time", value=dataframe["d"].dt.time)
+    dataframe.insert(loc=0, column="Date", value=dataframe["d"].dt.date)
+    dataframe.insert(loc=0, column="Day", value=dataframe["d"].dt.day_name())
+    dataframe.insert(loc=0, column="Month", value=dataframe["d"].dt.month)
+    dataframe.insert(loc=0, column="Year", value=dataframe["d"].dt.year)
+    dataframe.insert(loc=0, column="Resolution", value=resolution)
+    dataframe.sort_values(by=["t"], ascending=False, inplace=True)
+    dataframe.reset_index(drop=True, inplace=True)
+    return dataframe
+
+
+def compact_history(dataframe: pandas.DataFrame, resolution: str) -> pandas.DataFrame:
+    """Keep only a categorical ``Resolution`` and the compact bar columns, sorted the newest bar first.
+
+    The calendar columns of ``post_process_history`` are available on demand through ``dataframe.bars``.
+    """
+    dataframe = dataframe[list(BAR_DTYPES)].astype(dtype=BAR_DTYPES)
+    dataframe.insert(loc=0, column="Resolution", value=pandas.Categorical(values=[resolution] * len(dataframe)))
+    dataframe = dataframe.sort_values(by=["t"], ascending=False)
+    dataframe.reset_index(drop=True, inplace=True)
+    return dataframe
+
+
+@pandas.api.extensions.register_dataframe_accessor("bars")
+class BarsAccessor:
+    """Calendar columns of a bar frame, computed from ``t`` only when accessed.
+
+    ``dataframe.bars.Date`` returns the same values as the ``Date`` column of ``post_process_history``.
+    """
+
+    def __init__(self, dataframe: pandas.DataFrame):
+        if "t" not in dataframe.columns:
+            raise AttributeError("Bars must have a 't' column")
+        self._dataframe = dataframe
+
+    @property
+    def d(self) -> pandas.Series:
+        return (pandas.to_datetime(self._dataframe["t"], unit="s") + pandas.to_timedelta("8 hours")).rename("d")
+
+    @property
+    def Time(self) -> pandas.Series:
+        return self.d.dt.time.rename("Time")
+
+    @property
+    def Date(self) -> pandas.Series:
+        return self.d.dt.date.rename("Date")
+
+    @property
+    def Day(self) -> pandas.Series:
+        return self.d.dt.day_name().astype("category").rename("Day")
+
+    @property
+    def Month(self) -> pandas.Series:
+        return self.d.dt.month.rename("Month")
+
+    @property
+    def Year(self) -> pandas.Series:
+        return self.d.dt.year.rename("Year")
+
+    def expand(self) -> pandas.DataFrame:
+        """Return a copy with every calendar column materialised, in the ``post_process_history`` layout.
+        """
+        d = self.d
+        columns = {"Year": d.dt.year, "Month": d.dt.month, "Day": d.dt.day_name(), "Date": d.dt.date, "Time": d.dt.time, "d": d}
+        dataframe = self._dataframe.assign(**columns)
+        dataframe["Resolution"] = dataframe["Resolution"].astype(str) if "Resolution" in dataframe.columns else None
+        return dataframe[["Resolution", *columns, *(column for column in self._dataframe.columns if column not in ("Resolution", *columns))]]
+
+
+def memory_report(dataframe: pandas.DataFrame, resolution: str) -> pandas.DataFrame:
+    """Compare the deep memory use in bytes per column of the full and the compact layout of the same bars.
+    """
+    full = post_process_history(dataframe=dataframe[list(BAR_DTYPES)].copy(), resolution=resolution).memory_usage(index=False, deep=True)
+    compact = compact_history(dataframe=dataframe, resolution=resolution).memory_usage(index=False, deep=True)
+    report = pandas.DataFrame(data={"full": full, "compact": compact}).reindex(index=full.index).fillna(0).astype("int64")
+    report.loc["Total"] = report.sum()
+    return report
+
+
+def _to_timestamp(value: int | float | datetime.date | str) -> int:
+    if isinstance(value, (int, float)):
+        return int(value)
+    if isinstance(value, datetime.date) and not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(date=value, time=datetime.datetime.min.time())
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    return int(value.timestamp())
+
+
+def fetch_history(codes: list, resolution: Resolution | str, start: int | datetime.date | str, end: int | datetime.date | str | None = None, max_workers: int = 16, multiindex: bool = False, store: BarStore | None = None) -> tuple[pandas.DataFrame, pandas.DataFrame]:
+    """Fetch bars for many stock codes concurrently without scraping any stock page.
+
+    Returns a long-format frame with a categorical ``symbol`` column and compact ``t``/``o``/``h``/
+    ``l``/``c``/``v`` columns sorted by ``(symbol, t)`` (or indexed by them when ``multiindex`` is
+    true), and a ``symbol``/``error`` frame listing the codes that failed.
+    """
+    resolution = resolution.value if isinstance(resolution, Resolution) else resolution
+    stimestamp = _to_timestamp(value=start)
+    etimestamp = _to_timestamp(value=datetime.datetime.now() if end is None else end)
+    klsescreener = KLSEScreener()
+
+    def fetch(code: str) -> pandas.DataFrame:
+        if store is not None:
+            return store.fetch(
+                symbol=code, resolution=resolution, stimestamp=stimestamp, etimestamp=etimestamp,
+                fetch=lambda start, end: fetch_range(klsescreener=klsescreener, code=code, resolution=resolution, stimestamp=start, etimestamp=end),
+            )
+        return fetch_range(klsescreener=klsescreener, code=code, resolution=resolution, stimestamp=stimestamp, etimestamp=etimestamp)
+
+    frames = {}
+    errors = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fetch, code): code for code in codes}
+        for future in concurrent.futures.as_completed(futures):
+            code = futures[future]
+            try:
+                frames[code] = future.result()
+            except Exception as exception:
+                logging.warning(f"Failed to fetch {resolution} history for stockcode \"{code}\": {exception}")
+                errors.append({"symbol": code, "error": f"{type(exception).__name__}: {exception}"})
+
+    columns = list(BAR_DTYPES)
+    dataframes = [frames[code][columns].assign(symbol=code) for code in codes if code in frames and not frames[code].empty]
+    if dataframes:
+        dataframe = pandas.concat(objs=dataframes, ignore_index=True)
+    else:
+        dataframe = pandas.DataFrame(columns=["symbol", *columns])
+    dataframe = dataframe.astype(dtype=BAR_DTYPES)
+    dataframe["symbol"] = pandas.Categorical(values=dataframe["symbol"], categories=list(dict.fromkeys(codes)))
+    dataframe = dataframe[["symbol", *columns]].sort_values(by=["symbol", "t"]).reset_index(drop=True)
+    if multiindex is True:
+        dataframe = dataframe.set_index(keys=["symbol", "t"])
+    return dataframe, pandas.DataFrame(data=errors, columns=["symbol", "error"])
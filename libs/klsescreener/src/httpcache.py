@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import standard libraries
+import threading
+import sqlite3
+import pathlib
+import logging
+import time
+import zlib
+import os
+import re
+
+# Import third-party libraries
+import requests
+
+# Import internal libraries
+from shared.metrics import metrics
+
+
+# Seconds a response stays fresh, first matching url pattern wins
+DEFAULT_TTLS = [
+    (r"/trading_view/history", 12 * 60 * 60),
+    (r"/screener", 5 * 60),
+    (r"/stocks/view/", 60 * 60),
+    (r"/entitlements/", 60 * 60),
+    (r"/financial-reports", 60 * 60),
+    (r"/markets", 15 * 60),
+]
+
+
+class OfflineCacheMiss(requests.exceptions.ConnectionError):
+    """Raised in offline mode when a response is not in the cache."""
+
+
+class ResponseCache:
+    """SQLite file of zlib compressed HTTP responses keyed by url.
+
+    Responses expire after the TTL of the first pattern in ``ttls`` that matches their url, or
+    ``default_ttl``. The least recently used responses are evicted once the compressed bodies
+    exceed ``max_bytes``. In ``offline`` mode every stored response is served whatever its age
+    and a miss raises ``OfflineCacheMiss`` instead of going to the network.
+    """
+
+    def __init__(self, path: str | os.PathLike, ttls: list | None = None, default_ttl: float = 15 * 60, max_bytes: int = 512 * 1024 * 1024, offline: bool = False):
+        self.path = pathlib.Path(path)
+        self.ttls = [(re.compile(pattern), ttl) for pattern, ttl in (DEFAULT_TTLS if ttls is None else ttls)]
+        self.default_ttl = default_ttl
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, status INTEGER, encoding TEXT, content_type TEXT, body BLOB, "
+            "size INTEGER, stored REAL, expires REAL, accessed REAL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def ttl(self, url: str) -> float:
+        for pattern, ttl in self.ttls:
+            if pattern.search(url):
+                return ttl
+        return self.default_ttl
+
+    def get(self, url: str) -> requests.Response | None:
+        """Return the stored response of ``url`` if it is still fresh, or any stored one when offline.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute("SELECT status, encoding, content_type, body, expires FROM responses WHERE url = ?", (url,)).fetchone()
+            if row is None or (row[4] < now and self.offline is False):
+                self.misses += 1
+                metrics.count("cache_misses", cache="response")
+                if self.offline is True:
+                    raise OfflineCacheMiss(f"{url} is not cached and the response cache is offline.")
+                return None
+            self.hits += 1
+            metrics.count("cache_hits", cache="response")
+            self._connection.execute("UPDATE responses SET accessed = ? WHERE url = ?", (now, url))
+        status, encoding, content_type, body, _ = row
+        response = requests.Response()
+        response.url = url
+        response.status_code = status
+        response.encoding = encoding
+        response.headers["Content-Type"] = content_type or ""
+        response._content = zlib.decompress(body)
+        return response
+
+    def put(self, url: str, response: requests.Response):
+        """Store a successful response and evict the least recently used ones beyond ``max_bytes``.
+        """
+        body = zlib.compress(response.content, 6)
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, response.status_code, response.encoding, response.headers.get("Content-Type"), body, len(body), now, now + self.ttl(url=url), now),
+            )
+            self._evict()
+
+    def _evict(self):
+        total = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for url, size in self._connection.execute("SELECT url, size FROM responses ORDER BY accessed").fetchall():
+            if total <= self.max_bytes:
+                break
+            logging.debug(f"Evicting {url} ({size} bytes) from the response cache.")
+            self._connection.execute("DELETE FROM responses WHERE url = ?", (url,))
+            total -= size
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {"entries": entries, "bytes": size, "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
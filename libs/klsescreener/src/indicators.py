@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import third-party libraries
+import numpy
+import pandas
+
+# Import internal libraries
+from klsescreener.resample import DAY, UTC_OFFSET
+
+
+class IndicatorEngine:
+    """Vectorized SMA, EMA, RSI, MACD, Bollinger bands, ATR and VWAP over bars.
+
+    Takes ``Stock.historical_data`` output (one symbol, any order) or a ``fetch_history`` panel
+    (a ``symbol`` column or a ``(symbol, t)`` index) and returns it with one column per indicator.
+    Symbols are laid out as the rows of a matrix, window indicators are computed from cumulative
+    sums and recursive ones step over the bars of every symbol at once.
+
+    EMA, RSI and ATR smoothings follow ``pandas.Series.ewm(adjust=False)``, seeded with the first
+    value; RSI and ATR use Wilder's ``alpha = 1 / period``. Bollinger bands use the population
+    standard deviation. VWAP is anchored at each trading day (UTC+8), or over the last ``vwap``
+    bars when ``vwap`` is a number, e.g. for daily bars.
+
+    The engine keeps the last bars and the smoothing state of every symbol, so ``update`` only
+    computes the bars newer than the ones already seen.
+    """
+
+    def __init__(self, sma: tuple = (20, 50), ema: tuple = (12, 26), rsi: int | None = 14, macd: tuple | None = (12, 26, 9), bollinger: tuple | None = (20, 2.0), atr: int | None = 14, vwap: int | None = None):
+        self.sma = tuple(sma)
+        self.ema = tuple(ema)
+        self.rsi = rsi
+        self.macd = macd
+        self.bollinger = bollinger
+        self.atr = atr
+        self.vwap = vwap
+        windows = [*self.sma, *((bollinger[0],) if bollinger else ()), *((vwap,) if vwap else ()), 1]
+        self.window = max(windows)
+        # Recursive smoothings of the first stage, keyed by (input, alpha)
+        smoothings = {("c", 2 / (period + 1)) for period in self.ema}
+        if macd:
+            smoothings.update({("c", 2 / (macd[0] + 1)), ("c", 2 / (macd[1] + 1))})
+        if rsi:
+            smoothings.update({("gain", 1 / rsi), ("loss", 1 / rsi)})
+        if atr:
+            smoothings.add(("tr", 1 / atr))
+        self._smoothings = sorted(smoothings)
+        self.reset()
+
+    def reset(self):
+        """Forget every symbol seen so far.
+        """
+        self._symbols = {}
+        self._tail = numpy.full((0, 5, self.window), numpy.nan)
+        self._state = numpy.full((len(self._smoothings), 0), numpy.nan)
+        self._signal = numpy.full(0, numpy.nan)
+        self._session = numpy.full((3, 0), numpy.nan)
+        self._last_t = numpy.full(0, numpy.iinfo("int64").min, dtype="int64")
+
+    def compute(self, dataframe: pandas.DataFrame) -> pandas.DataFrame:
+        """Return ``dataframe`` with the indicator columns computed over its whole history.
+        """
+        self.reset()
+        return self.update(dataframe=dataframe)
+
+    def update(self, dataframe: pandas.DataFrame) -> pandas.DataFrame:
+        """Return the rows of ``dataframe`` newer than the bars already seen, with their indicator columns.
+        """
+        frame = dataframe.reset_index() if "t" not in dataframe.columns else dataframe
+        codes, symbols = pandas.factorize(frame["symbol"] if "symbol" in frame.columns else numpy.zeros(len(frame)), use_na_sentinel=False)
+        if "symbol" not in frame.columns:
+            symbols = [None] * len(symbols)
+        self._add_symbols(symbols=[symbol for symbol in symbols if symbol not in self._symbols])
+        rows = numpy.array([self._symbols[symbol] for symbol in symbols], dtype="int64")[codes]
+        t = frame["t"].to_numpy(dtype="int64")
+        new = t > self._last_t[rows]
+
+        # Sort the new bars by symbol then time and lay them out one symbol per matrix row, after its tail
+        order = numpy.flatnonzero(new)[numpy.lexsort((t[new], rows[new]))]
+        batch, local = numpy.unique(rows[order], return_inverse=True)
+        starts = numpy.flatnonzero(numpy.r_[True, local[1:] != local[:-1]]) if len(order) else numpy.zeros(0, dtype="int64")
+        lengths = numpy.diff(numpy.r_[starts, len(order)])
+        position = numpy.arange(len(order)) - numpy.repeat(starts, lengths)
+        columns = self.window + position
+        width = self.window + (lengths.max() if len(lengths) else 0)
+
+        bars = numpy.full((5, len(batch), width), numpy.nan)
+        bars[:, :, :self.window] = self._tail[batch].transpose(1, 0, 2)
+        for index, name in enumerate(("c", "h", "l", "v")):
+            bars[index, local, columns] = frame[name].to_numpy(dtype="float64")[order]
+        bars[4, local, columns] = t[order]
+        outputs = self._indicators(bars=bars, batch=batch, lengths=lengths)
+
+        # Back to the row order of the input
+        result = frame.copy() if len(order) == len(frame) else frame.iloc[numpy.sort(order)].copy()
+        restore = numpy.argsort(order)
+        for name in list(outputs):
+            result[name] = outputs.pop(name)[local, columns][restore]
+        if dataframe is not frame:
+            result = result.set_index(keys=list(dataframe.index.names))
+
+        # Keep the last bars of every symbol of the batch for the next update
+        tail = numpy.take_along_axis(bars, (lengths[:, None] + numpy.arange(self.window))[None, :, :], axis=2)
+        self._tail[batch] = tail.transpose(1, 0, 2)
+        if len(order):
+            self._last_t[batch] = numpy.maximum.reduceat(t[order], starts)
+        return result
+
+    def _add_symbols(self, symbols: list):
+        count = len(symbols)
+        for symbol in symbols:
+            self._symbols[symbol] = len(self._symbols)
+        self._tail = numpy.concatenate([self._tail, numpy.full((count, 5, self.window), numpy.nan)])
+        self._state = numpy.concatenate([self._state, numpy.full((len(self._smoothings), count), numpy.nan)], axis=1)
+        self._signal = numpy.r_[self._signal, numpy.full(count, numpy.nan)]
+        self._session = numpy.concatenate([self._session, numpy.repeat([[numpy.nan], [0.0], [0.0]], count, axis=1)], axis=1)
+        self._last_t = numpy.r_[self._last_t, numpy.full(count, numpy.iinfo("int64").min, dtype="int64")]
+
+    def _indicators(self, bars: numpy.ndarray, batch: numpy.ndarray, lengths: numpy.ndarray) -> dict:
+        close, high, low, volume, t = bars
+        previous = numpy.c_[numpy.full(len(close), numpy.nan), close[:, :-1]]
+        outputs = {}
+        for period in self.sma:
+            outputs[f"sma_{period}"] = _rolling_mean(values=close, window=period)
+        if self.bollinger:
+            period, width = self.bollinger
+            middle = _rolling_mean(values=close, window=period)
+            # The variance does not depend on the offset, which keeps the cumulative sums small
+            offset = numpy.nanmean(close, axis=1, keepdims=True) if close.size else 0.0
+            deviation = numpy.sqrt(numpy.maximum(_rolling_mean(values=(close - offset) ** 2, window=period) - (middle - offset) ** 2, 0.0))
+            outputs["bb_middle"] = middle
+            outputs["bb_upper"] = middle + width * deviation
+            outputs["bb_lower"] = middle - width * deviation
+
+        inputs = {"c": close}
+        if self.rsi:
+            change = close - previous
+            inputs["gain"] = numpy.where(change > 0, change, numpy.where(numpy.isnan(change), numpy.nan, 0.0))
+            inputs["loss"] = numpy.where(change < 0, -change, numpy.where(numpy.isnan(change), numpy.nan, 0.0))
+        if self.atr:
+            inputs["tr"] = numpy.fmax(high - low, numpy.fmax(numpy.abs(high - previous), numpy.abs(low - previous)))
+        smoothed, self._state[:, batch] = _smooth(
+            values=numpy.stack([inputs[name] for name, _ in self._smoothings]) if self._smoothings else numpy.zeros((0, *close.shape)),
+            alphas=numpy.array([alpha for _, alpha in self._smoothings]),
+            state=self._state[:, batch],
+            start=self.window,
+        )
+        smoothing = {key: smoothed[index] for index, key in enumerate(self._smoothings)}
+
+        for period in self.ema:
+            outputs[f"ema_{period}"] = smoothing[("c", 2 / (period + 1))]
+        if self.rsi:
+            with numpy.errstate(divide="ignore", invalid="ignore"):
+                outputs[f"rsi_{self.rsi}"] = 100 - 100 / (1 + smoothing[("gain", 1 / self.rsi)] / smoothing[("loss", 1 / self.rsi)])
+        if self.macd:
+            fast, slow, signal = self.macd
+            line = smoothing[("c", 2 / (fast + 1))] - smoothing[("c", 2 / (slow + 1))]
+            signal_line, state = _smooth(values=line[None], alphas=numpy.array([2 / (signal + 1)]), state=self._signal[None, batch], start=self.window)
+            self._signal[batch] = state[0]
+            outputs["macd"] = line
+            outputs["macd_signal"] = signal_line[0]
+            outputs["macd_hist"] = line - signal_line[0]
+        if self.atr:
+            outputs[f"atr_{self.atr}"] = smoothing[("tr", 1 / self.atr)]
+
+        typical = (high + low + close) / 3
+        if self.vwap:
+            outputs["vwap"] = _rolling_mean(values=typical * volume, window=self.vwap) / _rolling_mean(values=volume, window=self.vwap)
+        else:
+            outputs["vwap"] = self._session_vwap(pv=typical * volume, volume=volume, t=t, batch=batch, lengths=lengths)
+        return outputs
+
+    def _session_vwap(self, pv: numpy.ndarray, volume: numpy.ndarray, t: numpy.ndarray, batch: numpy.ndarray, lengths: numpy.ndarray) -> numpy.ndarray:
+        """VWAP anchored at the start of every trading day, carrying on the day of the last update.
+        """
+        # The column before the new bars holds the running sums of the last update
+        session = numpy.floor((t + UTC_OFFSET) / DAY)
+        session[:, :self.window] = numpy.nan
+        session[:, self.window - 1], cumulative_pv, cumulative_volume = self._session[:, batch]
+        pv = numpy.where(numpy.isnan(pv), 0.0, pv)
+        volume = numpy.where(numpy.isnan(volume), 0.0, volume)
+        pv[:, self.window - 1] = cumulative_pv
+        volume[:, self.window - 1] = cumulative_volume
+
+        columns = numpy.arange(session.shape[1])
+        change = numpy.ones(session.shape, dtype=bool)
+        change[:, 1:] = session[:, 1:] != session[:, :-1]
+        starts = numpy.maximum.accumulate(numpy.where(change, columns, 0), axis=1)
+        totals = []
+        for values in (pv, volume):
+            cumulative = numpy.cumsum(values, axis=1)
+            totals.append(cumulative - numpy.take_along_axis(cumulative - values, starts, axis=1))
+
+        rows = numpy.arange(len(batch))
+        last = self.window - 1 + lengths
+        self._session[:, batch] = numpy.stack([session[rows, last], totals[0][rows, last], totals[1][rows, last]])
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            return numpy.where(numpy.isnan(session), numpy.nan, totals[0] / totals[1])
+
+
+def _rolling_mean(values: numpy.ndarray, window: int) -> numpy.ndarray:
+    """Mean of the last ``window`` values along the rows, NaN until ``window`` finite values are available.
+    """
+    finite = numpy.isfinite(values)
+    zeros = numpy.zeros((values.shape[0], 1))
+    sums = numpy.cumsum(numpy.c_[zeros, numpy.where(finite, values, 0.0)], axis=1)
+    counts = numpy.cumsum(numpy.c_[zeros, finite], axis=1)
+    result = numpy.full(values.shape, numpy.nan)
+    if values.shape[1] >= window:
+        total = sums[:, window:] - sums[:, :-window]
+        count = counts[:, window:] - counts[:, :-window]
+        result[:, window - 1:] = numpy.where(count == window, total / window, numpy.nan)
+    return result
+
+
+def _smooth(values: numpy.ndarray, alphas: numpy.ndarray, state: numpy.ndarray, start: int) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """Exponential smoothing of every ``values[k]`` row with ``alphas[k]`` from column ``start`` on.
+
+    Each series starts from ``state`` or, when it is NaN, from its first value; NaN values are
+    skipped. Returns the smoothed values, NaN where the input is NaN, and the last state.
+    """
+    result = numpy.full(values.shape, numpy.nan)
+    alphas = alphas[:, None]
+    previous = state.copy()
+    for column in range(start, values.shape[2]):
+        value = values[:, :, column]
+        previous = numpy.where(numpy.isnan(value), previous, numpy.where(numpy.isnan(previous), value, previous + alphas * (value - previous)))
+        result[:, :, column] = previous
+    result[numpy.isnan(values)] = numpy.nan
+    return result, previous
+
+
+def indicators(dataframe: pandas.DataFrame, **kwargs) -> pandas.DataFrame:
+    """Return ``dataframe`` with the indicator columns of an ``IndicatorEngine(**kwargs)``.
+    """
+    return IndicatorEngine(**kwargs).compute(dataframe=dataframe)
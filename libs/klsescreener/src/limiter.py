@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import standard libraries
+from collections import deque
+from typing import Callable
+import threading
+import time
+import re
+
+# Import internal libraries
+from shared.metrics import metrics
+
+
+# Initial requests per second and burst allowed per endpoint, first matching url pattern wins
+DEFAULT_BUDGETS = [
+    (r"/trading_view/history", 20.0, 40),
+    (r"/stocks/view/", 8.0, 16),
+]
+
+# Statuses telling that the site is overloaded. A 202 only means that the history is still
+# being prepared and is polled again, it is not a sign of congestion
+CONGESTION_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at ``rate`` tokens per second up to ``burst`` tokens.
+
+    With a ``max_rate`` the rate follows the outcome of the requests through ``adapt``: it grows
+    by ``growth`` per healthy response until the first congestion (slow start), then by
+    ``increase`` tokens per second, and is cut by ``decrease`` on congestion.
+    """
+
+    def __init__(self, rate: float, burst: int, max_rate: float | None = None, min_rate: float = 1.0, growth: float = 0.1, increase: float = 0.5, decrease: float = 0.5):
+        self.rate = rate
+        self.burst = burst
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.growth = growth
+        self.increase = increase
+        self.decrease = decrease
+        self.slow_start = True
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds to wait before using it.
+
+        Tokens may go negative so that waiting callers are served in the order they arrived.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate) - 1
+            self.updated = now
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self) -> float:
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def adapt(self, healthy: bool):
+        """Raise the rate after a healthy response or cut it on congestion, a fixed bucket is left as is.
+        """
+        if self.max_rate is None:
+            return
+        with self._lock:
+            # Refill at the old rate up to now so the change only applies from here on
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if healthy:
+                rate = self.rate * (1 + self.growth) if self.slow_start else self.rate + self.increase
+                self.rate = min(self.max_rate, rate)
+            else:
+                self.rate = max(self.min_rate, self.rate * self.decrease)
+                self.slow_start = False
+
+
+class ConcurrencyWindow:
+    """AIMD limit on the number of requests in flight.
+
+    Every healthy response widens the window by ``increase / window``, about ``increase`` per
+    round trip. An error, a congestion status or a smoothed latency beyond ``tolerance`` times
+    the fastest recent latency, and at least ``delay`` seconds above it, shrinks it by
+    ``decrease``, at most once per round trip. Latencies
+    are tracked per ``endpoint``, so that slow pages do not read as congestion of fast ones.
+    """
+
+    def __init__(self, initial: int = 16, minimum: int = 1, maximum: int = 64, increase: float = 1.0, decrease: float = 0.5, tolerance: float = 2.0, delay: float = 0.05, smoothing: float = 0.1):
+        self.window = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.increase = increase
+        self.decrease = decrease
+        self.tolerance = tolerance
+        self.delay = delay
+        self.smoothing = smoothing
+        self.in_flight = 0
+        self.latency = {}
+        self.baseline = {}
+        self.errors = 0
+        self.decreases = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= int(self.window):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, latency: float, ok: bool = True, endpoint: str | None = None) -> bool | None:
+        """Free a slot and adapt the window to the outcome of a request to ``endpoint``.
+
+        Returns True when the window grew, False when it shrank and None when it was left as is.
+        """
+        with self._condition:
+            self.in_flight -= 1
+            smoothed = self.latency.get(endpoint)
+            smoothed = self.latency[endpoint] = latency if smoothed is None else (1 - self.smoothing) * smoothed + self.smoothing * latency
+            # The baseline follows the fastest latency and slowly forgets it
+            baseline = self.baseline.get(endpoint)
+            baseline = self.baseline[endpoint] = latency if baseline is None else min(latency, baseline * (1 + self.smoothing / 10))
+            if ok is False:
+                self.errors += 1
+            now = time.monotonic()
+            changed = None
+            if ok is False or smoothed > max(self.tolerance * baseline, baseline + self.delay):
+                if now - self._last_decrease > smoothed:
+                    self.window = max(self.minimum, self.window * self.decrease)
+                    self._last_decrease = now
+                    self.decreases += 1
+                    changed = False
+            else:
+                self.window = min(self.maximum, self.window + self.increase / self.window)
+                changed = True
+            self._condition.notify_all()
+            return changed
+
+
+class RateLimiter:
+    """Per-endpoint token buckets in front of a shared AIMD concurrency window.
+
+    The buckets pace the request rate of each endpoint, the window finds how many requests the
+    site sustains at once. The budgets are only starting rates: every change of the window
+    raises or cuts the rate of the endpoint that caused it, up to ``max_rate``. Pass
+    ``adaptive=False`` to keep them as fixed caps. ``stats`` reports the current window, rates
+    and the observed request rate.
+    """
+
+    def __init__(self, budgets: list | None = None, default_rate: float = 10.0, default_burst: int = 20, window: ConcurrencyWindow | None = None, period: float = 10.0, adaptive: bool = True, max_rate: float = 200.0):
+        max_rate = max_rate if adaptive else None
+        self.buckets = [(re.compile(pattern), TokenBucket(rate=rate, burst=burst, max_rate=max_rate)) for pattern, rate, burst in (DEFAULT_BUDGETS if budgets is None else budgets)]
+        self.default = TokenBucket(rate=default_rate, burst=default_burst, max_rate=max_rate)
+        self.window = ConcurrencyWindow() if window is None else window
+        self.period = period
+        self.waited = 0.0
+        self._completed = deque()
+        self._lock = threading.Lock()
+
+    def endpoint(self, url: str) -> tuple:
+        """Return the budget pattern matching ``url``, or None for the default budget, and its bucket.
+        """
+        for pattern, bucket in self.buckets:
+            if pattern.search(url):
+                return pattern.pattern, bucket
+        return None, self.default
+
+    def bucket(self, url: str) -> TokenBucket:
+        return self.endpoint(url=url)[1]
+
+    def send(self, url: str, request: Callable):
+        """Run ``request`` once the endpoint budget and the concurrency window allow it.
+
+        ``request`` returns a response, whose status decides whether the window grows or shrinks.
+        """
+        endpoint, bucket = self.endpoint(url=url)
+        waited = bucket.acquire()
+        if waited > 0:
+            metrics.count("limiter_wait_seconds", waited)
+        self.window.acquire()
+        start = time.monotonic()
+        ok = False
+        try:
+            response = request()
+            ok = response.status_code not in CONGESTION_STATUSES
+            return response
+        finally:
+            end = time.monotonic()
+            changed = self.window.release(latency=end - start, ok=ok, endpoint=endpoint)
+            if changed is not None:
+                bucket.adapt(healthy=changed)
+            with self._lock:
+                self.waited += waited
+                self._completed.append(end)
+                while self._completed[0] < end - self.period:
+                    self._completed.popleft()
+
+    def rate(self) -> float:
+        """Requests completed per second over the last ``period`` seconds.
+        """
+        with self._lock:
+            now = time.monotonic()
+            while self._completed and self._completed[0] < now - self.period:
+                self._completed.popleft()
+            return len(self._completed) / self.period
+
+    def stats(self) -> dict:
+        return {
+            "rate": self.rate(),
+            "window": self.window.window,
+            "in_flight": self.window.in_flight,
+            "latency": dict(self.window.latency),
+            "baseline": dict(self.window.baseline),
+            "errors": self.window.errors,
+            "decreases": self.window.decreases,
+            "waited": self.waited,
+            "budgets": {**{pattern.pattern: bucket.rate for pattern, bucket in self.buckets}, None: self.default.rate},
+        }
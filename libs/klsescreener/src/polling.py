@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import standard libraries
+import threading
+import random
+
+
+class BackoffPolicy:
+    """Jittered exponential wait between polls of a resource that answers "202 Accepted" while it is prepared.
+
+    The first wait adapts to how long recent resources took to become ready, so that a typical
+    request is polled about twice. Counters record how often and how long callers waited.
+    """
+
+    def __init__(self, initial: float = 0.25, factor: float = 2.0, maximum: float = 4.0, deadline: float = 20.0, jitter: float = 0.25, smoothing: float = 0.2):
+        self.initial = initial
+        self.factor = factor
+        self.maximum = maximum
+        self.deadline = deadline
+        self.jitter = jitter
+        self.smoothing = smoothing
+        self.estimate = None
+        self.polls = 0
+        self.waited = 0.0
+        self.timeouts = 0
+        self._lock = threading.Lock()
+
+    def delays(self):
+        """Yield the successive waits before each new poll.
+        """
+        delay = self.initial if self.estimate is None else min(self.maximum, max(self.initial, self.estimate / 2))
+        while True:
+            yield delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+            delay = min(self.maximum, delay * self.factor)
+
+    def record(self, polls: int, waited: float, timed_out: bool = False):
+        """Account for one request that needed ``polls`` extra polls and ``waited`` seconds.
+        """
+        with self._lock:
+            self.polls += polls
+            self.waited += waited
+            if timed_out is True:
+                self.timeouts += 1
+            elif polls > 0:
+                self.estimate = waited if self.estimate is None else (1 - self.smoothing) * self.estimate + self.smoothing * waited
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"polls": self.polls, "waited": self.waited, "timeouts": self.timeouts, "estimate": self.estimate}
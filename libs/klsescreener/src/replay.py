@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import standard libraries
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+import threading
+import pathlib
+import logging
+import json
+import os
+
+# Import third-party libraries
+import requests
+import pandas
+
+# Import internal libraries
+from klsescreener.transport import Transport
+from klsescreener.resample import SOURCES, resample
+
+
+# Site whose urls are redirected to the stand-in server
+ORIGIN = "https://www.klsescreener.com"
+
+HISTORY_PATH = "/trading_view/history"
+BAR_COLUMNS = ["t", "o", "h", "l", "c", "v"]
+
+
+class Fixtures:
+    """Directory of recorded responses, laid out like the site.
+
+    ``pages/<url path>.html`` holds a page, e.g. ``pages/v2/stocks/view/1818.html``, and
+    ``history/<symbol>/<resolution>.json`` the bars of the history endpoint. Resolutions
+    without a file are resampled from the bars of their finer source resolution.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = pathlib.Path(path)
+        self._pages = {}
+        self._bars = {}
+        self._lock = threading.Lock()
+
+    def _page_path(self, path: str) -> pathlib.Path:
+        return self.path / "pages" / f"{path.strip('/')}.html"
+
+    def _bars_path(self, symbol: str, resolution: str) -> pathlib.Path:
+        return self.path / "history" / symbol / f"{resolution}.json"
+
+    def page(self, path: str) -> bytes | None:
+        """Return the recorded page of a url path, or None.
+        """
+        with self._lock:
+            if path not in self._pages:
+                page_path = self._page_path(path=path)
+                self._pages[path] = page_path.read_bytes() if page_path.exists() else None
+            return self._pages[path]
+
+    def bars(self, symbol: str, resolution: str) -> pandas.DataFrame | None:
+        """Return every recorded, or derived, bar of ``symbol`` sorted by ``t``, or None.
+        """
+        key = (symbol, resolution)
+        with self._lock:
+            if key in self._bars:
+                return self._bars[key]
+            bars_path = self._bars_path(symbol=symbol, resolution=resolution)
+            dataframe = pandas.DataFrame(data=json.loads(bars_path.read_text()))[BAR_COLUMNS] if bars_path.exists() else None
+        if dataframe is None and resolution in SOURCES:
+            source = self.bars(symbol=symbol, resolution=SOURCES[resolution])
+            dataframe = None if source is None else resample(dataframe=source, resolution=resolution)
+        if dataframe is not None:
+            dataframe = dataframe.sort_values(by=["t"]).reset_index(drop=True)
+        with self._lock:
+            self._bars[key] = dataframe
+        return dataframe
+
+    def history(self, query: dict) -> dict:
+        """Answer a history request like the real endpoint, keeping the bars within ``from`` and ``to``.
+        """
+        dataframe = self.bars(symbol=query["symbol"][0], resolution=query["resolution"][0])
+        if dataframe is not None:
+            dataframe = dataframe[(dataframe["t"] >= int(query["from"][0])) & (dataframe["t"] <= int(query["to"][0]))]
+            if "countback" in query:
+                dataframe = dataframe.tail(int(query["countback"][0]))
+        if dataframe is None or dataframe.empty:
+            return {"s": "no_data"}
+        return {"s": "ok", **{column: dataframe[column].tolist() for column in BAR_COLUMNS}}
+
+    def save_page(self, path: str, content: bytes):
+        page_path = self._page_path(path=path)
+        page_path.parent.mkdir(parents=True, exist_ok=True)
+        page_path.write_bytes(content)
+        with self._lock:
+            self._pages.pop(path, None)
+
+    def save_history(self, query: dict, data: dict):
+        """Merge the bars of a history answer into the recorded ones.
+        """
+        if data.get("s") != "ok":
+            return
+        symbol, resolution = query["symbol"][0], query["resolution"][0]
+        bars_path = self._bars_path(symbol=symbol, resolution=resolution)
+        with self._lock:
+            dataframe = pandas.DataFrame(data={column: data[column] for column in BAR_COLUMNS})
+            if bars_path.exists():
+                dataframe = pandas.concat(objs=[pandas.DataFrame(data=json.loads(bars_path.read_text())), dataframe])
+            dataframe = dataframe.drop_duplicates(subset=["t"], keep="last").sort_values(by=["t"])
+            bars_path.parent.mkdir(parents=True, exist_ok=True)
+            bars_path.write_text(json.dumps({column: dataframe[column].tolist() for column in BAR_COLUMNS}))
+            self._bars.clear()
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path.endswith(HISTORY_PATH):
+            status, content_type = 200, "application/json"
+            body = json.dumps(self.server.fixtures.history(query=parse_qs(url.query))).encode()
+        else:
+            body = self.server.fixtures.page(path=url.path)
+            status, content_type = (404, "text/plain") if body is None else (200, "text/html; charset=utf-8")
+            body = b"Not recorded" if body is None else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplayServer:
+    """Local keep-alive HTTP server answering every klsescreener.com url from ``Fixtures``.
+
+    Use it with ``ReplayTransport`` to run the library, tests or load tests without network.
+    """
+
+    def __init__(self, fixtures: Fixtures | str | os.PathLike, host: str = "127.0.0.1", port: int = 0):
+        self.fixtures = fixtures if isinstance(fixtures, Fixtures) else Fixtures(path=fixtures)
+        self._httpd = ThreadingHTTPServer((host, port), _ReplayHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.fixtures = self.fixtures
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "ReplayServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logging.debug(f"Replaying {self.fixtures.path} on {self.url}.")
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "ReplayServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+class ReplayTransport(Transport):
+    """Transport sending every ``origin`` request to ``target``, typically a ``ReplayServer``.
+    """
+
+    def __init__(self, target: str, origin: str = ORIGIN, **kwargs):
+        super().__init__(**kwargs)
+        self.target = target.rstrip("/")
+        self.origin = origin
+
+    def get(self, url: str, headers: dict | None = None, timeout: float | tuple | None = None, **kwargs) -> requests.Response:
+        if url.startswith(self.origin):
+            url = self.target + url[len(self.origin):]
+        return super().get(url=url, headers=headers, timeout=timeout, **kwargs)
+
+
+class RecordingTransport(Transport):
+    """Transport saving every successful ``origin`` response into ``Fixtures`` for later replay.
+    """
+
+    def __init__(self, fixtures: Fixtures | str | os.PathLike, origin: str = ORIGIN, **kwargs):
+        super().__init__(**kwargs)
+        self.fixtures = fixtures if isinstance(fixtures, Fixtures) else Fixtures(path=fixtures)
+        self.origin = origin
+
+    def get(self, url: str, headers: dict | None = None, timeout: float | tuple | None = None, **kwargs) -> requests.Response:
+        response = super().get(url=url, headers=headers, timeout=timeout, **kwargs)
+        if response.status_code == 200 and url.startswith(self.origin):
+            parts = urlsplit(url)
+            if parts.path.endswith(HISTORY_PATH):
+                self.fixtures.save_history(query=parse_qs(parts.query), data=response.json())
+            else:
+                self.fixtures.save_page(path=parts.path, content=response.content)
+        return response
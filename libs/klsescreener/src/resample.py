@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import third-party libraries
+import numpy
+import pandas
+
+# Import internal libraries
+from klsescreener.resolution import Resolution
+
+
+# Bursa Malaysia trades in local time (UTC+8), the first session opens at 09:00
+UTC_OFFSET = 8 * 60 * 60
+SESSION_OPEN = 9 * 60 * 60
+DAY = 24 * 60 * 60
+
+# Finer resolution each coarse resolution can be derived from
+SOURCES = {
+    Resolution.MINUTE_5.value : Resolution.MINUTE_1.value,
+    Resolution.MINUTE_15.value: Resolution.MINUTE_1.value,
+    Resolution.MINUTE_30.value: Resolution.MINUTE_1.value,
+    Resolution.HOUR_1.value   : Resolution.MINUTE_1.value,
+    Resolution.HOUR_4.value   : Resolution.MINUTE_1.value,
+    Resolution.WEEKLY.value   : Resolution.DAILY.value,
+    Resolution.MONTH_1.value  : Resolution.DAILY.value,
+    Resolution.MONTH_3.value  : Resolution.DAILY.value,
+    Resolution.MONTH_6.value  : Resolution.DAILY.value,
+    Resolution.YEAR_1.value   : Resolution.DAILY.value,
+    Resolution.YEAR_5.value   : Resolution.DAILY.value,
+    Resolution.YEAR_10.value  : Resolution.DAILY.value,
+}
+
+# Bar length in seconds of the intraday targets, counted from the session open
+INTRADAY_SECONDS = {
+    Resolution.MINUTE_5.value : 5 * 60,
+    Resolution.MINUTE_15.value: 15 * 60,
+    Resolution.MINUTE_30.value: 30 * 60,
+    Resolution.HOUR_1.value   : 60 * 60,
+    Resolution.HOUR_4.value   : 4 * 60 * 60,
+}
+
+# Bar length in months of the monthly and longer targets, counted from January 1970
+CALENDAR_MONTHS = {
+    Resolution.MONTH_1.value: 1,
+    Resolution.MONTH_3.value: 3,
+    Resolution.MONTH_6.value: 6,
+    Resolution.YEAR_1.value : 12,
+    Resolution.YEAR_5.value : 5 * 12,
+    Resolution.YEAR_10.value: 10 * 12,
+}
+
+
+def _bucket_starts(t: numpy.ndarray, resolution: str) -> numpy.ndarray:
+    """Return the start of the ``resolution`` bar every timestamp in ``t`` belongs to.
+
+    Intraday bars are aligned to the 09:00 session open in local time, so 4H bars cover
+    09:00-13:00 and 13:00-17:00. Daily based bars keep the time of day of their first source bar.
+    """
+    local = t + UTC_OFFSET
+    day = local // DAY
+    if resolution in INTRADAY_SECONDS:
+        size = INTRADAY_SECONDS[resolution]
+        second = local - day * DAY
+        return day * DAY + SESSION_OPEN + (second - SESSION_OPEN) // size * size - UTC_OFFSET
+    if resolution == Resolution.WEEKLY.value:
+        # 1970-01-01 is a Thursday, shift so that weeks start on Monday
+        start_day = day - (day + 3) % 7
+    elif resolution in CALENDAR_MONTHS:
+        months = day.astype("datetime64[D]").astype("datetime64[M]").astype("int64")
+        months -= months % CALENDAR_MONTHS[resolution]
+        start_day = months.astype("datetime64[M]").astype("datetime64[D]").astype("int64")
+    else:
+        raise ValueError(f"Resolution {resolution} can not be derived from finer bars")
+    return t - (day - start_day) * DAY
+
+
+def resample(dataframe: pandas.DataFrame, resolution: Resolution | str) -> pandas.DataFrame:
+    """Aggregate raw ``t``/``o``/``h``/``l``/``c``/``v`` bars into coarser ``resolution`` bars.
+
+    Every bar takes the first open, highest high, lowest low, last close and summed volume of the
+    source bars it covers and is stamped with the start of its period. Extra columns such as the
+    ones added by ``Stock.historical_data`` are ignored and the result is sorted by ``t``.
+    """
+    resolution = resolution.value if isinstance(resolution, Resolution) else resolution
+    columns = ["t", "o", "h", "l", "c", "v"]
+    dataframe = dataframe[columns].sort_values(by=["t"], kind="stable")
+    if dataframe.empty:
+        return dataframe.reset_index(drop=True)
+
+    t = dataframe["t"].to_numpy(dtype="int64")
+    buckets = _bucket_starts(t=t, resolution=resolution)
+    starts = numpy.flatnonzero(numpy.r_[True, buckets[1:] != buckets[:-1]])
+    ends = numpy.r_[starts[1:], len(t)] - 1
+
+    result = pandas.DataFrame(data={
+        "t": buckets[starts],
+        "o": dataframe["o"].to_numpy()[starts],
+        "h": numpy.maximum.reduceat(dataframe["h"].to_numpy(), starts),
+        "l": numpy.minimum.reduceat(dataframe["l"].to_numpy(), starts),
+        "c": dataframe["c"].to_numpy()[ends],
+        "v": numpy.add.reduceat(dataframe["v"].to_numpy(), starts),
+    })
+    return result.astype(dtype=dataframe.dtypes.to_dict())
@@ -4,67 +4,147 @@
 
 # Import standard libraries
 from urllib.parse import urljoin
-import warnings
+import concurrent.futures
+import functools
 import logging
-import urllib3
-import json
 import time
 import re
 
 # Import third-party libraries
 from bs4 import BeautifulSoup
-import requests
+import lxml.html
 import pandas
+import numpy
 
 # Import internal libraries
+from klsescreener.transport import Transport, get_transport
+from klsescreener.tables import read_tables
+from klsescreener.cache import SingleFlight, TTLCache
+from klsescreener.polling import BackoffPolicy
 from shared.decorators import performance
 
 
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-warnings.simplefilter(action="ignore", category=FutureWarning)
+# Stand-in for None so that factorize does not merge it with NaN
+_NONE = object()
+
+# The same stock and report links repeat across rows and tables
+_urljoin = functools.lru_cache(maxsize=8192)(urljoin)
+
+
+class ScreenerSnapshot:
+    """Screener table downloaded at ``created`` with the lists derived from it.
+
+    Derived lists are computed once per snapshot and must be treated as read-only.
+    """
+
+    def __init__(self, dataframe: pandas.DataFrame):
+        self.dataframe = dataframe
+        self.created = time.time()
+
+    @functools.cached_property
+    def stockcodes(self) -> list:
+        return sorted(self.dataframe["Code"].dropna().to_list())
+
+    @functools.cached_property
+    def stocknames(self) -> list:
+        return sorted(self.dataframe["Name"].dropna().to_list())
+
+    @functools.cached_property
+    def categories(self) -> list:
+        return sorted(set(self.dataframe["Category"].dropna().to_list()))
+
+    @functools.cached_property
+    def markets(self) -> list:
+        return sorted(set(self.dataframe["Market"].dropna().to_list()))
 
 
 class KLSEScreener:
 
+    # Screener snapshots shared by every instance in the process, refreshed after `ttl` seconds
+    snapshot_cache = TTLCache(ttl=300, name="snapshot")
+
+    # Rarely changing Bursa index components, shared by every instance
+    components_cache = TTLCache(ttl=24 * 60 * 60, name="bursa_components")
+
+    # Concurrent `fetch_json` calls of the same url and the wait between polls of a 202 answer
+    json_flight = SingleFlight()
+    backoff = BackoffPolicy()
+
     def __init__(self):
         self.url = "https://www.klsescreener.com/v2"
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
         }
 
-    def fetch_html(self, url: str, match: str = ".+", extract_links: str | None = None) -> list:
+    @property
+    def transport(self) -> Transport:
+        return get_transport()
+
+    @performance()
+    def fetch_html(self, url: str, match: str = ".+", extract_links: str | None = None, index: int | slice | None = None) -> list:
         """Fetch html from website.
         """
-        logging.debug(f"Fetching html from {url} with match={match} and extract_links={extract_links}")
-        response = requests.get(url=url, headers=self.headers)
+        logging.debug(f"Fetching html from {url} with match={match}, extract_links={extract_links} and index={index}")
+        response = self.transport.get(url=url, headers=self.headers)
         response.raise_for_status()
-        dataframes = pandas.read_html(io=response.text, match=match, extract_links=extract_links)
+        dataframes = self.read_html(text=response.text, match=match, extract_links=extract_links, index=index)
+        return dataframes
+
+    @staticmethod
+    def read_html(text: str | lxml.html.HtmlElement, match: str = ".+", extract_links: str | None = None, index: int | slice | None = None) -> list:
+        """Parse html tables from already downloaded text or an already parsed document.
+        """
+        dataframes = read_tables(document=text, match=match, extract_links=extract_links, index=index)
         # Post-process dataframes
         for dataframe in dataframes:
             # If all values in a column are NaN, drop the column
             dataframe.dropna(axis=1, how="all", inplace=True)
         return dataframes
 
-    def fetch_json(self, url: str, timeout: int = 20) -> list:
+    def _poll_json(self, url: str, timeout: float) -> dict | list:
+        started = time.monotonic()
+        polls = 0
+        delays = self.backoff.delays()
+        response = self.transport.get(url=url, headers=self.headers)
+        while response.status_code == 202:
+            remaining = started + timeout - time.monotonic()
+            if remaining <= 0:
+                self.backoff.record(polls=polls, waited=time.monotonic() - started, timed_out=True)
+                raise TimeoutError(f"Timeout after {timeout} seconds while fetching data from {url}.")
+            time.sleep(min(next(delays), remaining))
+            polls += 1
+            response = self.transport.get(url=url, headers=self.headers)
+        self.backoff.record(polls=polls, waited=time.monotonic() - started)
+        return response.json()
+
+    @performance()
+    def fetch_json(self, url: str, timeout: float | None = None) -> pandas.DataFrame:
         """Fetch json from website.
+
+        Identical concurrent requests share one upstream call. While the endpoint answers 202 it
+        is polled again following ``backoff``, for at most ``timeout`` (default ``backoff.deadline``) seconds.
         """
         logging.debug(f"Fetching json from {url}.")
-        with requests.Session() as session:
-            due_time = time.time() + timeout
-            response = session.get(url=url, headers=self.headers)
-            while response.status_code == 202:
-                time.sleep(1)  # Wait for 1 second before retrying
-                response = session.get(url=url, headers=self.headers)
-                if time.time() > due_time:
-                    raise TimeoutError(f"Timeout after {timeout} seconds while fetching data from {url}.")
-        dataframe = pandas.DataFrame(data=response.json())
+        timeout = self.backoff.deadline if timeout is None else timeout
+        data = self.json_flight.do(key=url, function=lambda: self._poll_json(url=url, timeout=timeout))
+        # A "no_data" answer only has scalar values, keep it as a single row
+        if isinstance(data, dict) and not any(isinstance(value, list) for value in data.values()):
+            data = [data]
+        dataframe = pandas.DataFrame(data=data)
         return dataframe
 
+    @classmethod
+    def fetch_json_stats(cls) -> dict:
+        """Counters of ``fetch_json``: calls, calls coalesced into another one and 202 backoff.
+        """
+        return {"calls": cls.json_flight.calls, "coalesced": cls.json_flight.coalesced, **cls.backoff.stats()}
+
+    @performance()
     def fetch_text(self, url: str) -> str:
         """Fetch text from website.
         """
         logging.debug(f"Fetching text from {url}.")
-        response = requests.get(url=url, headers=self.headers, verify=False)
+        response = self.transport.get(url=url, headers=self.headers, verify=False)
         response.raise_for_status()
         content = response.text
         return content
@@ -78,24 +158,28 @@ class KLSEScreener:
             return re.sub(r"\b(\w+)\b(\s+\1\b)+", r"\1", text, flags=re.IGNORECASE)
 
         pattern = r"\b(?:Main Market|Ace Market|Leap Market)|ETF\b"
-        dataframe = self.fetch_html(url=f"{self.url}/screener/quote_results")[0]
+        dataframe = self.fetch_html(url=f"{self.url}/screener/quote_results", index=0)[0]
         dataframe["Name"] = dataframe["Name"].str.strip("[s]").str.strip("")
         dataframe["Market"] = dataframe["Category"].str.extract(f"({pattern})", flags=re.IGNORECASE)
-        dataframe["Category"] = dataframe["Category"].str.replace(pattern, "", case=False, regex=True).str.replace(r"[ ,]+", " ", regex=True).str.strip().apply(remove_consecutive_duplicates)
-        dataframe["KLSEScreener"] = dataframe["Code"].apply(lambda x: f"{self.url}/stocks/view/{x}")
-        dataframe["KLSEScreener Chart"] = dataframe["Code"].apply(lambda x: f"{self.url}/charting/chart/{x}")
+        # Only a few dozen distinct categories exist, so clean each of them once and map back
+        categories = pandas.Series(data=dataframe["Category"].dropna().unique())
+        cleaned = categories.str.replace(pattern, "", case=False, regex=True).str.replace(r"[ ,]+", " ", regex=True).str.strip().map(remove_consecutive_duplicates)
+        dataframe["Category"] = dataframe["Category"].map(dict(zip(categories, cleaned)))
+        codes = dataframe["Code"].astype(str)
+        dataframe["KLSEScreener"] = f"{self.url}/stocks/view/" + codes
+        dataframe["KLSEScreener Chart"] = f"{self.url}/charting/chart/" + codes
         return dataframe
 
     @performance()
     def warrant_screener(self) -> pandas.DataFrame:
         """Get the KLSE Warrant Screener data.
         """
-        dataframe = self.fetch_html(url=f"{self.url}/screener_warrants/quote_results")[0]
+        dataframe = self.fetch_html(url=f"{self.url}/screener_warrants/quote_results", index=0)[0]
         return dataframe
 
     @performance()
-    def bursa_index(self) -> pandas.DataFrame:
-        """Get the Bursa Index data.
+    def bursa_index(self, max_workers: int = 8) -> pandas.DataFrame:
+        """Get the Bursa Index data, fetching the index pages concurrently.
         """
         context = self.fetch_text(url=f"{self.url}/markets")
         soup = BeautifulSoup(markup=context, features="html.parser")
@@ -108,50 +192,62 @@ class KLSEScreener:
         })
         dataframe["Chart Link"] = dataframe["Code"].apply(lambda x: f"{self.url}/charting/chart/{x}")
 
-        for row_index, row in dataframe.iterrows():
-            df = self.fetch_html(url=row["Link"])[0].dropna().transpose()
-            df.columns = df.iloc[0]
-            df.drop(labels=df.index[0], inplace=True)
-            series = pandas.Series(data=json.loads(s=df.to_json(orient="records"))[0])
-            dataframe.loc[row_index, series.index] = series
-        return dataframe
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            details = list(executor.map(self._index_details, dataframe["Link"]))
+        return dataframe.join(pandas.DataFrame.from_records(details, index=dataframe.index))
+
+    def _index_details(self, link: str) -> dict:
+        """Key figures of one index page, from its first table of label and value rows.
+        """
+        df = self.fetch_html(url=link, index=0)[0].dropna()
+        return dict(zip(df.iloc[:, 0], df.iloc[:, 1]))
+
+    def _index_components(self, code: str, link: str) -> list | None:
+        if code.startswith("00"):
+            context = self.fetch_text(url=f"{self.url}/markets/bursa/{code}")
+            soup = BeautifulSoup(markup=context, features="html.parser")
+            node = soup.find(name="div", attrs={"class": "container"}).find_next_sibling().find_next_sibling()
+            return [a.text for a in node.find_all("a")]
+        if code == "0200I":
+            return self.fetch_html(url=link, index=-1)[0]["Name"].to_list()
+        return None
 
     @performance()
-    def bursa_index_components(self) -> pandas.DataFrame:
-        dataframe = self.bursa_index()
-        for row_index, row in dataframe.iterrows():
-            if row["Code"].startswith("00"):
-                context = self.fetch_text(url=f"{self.url}/markets/bursa/" + row["Code"])
-                soup = BeautifulSoup(markup=context, features="html.parser")
-                node = soup.find(name="div", attrs={"class": "container"}).find_next_sibling().find_next_sibling()
-                dataframe.at[row_index, "Components"] = str([a.text for a in node.find_all("a")])
-            elif row["Code"] in ("0200I"):
-                df = self.fetch_html(url=row["Link"])[-1]
-                dataframe.at[row_index, "Components"] = str(df["Name"].to_list())
+    def bursa_index_components(self, max_workers: int = 8) -> pandas.DataFrame:
+        """Get the Bursa Index data with the components of each index, cached for ``components_cache.ttl`` seconds.
+
+        The index prices are fetched once per call, like ``bursa_index``.
+        """
+        dataframe = self.bursa_index(max_workers=max_workers)
+
+        def components(code: str, link: str) -> list | None:
+            return self.components_cache.get(key=(self.url, code), loader=lambda: self._index_components(code=code, link=link))
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            lists = list(executor.map(components, dataframe["Code"], dataframe["Link"]))
+        if any(names is not None for names in lists):
+            dataframe["Components"] = [numpy.nan if names is None else str(names) for names in lists]
         return dataframe
 
     def _post_process_dataframe(self, dataframe_raw: pandas.DataFrame) -> pandas.DataFrame:
-        dataframe = pandas.DataFrame()
+        columns = {}
         # Iterate each column and insert values and links if available
         for (column, _), series in dataframe_raw.items():
-            values = series.apply(lambda x: x[0])
-            links = series.apply(lambda x: x[1])
+            values = pandas.Series(data=[cell[0] for cell in series], index=series.index)
+            links = pandas.Series(data=[cell[1] for cell in series], index=series.index)
             if values.isna().all():
-                dataframe[column] = links
+                columns[column] = links
             elif links.isna().all():
-                dataframe[column] = values
+                columns[column] = values
             else:
-                dataframe[f"{column}Link"] = links.apply(lambda x: urljoin(self.url, x) if x else "")
-                dataframe[column] = values
+                columns[f"{column}Link"] = pandas.Series(data=[_urljoin(self.url, link) if link else "" for link in links], index=series.index)
+                columns[column] = values
+        dataframe = pandas.DataFrame(data=columns) if columns else pandas.DataFrame()
 
-        # Remove dummy rows
+        # Remove dummy rows, i.e. rows with fewer distinct values than half of the columns
         number_of_columns = len(dataframe.columns)
-        rows_to_drop = []
-        for index, row in dataframe.iterrows():
-            if len(row.unique()) < (0.5 * number_of_columns):
-                rows_to_drop.append(index)
-        for index in reversed(rows_to_drop):
-            dataframe.drop(labels=index, inplace=True)
+        if number_of_columns > 0 and not dataframe.empty:
+            dataframe = dataframe.drop(index=dataframe.index[self._count_unique_per_row(dataframe) < (0.5 * number_of_columns)])
 
         # Remove columns that only contain 'View'.
         dataframe = dataframe.loc[:, ~(dataframe.isin(["", "View"])).all()]
@@ -160,11 +256,22 @@ class KLSEScreener:
         dataframe.reset_index(inplace=True)
         return dataframe
 
+    @staticmethod
+    def _count_unique_per_row(dataframe: pandas.DataFrame) -> numpy.ndarray:
+        """Number of distinct values in every row, with the same semantics as ``Series.unique``.
+        """
+        values = dataframe.to_numpy(dtype=object)
+        # Series.unique keeps None and NaN apart while factorize merges them, so tag None first
+        values = numpy.where(numpy.equal(values, None), _NONE, values)
+        codes, _ = pandas.factorize(values.ravel(), use_na_sentinel=False)
+        codes = numpy.sort(codes.reshape(values.shape), axis=1)
+        return 1 + (numpy.diff(codes, axis=1) != 0).sum(axis=1)
+
     @performance()
     def recent_dividends(self) -> pandas.DataFrame:
         """Get the recent dividends data.
         """
-        dataframe = self.fetch_html(url=f"{self.url}/entitlements/dividends", extract_links="all")[0]
+        dataframe = self.fetch_html(url=f"{self.url}/entitlements/dividends", extract_links="all", index=0)[0]
         dataframe = self._post_process_dataframe(dataframe)
         return dataframe
 
@@ -172,7 +279,7 @@ class KLSEScreener:
     def upcoming_dividends(self) -> pandas.DataFrame:
         """Get the upcoming dividends data.
         """
-        dataframe = self.fetch_html(url=f"{self.url}/entitlements/dividends", extract_links="all")[1]
+        dataframe = self.fetch_html(url=f"{self.url}/entitlements/dividends", extract_links="all", index=1)[0]
         dataframe = self._post_process_dataframe(dataframe)
         return dataframe
 
@@ -180,7 +287,7 @@ class KLSEScreener:
     def recent_share_issue(self) -> pandas.DataFrame:
         """Get the recent share issue data.
         """
-        dataframe = self.fetch_html(url=f"{self.url}/entitlements/shares-issue", extract_links="all")[0]
+        dataframe = self.fetch_html(url=f"{self.url}/entitlements/shares-issue", extract_links="all", index=0)[0]
         dataframe = self._post_process_dataframe(dataframe)
         return dataframe
 
@@ -188,7 +295,7 @@ class KLSEScreener:
     def upcoming_share_issue(self) -> pandas.DataFrame:
         """Get the upcoming share issue data.
         """
-        dataframe = self.fetch_html(url=f"{self.url}/entitlements/shares-issue", extract_links="all")[1]
+        dataframe = self.fetch_html(url=f"{self.url}/entitlements/shares-issue", extract_links="all", index=1)[0]
         dataframe = self._post_process_dataframe(dataframe)
         return dataframe
 
@@ -196,30 +303,40 @@ class KLSEScreener:
     def recent_quarterly_reports(self) -> pandas.DataFrame:
         """Get the recent quarterly reports data.
         """
-        dataframe = self.fetch_html(url=f"{self.url}/financial-reports", extract_links="all")[0]
+        dataframe = self.fetch_html(url=f"{self.url}/financial-reports", extract_links="all", index=0)[0]
         dataframe = self._post_process_dataframe(dataframe)
         return dataframe
 
+    @performance()
+    def snapshot(self) -> ScreenerSnapshot:
+        """Get the cached screener snapshot, downloading it once per TTL.
+        """
+        return self.snapshot_cache.get(key=self.url, loader=lambda: ScreenerSnapshot(dataframe=self.screener()))
+
+    @classmethod
+    def invalidate_snapshot(cls):
+        """Drop the cached screener snapshot so the next call downloads it again.
+        """
+        cls.snapshot_cache.invalidate()
+
+    @classmethod
+    def invalidate_bursa_index(cls):
+        """Drop the cached Bursa Index components so the next call downloads them again.
+        """
+        cls.components_cache.invalidate()
+
     @performance()
     def get_stockcodes(self) -> list:
-        stockcodes = self.screener()["Code"].dropna().to_list()
-        stockcodes.sort(reverse=False)
-        return stockcodes
+        return list(self.snapshot().stockcodes)
 
     @performance()
     def get_stocknames(self) -> list:
-        stocknames = self.screener()["Name"].dropna().to_list()
-        stocknames.sort(reverse=False)
-        return stocknames
+        return list(self.snapshot().stocknames)
 
     @performance()
     def get_categories(self) -> list:
-        categories = list(set(self.screener()["Category"].dropna().to_list()))
-        categories.sort(reverse=False)
-        return categories
+        return list(self.snapshot().categories)
 
     @performance()
     def get_markets(self) -> list:
-        markets = list(set(self.screener()["Market"].dropna().to_list()))
-        markets.sort(reverse=False)
-        return markets
+        return list(self.snapshot().markets)
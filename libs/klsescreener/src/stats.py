@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import standard libraries
+import threading
+import datetime
+import pathlib
+import json
+import time
+import os
+
+# Import third-party libraries
+import pandas
+import numpy
+
+# Import internal libraries
+from klsescreener.resample import UTC_OFFSET
+
+
+def bar_datetime(t: int) -> datetime.datetime:
+    """Naive Bursa local time of a bar timestamp, the ``d`` column of ``historical_data``.
+    """
+    return datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds=int(t) + UTC_OFFSET)
+
+
+def price_stats(dataframe: pandas.DataFrame) -> dict | None:
+    """Compute the listing, last bar, all time high and all time low statistics of daily bars in one pass.
+
+    When the high or low is reached more than once, the most recent bar is kept. Returns None
+    without bars.
+    """
+    if dataframe.empty:
+        return None
+    order = numpy.argsort(dataframe["t"].to_numpy(), kind="stable")
+    t = dataframe["t"].to_numpy()[order]
+    high = dataframe["h"].to_numpy()[order]
+    low = dataframe["l"].to_numpy()[order]
+    last = len(t) - 1
+    ath = last - int(numpy.argmax(high[::-1]))
+    atl = last - int(numpy.argmin(low[::-1]))
+    return {
+        "first_t": int(t[0]),
+        "listing_open_price": float(dataframe["o"].to_numpy()[order[0]]),
+        "last_t": int(t[last]),
+        "last_close_price": float(dataframe["c"].to_numpy()[order[last]]),
+        "ath_price": float(high[ath]),
+        "ath_t": int(t[ath]),
+        "atl_price": float(low[atl]),
+        "atl_t": int(t[atl]),
+    }
+
+
+def merge_stats(stats: dict | None, update: dict | None) -> dict | None:
+    """Combine the statistics of older bars with the ones of newer, possibly overlapping, bars.
+
+    The high of a bar only rises and its low only falls while it is being traded, so
+    re-fetching the last bar never invalidates the stored extremes.
+    """
+    if stats is None or update is None:
+        return update if stats is None else stats
+    merged = dict(stats)
+    if update["first_t"] < stats["first_t"]:
+        merged.update(first_t=update["first_t"], listing_open_price=update["listing_open_price"])
+    if update["last_t"] >= stats["last_t"]:
+        merged.update(last_t=update["last_t"], last_close_price=update["last_close_price"])
+    if (update["ath_price"], update["ath_t"]) >= (stats["ath_price"], stats["ath_t"]):
+        merged.update(ath_price=update["ath_price"], ath_t=update["ath_t"])
+    if (-update["atl_price"], update["atl_t"]) >= (-stats["atl_price"], stats["atl_t"]):
+        merged.update(atl_price=update["atl_price"], atl_t=update["atl_t"])
+    return merged
+
+
+class StatsIndex:
+    """JSON file of ``price_stats`` keyed by stock code, updated incrementally with new daily bars.
+
+    Entries younger than ``max_age`` seconds are served without fetching any history. An entry
+    also keeps the ``listing_timestamp`` of the stock, which never changes once known.
+    """
+
+    def __init__(self, path: str | os.PathLike, max_age: int = 24 * 60 * 60):
+        self.path = pathlib.Path(path)
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._entries = json.loads(self.path.read_text()) if self.path.exists() else {}
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, code: str) -> dict | None:
+        return self._entries.get(code)
+
+    def is_fresh(self, code: str, now: float | None = None) -> bool:
+        entry = self._entries.get(code)
+        now = time.time() if now is None else now
+        return entry is not None and now - entry["updated"] < self.max_age
+
+    def update(self, code: str, dataframe: pandas.DataFrame, now: float | None = None, listing_timestamp: int | None = None) -> dict | None:
+        """Merge the statistics of ``dataframe`` into the entry of ``code`` and save the index.
+        """
+        update = price_stats(dataframe=dataframe)
+        with self._lock:
+            stats = merge_stats(stats=self._entries.get(code), update=update)
+            if stats is None:
+                return None
+            if listing_timestamp is not None:
+                stats["listing_timestamp"] = listing_timestamp
+            stats["updated"] = time.time() if now is None else now
+            self._entries[code] = stats
+            self._save()
+        return stats
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        temporary_path.write_text(json.dumps(self._entries))
+        os.replace(temporary_path, self.path)
+
+    def to_frame(self) -> pandas.DataFrame:
+        """Return every entry as one row per code.
+        """
+        with self._lock:
+            return pandas.DataFrame.from_dict(data=self._entries, orient="index").rename_axis(index="Code")
@@ -3,19 +3,29 @@
 # -*- coding: utf-8 -*-
 
 # Import standard libraries
-import threading
+import concurrent.futures
+import asyncio
+import functools
 import datetime
+import pathlib
 import logging
+import json
 import ast
+import os
 
 # Import third-party libraries
-from lxml import etree
 import requests
 import pandas
 import numpy
 
 # Import internal libraries
 from klsescreener.resolution import Resolution
+from klsescreener.document import Document
+from klsescreener.transport import get_transport
+from klsescreener.history import COUNTBACK, compact_history, fetch_range, post_process_history
+from klsescreener.resample import SOURCES, UTC_OFFSET, resample
+from klsescreener.stats import StatsIndex, bar_datetime, price_stats
+from klsescreener.store import BarStore
 from shared.decorators import performance
 from klsescreener import KLSEScreener
 
@@ -23,151 +33,154 @@ from klsescreener import KLSEScreener
 class Stock(KLSEScreener):
 
     __slots__ = [
-        "_dataframe_1d",
-        "_html_content",
-        "_tree",
         "cdt",  # Current date time
         "cts",  # Current timestamp
+        "document",
         "headers",
     ]
 
+    # Attributes loaded on first access and memoized, see `prefetch`
+    FIELDS = (
+        "name",
+        "long_name",
+        "background",
+        "website",
+        "listing_timestamp",
+        "listing_datetime",
+        "listing_date",
+        "listing_open_price",
+        "last_traded_date",
+        "listed_days",
+        "ath_price",
+        "ath_timestamp",
+        "ath_date",
+        "ath_days",
+        "atl_price",
+        "atl_timestamp",
+        "atl_date",
+        "atl_days",
+    )
+
+    # On-disk bar store used by `historical_data`, set to a `BarStore` to enable it
+    store: BarStore | None = None
+
+    # Persisted price statistics keyed by code, set to a `StatsIndex` to skip refetching the daily history
+    stats_index: StatsIndex | None = None
+
     def __init__(self, code: int | str):
         super().__init__()
         self.code = code
         self.code_url = self.code
         self.cdt = datetime.datetime.today()
         self.cts = datetime.datetime.now().timestamp()
+        self.document = Document(url=self.code_url, fetch_text=self.fetch_text)
+
+    def prefetch(self, fields: list | tuple | None = None) -> "Stock":
+        """Load the given lazy attributes, or all of them, in one go.
+        """
+        fields = self.FIELDS if fields is None else fields
+        for field in fields:
+            if field not in self.FIELDS:
+                raise ValueError(f"Unknown field \"{field}\", expected one of {self.FIELDS}.")
+            getattr(self, field)
+        return self
+
+    async def afetch(self, fields: list | tuple | None = None, executor: concurrent.futures.Executor | None = None) -> "Stock":
+        """Asynchronous ``prefetch``, running the blocking requests on ``executor``.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(executor, functools.partial(self.prefetch, fields=fields))
+        return self
+
+    def _xpath_text(self, path: str) -> str | None:
+        try:
+            return self._tree.xpath(_path=path)[0].text.strip()
+        except Exception:
+            return None
+
+    @functools.cached_property
+    def _html_content(self) -> str:
+        return self.document.text
+
+    @functools.cached_property
+    def _tree(self):
+        return self.document.tree
+
+    @functools.cached_property
+    def _dataframe_1d(self) -> pandas.DataFrame:
+        if not self.listing_timestamp:
+            return pandas.DataFrame()
+        return self.historical_data_1D(stimestamp=self.listing_timestamp, etimestamp=int(self.cts))
+
+    @functools.cached_property
+    def _stats(self) -> dict | None:
+        """Listing, last bar, all time high and all time low statistics, see ``price_stats``.
+
+        With a ``stats_index`` a fresh entry is used as is, an older one is only updated with
+        the daily bars since its last bar.
+        """
+        if self.stats_index is None:
+            return price_stats(dataframe=self._dataframe_1d)
+        if self.stats_index.is_fresh(code=self.code, now=self.cts):
+            return self.stats_index.get(code=self.code)
+        stats = self.stats_index.get(code=self.code)
+        if stats is None:
+            dataframe = self._dataframe_1d
+        else:
+            dataframe = self.historical_data_1D(stimestamp=stats["last_t"], etimestamp=int(self.cts))
+        return self.stats_index.update(code=self.code, dataframe=dataframe, now=self.cts, listing_timestamp=self.listing_timestamp)
 
-        self._html_content = self.fetch_text(url=self.code_url)
-        self._tree = etree.HTML(text=self._html_content)
-
-        self.name = None
-        self.long_name = None
-        self.background = None
-        self.website = None
-
-        self.listing_timestamp = None
-        self.listing_datetime = None
-        self.listing_date = None
-
-        self._dataframe_1d = None
-        if self.listing_timestamp is not None:
-            self._dataframe_1d = self.historical_data_1D(stimestamp=self.listing_timestamp, etimestamp=self.cts)
-        self.listing_open_price = None
-        self.last_traded_date = None
-        self.listed_days = None
-
-        self.ath_price = None
-        self.ath_timestamp = None
-        self.ath_date = None
-        self.ath_days = None
-
-        self.atl_price = None
-        self.atl_timestamp = None
-        self.atl_date = None
-        self.atl_days = None
-
-    @property
+    @functools.cached_property
     def ath_date(self):
-        return self._ath_date
-
-    @ath_date.setter
-    def ath_date(self, date: None):
-        if date is None and self.ath_price:
-            self._ath_date = self._dataframe_1d[self._dataframe_1d["h"] == self.ath_price].iloc[0, :]["d"].date()
-        else:
-            self._ath_date = timestamp
+        if self.ath_price:
+            return bar_datetime(t=self._stats["ath_t"]).date()
+        return None
 
-    @property
+    @functools.cached_property
     def ath_days(self):
-        return self._ath_days
-
-    @ath_days.setter
-    def ath_days(self, days: None):
-        if days is None and self.ath_timestamp:
-            self._ath_days = (self.cdt - datetime.datetime.fromtimestamp(self._ath_timestamp)).days
-        else:
-            self._ath_days = days
+        if self.ath_timestamp:
+            return (self.cdt - datetime.datetime.fromtimestamp(self.ath_timestamp)).days
+        return None
 
-    @property
+    @functools.cached_property
     def ath_price(self):
-        return self._ath_price
-
-    @ath_price.setter
-    def ath_price(self, price: float | int | None):
-        if price is None and not self._dataframe_1d.empty:
-            self._ath_price = self._dataframe_1d["h"].max()
-        else:
-            self._ath_price = price
+        if self._stats:
+            return self._stats["ath_price"]
+        return None
 
-    @property
+    @functools.cached_property
     def ath_timestamp(self):
-        return self._ath_timestamp
+        if self.ath_price:
+            return self._stats["ath_t"] + UTC_OFFSET
+        return None
 
-    @ath_timestamp.setter
-    def ath_timestamp(self, timestamp: int | None):
-        if timestamp is None and self.ath_price:
-            self._ath_timestamp = self._dataframe_1d[self._dataframe_1d["h"] == self.ath_price].iloc[0, :]["d"].timestamp()
-        else:
-            self._ath_timestamp = timestamp
-
-    @property
+    @functools.cached_property
     def atl_date(self):
-        return self._atl_date
+        if self.atl_price:
+            return bar_datetime(t=self._stats["atl_t"]).date()
+        return None
 
-    @atl_date.setter
-    def atl_date(self, date: None):
-        if date is None and self.atl_price:
-            self._atl_date = self._dataframe_1d[self._dataframe_1d["l"] == self.atl_price].iloc[0, :]["d"].date()
-        else:
-            self._atl_date = timestamp
-
-    @property
+    @functools.cached_property
     def atl_days(self):
-        return self._atl_days
-
-    @atl_days.setter
-    def atl_days(self, days: None):
-        if days is None and self.atl_timestamp:
-            self._atl_days = (self.cdt - datetime.datetime.fromtimestamp(self._atl_timestamp)).days
-        else:
-            self._atl_days = days
+        if self.atl_timestamp:
+            return (self.cdt - datetime.datetime.fromtimestamp(self.atl_timestamp)).days
+        return None
 
-    @property
+    @functools.cached_property
     def atl_price(self):
-        return self._atl_price
-
-    @atl_price.setter
-    def atl_price(self, price: float | int | None):
-        if price is None and not self._dataframe_1d.empty:
-            self._atl_price = self._dataframe_1d["l"].min()
-        else:
-            self._atl_price = price
+        if self._stats:
+            return self._stats["atl_price"]
+        return None
 
-    @property
+    @functools.cached_property
     def atl_timestamp(self):
-        return self._atl_timestamp
-
-    @atl_timestamp.setter
-    def atl_timestamp(self, timestamp: int | None):
-        if timestamp is None and self.atl_price:
-            self._atl_timestamp = self._dataframe_1d[self._dataframe_1d["l"] == self.atl_price].iloc[0, :]["d"].timestamp()
-        else:
-            self._atl_timestamp = timestamp
+        if self.atl_price:
+            return self._stats["atl_t"] + UTC_OFFSET
+        return None
 
-    @property
+    @functools.cached_property
     def background(self):
-        return self._background
-
-    @background.setter
-    def background(self, text: str | None):
-        if text is None:
-            try:
-                self._background = self._tree.xpath(_path="/html/body/div/div[1]/div[3]/div[1]/div/div[3]/div[1]/div[1]/div[1]/div[1]/div[1]/div[2]/div/div/div[1]")[0].text.strip()
-            except Exception:
-                pass
-        else:
-            self._backgrounde = ""
+        return self._xpath_text(path="/html/body/div/div[1]/div[3]/div[1]/div/div[3]/div[1]/div[1]/div[1]/div[1]/div[1]/div[2]/div/div/div[1]")
 
     @property
     def code(self):
@@ -188,117 +201,72 @@ class Stock(KLSEScreener):
     def code_url(self, code: str):
         self._code_url = f"{self.url}/stocks/view/{self.code}"
 
-    @property
+    @functools.cached_property
     def last_traded_date(self):
-        return self._last_traded_date
-
-    @last_traded_date.setter
-    def last_traded_date(self, date: None):
-        if date is None and not self._dataframe_1d.empty:
-            self._last_traded_date = self._dataframe_1d.iloc[0, :]["Date"]
-        else:
-            self._last_traded_date = date
+        if self._stats:
+            return bar_datetime(t=self._stats["last_t"]).date()
+        return None
 
-    @property
+    @functools.cached_property
     def listed_days(self):
-        return self._listed_days
+        if self._stats:
+            return (self.cdt - bar_datetime(t=self._stats["first_t"])).days
+        return None
 
-    @listed_days.setter
-    def listed_days(self, days: int | None):
-        if days is None and not self._dataframe_1d.empty:
-            self._listed_days = (self.cdt - self._dataframe_1d.iloc[-1, :]["d"]).days
-        else:
-            self._listed_days = days
-
-    @property
+    @functools.cached_property
     def listing_date(self):
-        return self._listing_date
+        if self.listing_datetime:
+            return str(self.listing_datetime.date())
+        return None
 
-    @listing_date.setter
-    def listing_date(self, date: int | None):
-        if date is None and self.listing_datetime:
-            self._listing_date = str(self.listing_datetime.date())
-        else:
-            self._listing_date = date
-
-    @property
+    @functools.cached_property
     def listing_datetime(self):
-        return self._listing_datetime
-
-    @listing_datetime.setter
-    def listing_datetime(self, date: None):
-        if date is None and self.listing_timestamp:
-            self._listing_datetime = datetime.datetime.fromtimestamp(timestamp=self.listing_timestamp)
-        else:
-            self._listing_datetime = date
+        if self.listing_timestamp:
+            return datetime.datetime.fromtimestamp(self.listing_timestamp)
+        return None
 
-    @property
+    @functools.cached_property
     def listing_open_price(self):
-        return self._listing_open_price
-
-    @listing_open_price.setter
-    def listing_open_price(self, price: float | int | None):
-        if price is None and not self._dataframe_1d.empty:
-            self._listing_open_price = self._dataframe_1d.iloc[-1, :]["o"]
-        else:
-            self._listing_open_price = price
+        if self._stats:
+            return self._stats["listing_open_price"]
+        return None
 
-    @property
+    @functools.cached_property
     def listing_timestamp(self):
-        return self._listing_timestamp
-
-    @listing_timestamp.setter
-    def listing_timestamp(self, timestamp: int | None):
-        if timestamp is None:
-            self._listing_timestamp = self.get_listing_date(return_timestamp=True)
-        else:
-            self._listing_timestamp = timestamp
+        # Served from the stats index when known, finding it downloads the quarter reports and a year of history
+        entry = self.stats_index.get(code=self.code) if self.stats_index is not None else None
+        if entry is not None and "listing_timestamp" in entry:
+            return entry["listing_timestamp"]
+        return self.get_listing_date(return_timestamp=True) or None
 
-    @property
+    @functools.cached_property
     def long_name(self):
-        return self._long_name
-
-    @long_name.setter
-    def long_name(self, name: str | None):
-        if name is None:
-            try:
-                self._long_name = self._tree.xpath(_path="/html/body/div/div[1]/div[3]/div[1]/div/div[3]/div[1]/div[1]/div[1]/div[1]/div[1]/span")[0].text.strip()
-            except Exception:
-                pass
-        else:
-            self._long_name = ""
+        return self._xpath_text(path="/html/body/div/div[1]/div[3]/div[1]/div/div[3]/div[1]/div[1]/div[1]/div[1]/div[1]/span")
 
-    @property
+    @functools.cached_property
     def name(self):
-        return self._name
-
-    @name.setter
-    def name(self, name: str | None):
-        if name is None:
-            try:
-                self._name = self._tree.xpath(_path="/html/body/div/div[1]/div[3]/div[1]/div/div[3]/div[1]/div[1]/div[1]/div[1]/div[1]/div[1]/h2")[0].text.strip()
-            except Exception:
-                pass
-        else:
-            self._name = ""
+        return self._xpath_text(path="/html/body/div/div[1]/div[3]/div[1]/div/div[3]/div[1]/div[1]/div[1]/div[1]/div[1]/div[1]/h2")
 
-    @property
+    @functools.cached_property
     def website(self):
-        return self._website
+        return self._xpath_text(path="/html/body/div/div[1]/div[3]/div[1]/div/div[3]/div[1]/div[1]/div[1]/div[1]/div[1]/div[2]/div/div/div[1]/p[2]/a")
 
-    @website.setter
-    def website(self, text: str | None):
-        if text is None:
-            try:
-                self._website = self._tree.xpath(_path="/html/body/div/div[1]/div[3]/div[1]/div/div[3]/div[1]/div[1]/div[1]/div[1]/div[1]/div[2]/div/div/div[1]/p[2]/a")[0].text.strip()
-            except Exception:
-                pass
-        else:
-            self._website = ""
+    @property
+    def from_cache(self) -> bool:
+        """Whether the last page or table access was served from the document cache.
+        """
+        return self.document.from_cache
+
+    def refresh(self):
+        """Drop the cached stock page and every lazy attribute so the next access loads them again.
+        """
+        self.document.refresh()
+        for field in (*self.FIELDS, "_html_content", "_tree", "_dataframe_1d", "_stats"):
+            self.__dict__.pop(field, None)
 
     @performance()
     def info(self, transpose: bool = False, return_json: bool = False, extended_info: bool = False) -> pandas.DataFrame | dict:
-        dataframe = self.fetch_html(url=self.code_url)[0].dropna()
+        dataframe = self.document.tables(index=0)[0].dropna()
 
         # Adding more stock information if is true
         if extended_info is True:
@@ -334,126 +302,164 @@ class Stock(KLSEScreener):
 
     @performance()
     def quarter_reports(self) -> pandas.DataFrame:
-        dataframe = self.fetch_html(url=self.code_url, match="Financial Year", extract_links="all")[0].iloc[:, :13]
+        dataframe = self.document.tables(match="Financial Year", extract_links="all", index=0)[0].iloc[:, :13]
         dataframe = self._post_process_dataframe(dataframe)
         return dataframe
 
     @performance()
     def annual_reports(self) -> pandas.DataFrame:
-        dataframe = self.fetch_html(url=self.code_url, match="Financial Year", extract_links="all")[1]
+        dataframe = self.document.tables(match="Financial Year", extract_links="all", index=1)[0]
         dataframe = self._post_process_dataframe(dataframe)
         return dataframe
 
     @performance()
     def dividend_reports(self) -> pandas.DataFrame:
-        dataframe = self.fetch_html(url=self.code_url, match="Financial Year", extract_links="all")[2].iloc[:, :8]
+        dataframe = self.document.tables(match="Financial Year", extract_links="all", index=2)[0].iloc[:, :8]
         dataframe = self._post_process_dataframe(dataframe)
         return dataframe
 
     @performance()
     def capital_changes(self) -> pandas.DataFrame:
-        dataframe = self.fetch_html(url=self.code_url, match="Ratio", extract_links="all")[0]
+        dataframe = self.document.tables(match="Ratio", extract_links="all", index=0)[0]
         dataframe = self._post_process_dataframe(dataframe)
         return dataframe
 
     @performance()
     def warrants(self) -> pandas.DataFrame:
-        dataframe = self.fetch_html(url=self.code_url, extract_links="all")[-2]
+        dataframe = self.document.tables(extract_links="all", index=-2)[0]
         dataframe = self._post_process_dataframe(dataframe)
         return dataframe
 
     @performance()
     def shareholding_changes(self) -> pandas.DataFrame:
-        dataframe = self.fetch_html(url=self.code_url, match="Date Change")[0]
+        dataframe = self.document.tables(match="Date Change", index=0)[0]
         return dataframe
 
-    def historical_data(self, resolution: str, stimestamp: int, etimestamp: int, countback: int = 99999999) -> pandas.DataFrame:
-        url = f"{self.url}/trading_view/history?symbol={self.code}&resolution={resolution}&from={stimestamp}&to={etimestamp}&countback={countback}&currencyCode=MYR"
-        logging.debug(f"Fetching historical data for stockcode \"{self.code}\" with resolution {resolution} from {datetime.datetime.fromtimestamp(stimestamp)} ({stimestamp}) to {datetime.datetime.fromtimestamp(etimestamp)} ({etimestamp}). {url}")
-        dataframe = self.fetch_json(url=url)
-
-        # Post-process the dataframe
-        dataframe.insert(loc=0, column="d", value=pandas.to_datetime(dataframe["t"], unit="s") + pandas.to_timedelta("8 hours"))
-        dataframe.insert(loc=0, column="Time", value=dataframe["d"].dt.time)
-        dataframe.insert(loc=0, column="Date", value=dataframe["d"].dt.date)
-        dataframe.insert(loc=0, column="Day", value=dataframe["d"].dt.day_name())
-        dataframe.insert(loc=0, column="Month", value=dataframe["d"].dt.month)
-        dataframe.insert(loc=0, column="Year", value=dataframe["d"].dt.year)
-        dataframe.insert(loc=0, column="Resolution", value=resolution)
-        dataframe.drop(columns=["s", "from", "to", "exact_from", "server", "ip", "qt"], axis=1, inplace=True)
-        dataframe.sort_values(by=["t"], ascending=False, inplace=True)
-        dataframe.reset_index(drop=True, inplace=True)
+    def _fetch_bars(self, resolution: str, stimestamp: int, etimestamp: int, countback: int = COUNTBACK) -> pandas.DataFrame:
+        """Fetch raw ``t``/``o``/``h``/``l``/``c``/``v`` bars from the history endpoint, windowed for long intraday ranges.
+        """
+        return fetch_range(klsescreener=self, code=self.code, resolution=resolution, stimestamp=stimestamp, etimestamp=etimestamp, countback=countback)
+
+    def _derived_bars(self, resolution: str, stimestamp: int, etimestamp: int) -> pandas.DataFrame | None:
+        """Resample the stored finer bars when they already cover the whole range, otherwise return None.
+        """
+        source = SOURCES.get(resolution)
+        if self.store is None or source is None or self.store.missing(symbol=self.code, resolution=source, stimestamp=stimestamp, etimestamp=etimestamp):
+            return None
+        logging.debug(f"Deriving {resolution} bars for stockcode \"{self.code}\" from stored {source} bars.")
+        dataframe = resample(dataframe=self.store.read(symbol=self.code, resolution=source, stimestamp=stimestamp, etimestamp=etimestamp), resolution=resolution)
+        # A period that starts before the range is only partly covered, the endpoint would not return it either
+        return dataframe[dataframe["t"] >= stimestamp].reset_index(drop=True)
+
+    def derive(self, dataframe: pandas.DataFrame, resolution: Resolution | str, compact: bool = False) -> pandas.DataFrame:
+        """Derive ``resolution`` bars from finer ``historical_data`` output without any request.
+        """
+        resolution = resolution.value if isinstance(resolution, Resolution) else resolution
+        dataframe = resample(dataframe=dataframe, resolution=resolution)
+        return compact_history(dataframe=dataframe, resolution=resolution) if compact is True else post_process_history(dataframe=dataframe, resolution=resolution)
+
+    @staticmethod
+    def _time_range(stimestamp: int | None, etimestamp: int | None, days: int = 360) -> dict:
+        """Default to the ``days`` days up to now, taken when the call is made.
+        """
+        now = datetime.datetime.now()
+        return {
+            "stimestamp": int((now - datetime.timedelta(days=days)).timestamp()) if stimestamp is None else stimestamp,
+            "etimestamp": int(now.timestamp()) if etimestamp is None else etimestamp,
+        }
+
+    def historical_data(self, resolution: str, stimestamp: int, etimestamp: int, countback: int = COUNTBACK, compact: bool = False) -> pandas.DataFrame:
+        """Return the bars of ``[stimestamp, etimestamp]`` sorted the newest bar first.
+
+        With ``compact`` only ``Resolution`` (categorical) and int64/float32 ``t``/``o``/``h``/``l``/``c``/``v``
+        columns are kept, the calendar columns are then computed on access through ``dataframe.bars``.
+        """
+        # A countback only returns the newest bars of the range, which must not be stored as covering it
+        full = countback == COUNTBACK
+        dataframe = self._derived_bars(resolution=resolution, stimestamp=stimestamp, etimestamp=etimestamp) if full else None
+        if dataframe is None and self.store is not None and full:
+            dataframe = self.store.fetch(
+                symbol=self.code, resolution=resolution, stimestamp=stimestamp, etimestamp=etimestamp,
+                fetch=lambda start, end: self._fetch_bars(resolution=resolution, stimestamp=start, etimestamp=end, countback=countback),
+            )
+        elif dataframe is None:
+            dataframe = self._fetch_bars(resolution=resolution, stimestamp=stimestamp, etimestamp=etimestamp, countback=countback)
+
+        if compact is True:
+            dataframe = compact_history(dataframe=dataframe, resolution=resolution)
+        else:
+            dataframe = post_process_history(dataframe=dataframe, resolution=resolution)
         logging.debug(f"Fetched {len(dataframe)} rows of historical data for stockcode \"{self.code}\" with resolution {resolution} from {datetime.datetime.fromtimestamp(stimestamp)} ({stimestamp}) to {datetime.datetime.fromtimestamp(etimestamp)} ({etimestamp}).")
         return dataframe
 
     @performance()
-    def historical_data_1m(self, stimestamp: int = int((datetime.datetime.now() - datetime.timedelta(days=360)).timestamp()), etimestamp: int = int(datetime.datetime.now().timestamp())) -> pandas.DataFrame:
-        dataframe = self.historical_data(resolution=Resolution.MINUTE_1.value, stimestamp=stimestamp, etimestamp=etimestamp)
+    def historical_data_1m(self, stimestamp: int | None = None, etimestamp: int | None = None, compact: bool = False) -> pandas.DataFrame:
+        dataframe = self.historical_data(resolution=Resolution.MINUTE_1.value, **self._time_range(stimestamp=stimestamp, etimestamp=etimestamp), compact=compact)
         return dataframe
 
     @performance()
-    def historical_data_5m(self, stimestamp: int = int((datetime.datetime.now() - datetime.timedelta(days=360)).timestamp()), etimestamp: int = int(datetime.datetime.now().timestamp())) -> pandas.DataFrame:
-        dataframe = self.historical_data(resolution=Resolution.MINUTE_5.value, stimestamp=stimestamp, etimestamp=etimestamp)
+    def historical_data_5m(self, stimestamp: int | None = None, etimestamp: int | None = None, compact: bool = False) -> pandas.DataFrame:
+        dataframe = self.historical_data(resolution=Resolution.MINUTE_5.value, **self._time_range(stimestamp=stimestamp, etimestamp=etimestamp), compact=compact)
         return dataframe
 
     @performance()
-    def historical_data_15m(self, stimestamp: int = int((datetime.datetime.now() - datetime.timedelta(days=360)).timestamp()), etimestamp: int = int(datetime.datetime.now().timestamp())) -> pandas.DataFrame:
-        dataframe = self.historical_data(resolution=Resolution.MINUTE_15.value, stimestamp=stimestamp, etimestamp=etimestamp)
+    def historical_data_15m(self, stimestamp: int | None = None, etimestamp: int | None = None, compact: bool = False) -> pandas.DataFrame:
+        dataframe = self.historical_data(resolution=Resolution.MINUTE_15.value, **self._time_range(stimestamp=stimestamp, etimestamp=etimestamp), compact=compact)
         return dataframe
 
     @performance()
-    def historical_data_30m(self, stimestamp: int = int((datetime.datetime.now() - datetime.timedelta(days=360)).timestamp()), etimestamp: int = int(datetime.datetime.now().timestamp())) -> pandas.DataFrame:
-        dataframe = self.historical_data(resolution=Resolution.MINUTE_30.value, stimestamp=stimestamp, etimestamp=etimestamp)
+    def historical_data_30m(self, stimestamp: int | None = None, etimestamp: int | None = None, compact: bool = False) -> pandas.DataFrame:
+        dataframe = self.historical_data(resolution=Resolution.MINUTE_30.value, **self._time_range(stimestamp=stimestamp, etimestamp=etimestamp), compact=compact)
         return dataframe
 
     @performance()
-    def historical_data_1H(self, stimestamp: int = int((datetime.datetime.now() - datetime.timedelta(days=360)).timestamp()), etimestamp: int = int(datetime.datetime.now().timestamp())) -> pandas.DataFrame:
-        dataframe = self.historical_data(resolution=Resolution.HOUR_1.value, stimestamp=stimestamp, etimestamp=etimestamp)
+    def historical_data_1H(self, stimestamp: int | None = None, etimestamp: int | None = None, compact: bool = False) -> pandas.DataFrame:
+        dataframe = self.historical_data(resolution=Resolution.HOUR_1.value, **self._time_range(stimestamp=stimestamp, etimestamp=etimestamp), compact=compact)
         return dataframe
 
     @performance()
-    def historical_data_4H(self, stimestamp: int = int((datetime.datetime.now() - datetime.timedelta(days=360)).timestamp()), etimestamp: int = int(datetime.datetime.now().timestamp())) -> pandas.DataFrame:
-        dataframe = self.historical_data(resolution=Resolution.HOUR_4.value, stimestamp=stimestamp, etimestamp=etimestamp)
+    def historical_data_4H(self, stimestamp: int | None = None, etimestamp: int | None = None, compact: bool = False) -> pandas.DataFrame:
+        dataframe = self.historical_data(resolution=Resolution.HOUR_4.value, **self._time_range(stimestamp=stimestamp, etimestamp=etimestamp), compact=compact)
         return dataframe
 
     @performance()
-    def historical_data_1D(self, stimestamp: int = int((datetime.datetime.now() - datetime.timedelta(days=360)).timestamp()), etimestamp: int = int(datetime.datetime.now().timestamp())) -> pandas.DataFrame:
-        dataframe = self.historical_data(resolution=Resolution.DAILY.value, stimestamp=stimestamp, etimestamp=etimestamp)
+    def historical_data_1D(self, stimestamp: int | None = None, etimestamp: int | None = None, compact: bool = False) -> pandas.DataFrame:
+        dataframe = self.historical_data(resolution=Resolution.DAILY.value, **self._time_range(stimestamp=stimestamp, etimestamp=etimestamp), compact=compact)
         return dataframe
 
     @performance()
-    def historical_data_1W(self, stimestamp: int = int((datetime.datetime.now() - datetime.timedelta(days=360)).timestamp()), etimestamp: int = int(datetime.datetime.now().timestamp())) -> pandas.DataFrame:
-        dataframe = self.historical_data(resolution=Resolution.WEEKLY.value, stimestamp=stimestamp, etimestamp=etimestamp)
+    def historical_data_1W(self, stimestamp: int | None = None, etimestamp: int | None = None, compact: bool = False) -> pandas.DataFrame:
+        dataframe = self.historical_data(resolution=Resolution.WEEKLY.value, **self._time_range(stimestamp=stimestamp, etimestamp=etimestamp), compact=compact)
         return dataframe
 
     @performance()
-    def historical_data_1M(self, stimestamp: int = int((datetime.datetime.now() - datetime.timedelta(days=360)).timestamp()), etimestamp: int = int(datetime.datetime.now().timestamp())) -> pandas.DataFrame:
-        dataframe = self.historical_data(resolution=Resolution.MONTH_1.value, stimestamp=stimestamp, etimestamp=etimestamp)
+    def historical_data_1M(self, stimestamp: int | None = None, etimestamp: int | None = None, compact: bool = False) -> pandas.DataFrame:
+        dataframe = self.historical_data(resolution=Resolution.MONTH_1.value, **self._time_range(stimestamp=stimestamp, etimestamp=etimestamp), compact=compact)
         return dataframe
 
     @performance()
-    def historical_data_3M(self, stimestamp: int = int((datetime.datetime.now() - datetime.timedelta(days=360)).timestamp()), etimestamp: int = int(datetime.datetime.now().timestamp())) -> pandas.DataFrame:
-        dataframe = self.historical_data(resolution=Resolution.MONTH_3.value, stimestamp=stimestamp, etimestamp=etimestamp)
+    def historical_data_3M(self, stimestamp: int | None = None, etimestamp: int | None = None, compact: bool = False) -> pandas.DataFrame:
+        dataframe = self.historical_data(resolution=Resolution.MONTH_3.value, **self._time_range(stimestamp=stimestamp, etimestamp=etimestamp), compact=compact)
         return dataframe
 
     @performance()
-    def historical_data_6M(self, stimestamp: int = int((datetime.datetime.now() - datetime.timedelta(days=360)).timestamp()), etimestamp: int = int(datetime.datetime.now().timestamp())) -> pandas.DataFrame:
-        dataframe = self.historical_data(resolution=Resolution.MONTH_6.value, stimestamp=stimestamp, etimestamp=etimestamp)
+    def historical_data_6M(self, stimestamp: int | None = None, etimestamp: int | None = None, compact: bool = False) -> pandas.DataFrame:
+        dataframe = self.historical_data(resolution=Resolution.MONTH_6.value, **self._time_range(stimestamp=stimestamp, etimestamp=etimestamp), compact=compact)
         return dataframe
 
     @performance()
-    def historical_data_1Y(self, stimestamp: int = int((datetime.datetime.now() - datetime.timedelta(days=360)).timestamp()), etimestamp: int = int(datetime.datetime.now().timestamp())) -> pandas.DataFrame:
-        dataframe = self.historical_data(resolution=Resolution.YEAR_1.value, stimestamp=stimestamp, etimestamp=etimestamp)
+    def historical_data_1Y(self, stimestamp: int | None = None, etimestamp: int | None = None, compact: bool = False) -> pandas.DataFrame:
+        dataframe = self.historical_data(resolution=Resolution.YEAR_1.value, **self._time_range(stimestamp=stimestamp, etimestamp=etimestamp), compact=compact)
         return dataframe
 
     @performance()
-    def historical_data_5Y(self, stimestamp: int = int((datetime.datetime.now() - datetime.timedelta(days=360)).timestamp()), etimestamp: int = int(datetime.datetime.now().timestamp())) -> pandas.DataFrame:
-        dataframe = self.historical_data(resolution=Resolution.YEAR_5.value, stimestamp=stimestamp, etimestamp=etimestamp)
+    def historical_data_5Y(self, stimestamp: int | None = None, etimestamp: int | None = None, compact: bool = False) -> pandas.DataFrame:
+        dataframe = self.historical_data(resolution=Resolution.YEAR_5.value, **self._time_range(stimestamp=stimestamp, etimestamp=etimestamp), compact=compact)
         return dataframe
 
     @performance()
-    def historical_data_10Y(self, stimestamp: int = int((datetime.datetime.now() - datetime.timedelta(days=360)).timestamp()), etimestamp: int = int(datetime.datetime.now().timestamp())) -> pandas.DataFrame:
-        dataframe = self.historical_data(resolution=Resolution.YEAR_10.value, stimestamp=stimestamp, etimestamp=etimestamp)
+    def historical_data_10Y(self, stimestamp: int | None = None, etimestamp: int | None = None, compact: bool = False) -> pandas.DataFrame:
+        dataframe = self.historical_data(resolution=Resolution.YEAR_10.value, **self._time_range(stimestamp=stimestamp, etimestamp=etimestamp), compact=compact)
         return dataframe
 
     @performance()
@@ -488,31 +494,303 @@ class Stock(KLSEScreener):
         return date
 
 
+def dashboard_info(stock: Stock) -> pandas.DataFrame:
+    """Single row of extended stock information keyed by the info labels.
+    """
+    info = stock.info(extended_info=True).T
+    info.columns = info.iloc[0]
+    info = info[1:]
+    return info
+
+
+def dashboard_row(code: int | str, stock: Stock | None = None) -> dict:
+    """Extended stock information as a ``{label: value}`` row carrying the screener ``Code``.
+    """
+    row = dashboard_info(stock=Stock(code=code) if stock is None else stock).iloc[0].to_dict()
+    row["Code"] = code
+    return row
+
+
+# Dashboard columns holding dates, saved in ISO format in the checkpoint
+DATE_COLUMNS = ("Last Trading Date", "All Time High (Date)", "All Time Low (Date)")
+
+
+def _json_default(value):
+    if isinstance(value, numpy.generic):
+        return value.item()
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return str(value)
+
+
+def read_checkpoint(path: str | os.PathLike) -> list:
+    """Read the rows saved by ``iter_dashboard``, ignoring a truncated last line.
+
+    Dates are turned back into ``datetime.date`` so that the rows match freshly computed ones.
+    """
+    rows = []
+    if not os.path.exists(path):
+        return rows
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                logging.warning(f"Ignoring incomplete checkpoint line in {path}.")
+                continue
+            for column in DATE_COLUMNS:
+                if isinstance(row.get(column), str):
+                    row[column] = datetime.date.fromisoformat(row[column])
+            rows.append(row)
+    return rows
+
+
+def merge_dashboard(dataframe: pandas.DataFrame, rows: list) -> pandas.DataFrame:
+    """Build the dashboard from the screener table and the enriched rows in one pass.
+    """
+    info = pandas.DataFrame(data=rows)
+    if info.empty:
+        return dataframe.copy()
+    info = info.drop_duplicates(subset=["Code"], keep="last").set_index("Code")
+    info = info.reindex(index=dataframe["Code"])
+    info.index = dataframe.index
+    enriched = dataframe["Code"].isin(values=[row["Code"] for row in rows])
+
+    dataframe = dataframe.copy()
+    for column in info.columns.intersection(dataframe.columns):
+        dataframe[column] = info[column].where(enriched, dataframe[column])
+    return pandas.concat(objs=[dataframe, info[info.columns.difference(dataframe.columns, sort=False)]], axis=1)
+
+
+def iter_dashboard(dataframe: pandas.DataFrame | None = None, thread_count: int = 16, checkpoint: str | os.PathLike | None = None):
+    """Yield one enriched dashboard row per stock as soon as it is done.
+
+    When ``checkpoint`` is given every row is appended to it as a JSON line, and rows already
+    in the checkpoint are yielded first and not fetched again. A stock that fails is logged
+    and skipped so it is retried on the next run.
+    """
+    if dataframe is None:
+        dataframe = KLSEScreener().screener()
+
+    done = set()
+    if checkpoint is not None:
+        for row in read_checkpoint(path=checkpoint):
+            done.add(row["Code"])
+            yield row
+
+    codes = [code for code in dataframe["Code"].to_list() if code not in done]
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=thread_count)
+    file = open(checkpoint, "a", encoding="utf-8") if checkpoint is not None else None
+    try:
+        futures = {executor.submit(dashboard_row, code): code for code in codes}
+        for future in concurrent.futures.as_completed(futures):
+            code = futures[future]
+            try:
+                row = future.result()
+            except Exception:
+                logging.exception(f"Failed to generate dashboard row for stockcode \"{code}\".")
+                continue
+            if file is not None:
+                file.write(json.dumps(row, default=_json_default) + "\n")
+                file.flush()
+            yield row
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        if file is not None:
+            file.close()
+
+
 @performance(log=print)
-def generate_dashboard(thread_count: int = 16):
+def generate_dashboard(thread_count: int = 16, checkpoint: str | os.PathLike | None = None):
     """Extended table with more information
     """
+    dataframe = KLSEScreener().screener()
+    rows = list(iter_dashboard(dataframe=dataframe, thread_count=thread_count, checkpoint=checkpoint))
+    return merge_dashboard(dataframe=dataframe, rows=rows)
 
-    @performance(log=logging.info)
-    def sThread(dataframe: pandas.DataFrame, sub_dataframe: pandas.DataFrame):
-        for index, row in sub_dataframe.iterrows():
-            info = Stock(code=row["Code"]).info(extended_info=True).T
-            info.columns = info.iloc[0]
-            info = info[1:]
-            dataframe.loc[dataframe["Code"] == row["Code"], info.columns] = info.iloc[0].values
 
-    dataframe = KLSEScreener().screener()
-    dataframes = numpy.array_split(ary=dataframe, indices_or_sections=thread_count, axis=0)
+@performance(log=print)
+async def generate_dashboard_async(concurrency: int = 32) -> pandas.DataFrame:
+    """Extended table with more information, enriching up to ``concurrency`` stocks at once.
+
+    Produces the same columns as ``generate_dashboard``. Blocking requests run on a thread pool
+    sized to ``concurrency`` and every stock waits on one global semaphore. The default matches
+    the pool size of the default transport, configure a larger transport before raising it.
+    """
+    loop = asyncio.get_running_loop()
+    transport = get_transport()
+    if transport.pool_maxsize < concurrency:
+        logging.warning(f"Transport pool size {transport.pool_maxsize} is smaller than concurrency {concurrency}, use configure_transport(pool_maxsize={concurrency}) to keep connections alive.")
+    if transport.limiter is not None and transport.limiter.window.maximum < concurrency:
+        logging.warning(f"Transport limiter allows at most {transport.limiter.window.maximum} requests in flight, fewer than concurrency {concurrency}.")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+
+        async def enrich(code: str) -> dict | None:
+            async with semaphore:
+                try:
+                    stock = await Stock(code=code).afetch(executor=executor)
+                    return await loop.run_in_executor(executor, dashboard_row, code, stock)
+                except Exception:
+                    logging.exception(f"Failed to generate dashboard row for stockcode \"{code}\".")
+                    return None
+
+        dataframe = await loop.run_in_executor(executor, KLSEScreener().screener)
+        rows = await asyncio.gather(*(enrich(code=code) for code in dataframe["Code"]))
+
+    return merge_dashboard(dataframe=dataframe, rows=[row for row in rows if row is not None])
+
+
+# Market-wide announcement tables whose new rows mark the stocks to enrich again
+EVENT_SOURCES = ("recent_quarterly_reports", "recent_dividends", "recent_share_issue")
+
+# Screener columns whose change marks a stock to enrich again, e.g. after a rename or transfer
+IDENTITY_COLUMNS = ("Name", "Category", "Market")
+
+# Dashboard columns counting days up to the run, shifted forward on rows that are carried over
+DAY_COLUMNS = ("All Time High (Days)", "All Time Low (Days)", "Listed Days")
+
 
-    threads = []
-    for df in dataframes:
-        threads.append(threading.Thread(target=sThread, args=[dataframe, df]))
-    for thread in threads:
-        thread.start()
-    for thread in threads:
-        thread.join()
+class DashboardState:
+    """Previous dashboard run saved in the ``path`` directory.
+
+    ``state.json`` holds the run date, the announcements seen and when every stock was last
+    enriched, ``rows.jsonl`` the enriched rows in the ``iter_dashboard`` checkpoint format and
+    ``screener.parquet`` the screener columns compared by ``changed_codes``.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = pathlib.Path(path)
+        self.date = None
+        self.screener = None
+        self.events = {}
+        self.rows = {}
+        self.refreshed = {}
+        self.pending = set()
+        if (self.path / "state.json").exists():
+            state = json.loads((self.path / "state.json").read_text())
+            self.date = None if state["date"] is None else datetime.date.fromisoformat(state["date"])
+            self.events = {name: {tuple(key): code for key, code in rows} for name, rows in state["events"].items()}
+            self.refreshed = {code: datetime.date.fromisoformat(date) for code, date in state["refreshed"].items()}
+            self.pending = set(state["pending"])
+            self.rows = {str(row["Code"]): row for row in read_checkpoint(path=self.path / "rows.jsonl")}
+            if (self.path / "screener.parquet").exists():
+                self.screener = pandas.read_parquet(self.path / "screener.parquet")
+
+    def save(self):
+        self.path.mkdir(parents=True, exist_ok=True)
+        if self.screener is not None:
+            columns = [column for column in ("Code", *IDENTITY_COLUMNS) if column in self.screener.columns]
+            self._replace(name="screener.parquet", write=lambda path: self.screener[columns].astype(str).to_parquet(path, index=False))
+        self._replace(name="rows.jsonl", write=lambda path: path.write_text("".join(json.dumps(row, default=_json_default) + "\n" for row in self.rows.values()), encoding="utf-8"))
+        # Written last, a run interrupted while saving is read back as the previous one
+        state = {
+            "date": None if self.date is None else self.date.isoformat(),
+            "events": {name: [[list(key), code] for key, code in rows.items()] for name, rows in self.events.items()},
+            "refreshed": {code: date.isoformat() for code, date in self.refreshed.items()},
+            "pending": sorted(self.pending),
+        }
+        self._replace(name="state.json", write=lambda path: path.write_text(json.dumps(state)))
+
+    def _replace(self, name: str, write):
+        path = self.path / name
+        temporary_path = path.with_suffix(path.suffix + ".tmp")
+        write(temporary_path)
+        os.replace(temporary_path, path)
+
+
+def event_codes(dataframe: pandas.DataFrame) -> dict:
+    """Map every announcement row of a ``recent_*`` table to the code of its stock, taken from ``NameLink``.
+    """
+    if dataframe.empty or "NameLink" not in dataframe.columns:
+        return {}
+    rows = dataframe.drop(columns="index", errors="ignore").astype(str)
+    codes = dataframe["NameLink"].astype(str).str.rstrip("/").str.rsplit("/", n=1).str[-1]
+    return dict(zip(rows.itertuples(index=False, name=None), codes))
+
+
+def changed_codes(state: DashboardState, dataframe: pandas.DataFrame, events: dict, today: datetime.date, max_age: int = 7) -> set:
+    """Return the codes of ``dataframe`` whose dashboard row must be enriched again.
+
+    A code changes when it is new or was not enriched in the last ``max_age`` days, when it
+    failed last time, when its name, category or market changed, when a ``recent_*`` table
+    has a row for it that was not there last run, or when its price left the all time range.
+    """
+    codes = dataframe["Code"].astype(str)
+    changed = {code for code in codes if code not in state.rows or code in state.pending}
+    changed.update(code for code, date in state.refreshed.items() if (today - date).days >= max_age)
+
+    if state.screener is not None:
+        columns = [column for column in IDENTITY_COLUMNS if column in dataframe.columns and column in state.screener.columns]
+        previous = state.screener.assign(Code=state.screener["Code"].astype(str)).drop_duplicates(subset="Code", keep="last").set_index("Code")[columns]
+        current = dataframe.assign(Code=codes).drop_duplicates(subset="Code", keep="last").set_index("Code")[columns]
+        common = current.index.intersection(previous.index)
+        differs = (current.loc[common].astype(str) != previous.loc[common].astype(str)).any(axis=1)
+        changed.update(differs.index[differs])
+
+    for name, rows in events.items():
+        seen = state.events.get(name, {})
+        changed.update(code for key, code in rows.items() if key not in seen)
+
+    price = pandas.to_numeric(dataframe["Price"], errors="coerce") if "Price" in dataframe.columns else pandas.Series(dtype="float64")
+    for code, value in zip(codes, price):
+        row = state.rows.get(code)
+        if row is None or pandas.isna(value):
+            continue
+        ath = pandas.to_numeric(row.get("All Time High"), errors="coerce")
+        atl = pandas.to_numeric(row.get("All Time Low"), errors="coerce")
+        if (pandas.notna(ath) and value > ath) or (pandas.notna(atl) and value < atl):
+            changed.add(code)
+    return changed & set(codes)
+
+
+def carry_forward(row: dict, current: pandas.Series, days: int) -> dict:
+    """Previous dashboard row with the screener values of today and day counts moved ``days`` days on.
+    """
+    row = dict(row)
+    for column in row.keys() & set(current.index):
+        row[column] = current[column]
+    for column in DAY_COLUMNS:
+        if pandas.api.types.is_number(row.get(column)) and not pandas.isna(row[column]):
+            row[column] = row[column] + days
+    return row
+
+
+@performance(log=print)
+def refresh_dashboard(path: str | os.PathLike, thread_count: int = 16, max_age: int = 7) -> pandas.DataFrame:
+    """Extended table like ``generate_dashboard``, enriching only the stocks that changed since the last run.
+
+    The previous run is kept in the ``DashboardState`` directory ``path``. Stocks found by
+    ``changed_codes`` are enriched again, the other rows are carried over with today's screener
+    values. Stocks that fail keep their previous row and are retried on the next run.
+    """
+    klsescreener = KLSEScreener()
+    dataframe = klsescreener.screener()
+    events = {name: event_codes(dataframe=getattr(klsescreener, name)()) for name in EVENT_SOURCES}
+    state = DashboardState(path=path)
+    today = datetime.date.today()
+
+    codes = changed_codes(state=state, dataframe=dataframe, events=events, today=today, max_age=max_age)
+    logging.info(f"Refreshing {len(codes)} of {len(dataframe)} stocks, carrying the others over.")
+    rows = list(iter_dashboard(dataframe=dataframe[dataframe["Code"].astype(str).isin(codes)], thread_count=thread_count))
+    enriched = {str(row["Code"]) for row in rows}
+
+    current = dataframe.assign(Key=dataframe["Code"].astype(str)).drop_duplicates(subset="Key", keep="last").set_index("Key")
+    days = 0 if state.date is None else (today - state.date).days
+    carried = [
+        carry_forward(row=state.rows[code], current=current.loc[code], days=days)
+        for code in current.index if code not in enriched and code in state.rows
+    ]
 
-    return dataframe
+    state.rows = {**{code: row for code, row in state.rows.items() if code in current.index}, **{str(row["Code"]): row for row in carried + rows}}
+    state.refreshed = {**{code: date for code, date in state.refreshed.items() if code in current.index}, **{code: today for code in enriched}}
+    state.pending = codes - enriched
+    state.events = events
+    state.screener = dataframe
+    state.date = today
+    state.save()
+    return merge_dashboard(dataframe=dataframe, rows=carried + rows)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import standard libraries
+from typing import Callable
+import threading
+import pathlib
+import logging
+import json
+import time
+import os
+
+# Import third-party libraries
+import pandas
+
+# Import internal libraries
+from klsescreener.resolution import Resolution
+
+
+# Longest duration of one bar, used to decide whether the newest bar in a range can still change
+BAR_SECONDS = {
+    Resolution.MINUTE_1.value : 60,
+    Resolution.MINUTE_5.value : 5 * 60,
+    Resolution.MINUTE_15.value: 15 * 60,
+    Resolution.MINUTE_30.value: 30 * 60,
+    Resolution.HOUR_1.value   : 60 * 60,
+    Resolution.HOUR_4.value   : 4 * 60 * 60,
+    Resolution.DAILY.value    : 24 * 60 * 60,
+    Resolution.WEEKLY.value   : 7 * 24 * 60 * 60,
+    Resolution.MONTH_1.value  : 31 * 24 * 60 * 60,
+    Resolution.MONTH_3.value  : 92 * 24 * 60 * 60,
+    Resolution.MONTH_6.value  : 184 * 24 * 60 * 60,
+    Resolution.YEAR_1.value   : 366 * 24 * 60 * 60,
+    Resolution.YEAR_5.value   : 5 * 366 * 24 * 60 * 60,
+    Resolution.YEAR_10.value  : 10 * 366 * 24 * 60 * 60,
+}
+
+
+def merge_intervals(intervals: list) -> list:
+    """Merge overlapping or touching ``[start, end]`` intervals.
+    """
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+class BarStore:
+    """On-disk Parquet store of raw OHLCV bars keyed by ``(symbol, resolution)``.
+
+    Next to every Parquet file a small JSON file records which ``[from, to]`` ranges have
+    already been fetched, so that only the gaps and the newest bars are requested again.
+    """
+
+    COLUMNS = ["t", "o", "h", "l", "c", "v"]
+
+    def __init__(self, path: str | os.PathLike):
+        self.path = pathlib.Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def _key_lock(self, symbol: str, resolution: str) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault((symbol, resolution), threading.Lock())
+
+    def _paths(self, symbol: str, resolution: str) -> tuple[pathlib.Path, pathlib.Path]:
+        directory = self.path / resolution
+        return directory / f"{symbol}.parquet", directory / f"{symbol}.json"
+
+    def coverage(self, symbol: str, resolution: str) -> list:
+        """Return the merged ``[from, to]`` ranges already stored.
+        """
+        _, coverage_path = self._paths(symbol=symbol, resolution=resolution)
+        if not coverage_path.exists():
+            return []
+        return json.loads(coverage_path.read_text())
+
+    def load(self, symbol: str, resolution: str) -> pandas.DataFrame:
+        """Return every stored bar sorted by ``t``.
+        """
+        bars_path, _ = self._paths(symbol=symbol, resolution=resolution)
+        if not bars_path.exists():
+            return pandas.DataFrame(columns=self.COLUMNS)
+        return pandas.read_parquet(bars_path)
+
+    def read(self, symbol: str, resolution: str, stimestamp: int, etimestamp: int) -> pandas.DataFrame:
+        """Return the stored bars with ``stimestamp <= t <= etimestamp``.
+        """
+        dataframe = self.load(symbol=symbol, resolution=resolution)
+        dataframe = dataframe[(dataframe["t"] >= stimestamp) & (dataframe["t"] <= etimestamp)]
+        return dataframe.reset_index(drop=True)
+
+    def missing(self, symbol: str, resolution: str, stimestamp: int, etimestamp: int) -> list:
+        """Return the ``[from, to]`` ranges of the request that are not stored yet.
+        """
+        gaps = []
+        cursor = stimestamp
+        for start, end in self.coverage(symbol=symbol, resolution=resolution):
+            if end < cursor:
+                continue
+            if start > etimestamp:
+                break
+            if start > cursor:
+                gaps.append([cursor, start])
+            cursor = max(cursor, end)
+        if cursor < etimestamp:
+            gaps.append([cursor, etimestamp])
+        return gaps
+
+    def write(self, symbol: str, resolution: str, dataframe: pandas.DataFrame, stimestamp: int, etimestamp: int):
+        """Merge freshly fetched bars for ``[stimestamp, etimestamp]`` into the store.
+
+        Bars are deduplicated on ``t`` keeping the fresh value. The range is only recorded as
+        covered up to the newest bar that can no longer change.
+        """
+        bars_path, coverage_path = self._paths(symbol=symbol, resolution=resolution)
+        bars_path.parent.mkdir(parents=True, exist_ok=True)
+
+        dataframe = dataframe[[column for column in self.COLUMNS if column in dataframe.columns]]
+        stored = self.load(symbol=symbol, resolution=resolution)
+        merged = pandas.concat(objs=[df for df in (stored, dataframe) if not df.empty] or [stored])
+        merged = merged.drop_duplicates(subset=["t"], keep="last").sort_values(by=["t"]).reset_index(drop=True)
+
+        settled = int(time.time()) - BAR_SECONDS.get(resolution, 0)
+        if not dataframe.empty:
+            settled = max(settled, int(dataframe["t"].max()))
+        covered_end = min(etimestamp, settled)
+        coverage = self.coverage(symbol=symbol, resolution=resolution)
+        if covered_end > stimestamp:
+            coverage = merge_intervals(intervals=[*coverage, [stimestamp, covered_end]])
+
+        temporary_path = bars_path.with_suffix(".parquet.tmp")
+        merged.to_parquet(temporary_path, index=False)
+        os.replace(temporary_path, bars_path)
+        temporary_path = coverage_path.with_suffix(".json.tmp")
+        temporary_path.write_text(json.dumps(coverage))
+        os.replace(temporary_path, coverage_path)
+
+    def fetch(self, symbol: str, resolution: str, stimestamp: int, etimestamp: int, fetch: Callable[[int, int], pandas.DataFrame]) -> pandas.DataFrame:
+        """Serve ``[stimestamp, etimestamp]`` from the store, calling ``fetch`` only for the missing ranges.
+        """
+        with self._key_lock(symbol=symbol, resolution=resolution):
+            for start, end in self.missing(symbol=symbol, resolution=resolution, stimestamp=stimestamp, etimestamp=etimestamp):
+                logging.debug(f"Fetching missing {resolution} bars for \"{symbol}\" from {start} to {end}.")
+                self.write(symbol=symbol, resolution=resolution, dataframe=fetch(start, end), stimestamp=start, etimestamp=end)
+            return self.read(symbol=symbol, resolution=resolution, stimestamp=stimestamp, etimestamp=etimestamp)
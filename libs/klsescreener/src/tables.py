@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import standard libraries
+import re
+
+# Import third-party libraries
+from pandas.errors import EmptyDataError
+from pandas.io.parsers import TextParser
+import lxml.html
+import pandas
+
+
+# Same whitespace clean-up and regex namespace as pandas.read_html
+_RE_WHITESPACE = re.compile(r"[\r\n]+|\s{2,}")
+_RE_NAMESPACE = {"re": "http://exslt.org/regular-expressions"}
+
+
+def _is_hidden(element) -> bool:
+    return "display:none" in element.attrib.get("style", "").replace(" ", "")
+
+
+def parse_document(text: str) -> lxml.html.HtmlElement:
+    """Parse a html page once for table extraction and xpath lookups.
+
+    As ``pandas.read_html`` does, line breaks become newlines and ``<style>`` and hidden
+    elements inside tables are dropped.
+    """
+    root = lxml.html.fromstring(text, parser=lxml.html.HTMLParser(recover=True))
+    for br in root.xpath("*//br"):
+        br.tail = "\n" + (br.tail or "")
+    for element in root.xpath("//table//style"):
+        element.drop_tree()
+    for element in root.xpath("//table//*[@style]"):
+        if _is_hidden(element):
+            element.drop_tree()
+    return root
+
+
+def _cells(row) -> list:
+    return row.xpath("./td|./th")
+
+
+def _rows(table) -> tuple[list, list, list]:
+    """Split a table into header, body and footer ``<tr>`` elements like pandas.read_html.
+    """
+    header_rows = []
+    for thead in table.xpath(".//thead"):
+        header_rows.extend(thead.xpath("./tr"))
+        # Tolerate <thead><th>...</th></thead> without <tr>
+        if _cells(thead):
+            header_rows.append(thead)
+    body_rows = table.xpath(".//tbody//tr") + table.xpath("./tr")
+    footer_rows = table.xpath(".//tfoot//tr")
+    if not header_rows:
+        # Without <thead>, leading rows made only of <th> are the header
+        while body_rows and all(cell.tag == "th" for cell in _cells(body_rows[0])):
+            header_rows.append(body_rows.pop(0))
+    return header_rows, body_rows, footer_rows
+
+
+def _expand(rows: list, links: bool) -> list:
+    """Return the text, or ``(text, href)``, of every cell with colspan and rowspan repeated.
+    """
+    all_texts = []
+    remainder = []  # (index, text, rowspan left)
+    for row in rows:
+        texts = []
+        next_remainder = []
+        index = 0
+        for cell in _cells(row):
+            while remainder and remainder[0][0] <= index:
+                prev_index, prev_text, prev_rowspan = remainder.pop(0)
+                texts.append(prev_text)
+                if prev_rowspan > 1:
+                    next_remainder.append((prev_index, prev_text, prev_rowspan - 1))
+                index += 1
+
+            text = _RE_WHITESPACE.sub(" ", cell.text_content().strip())
+            if links is True:
+                href = cell.xpath(".//a/@href")
+                text = (text, href[0] if href else None)
+            rowspan = int(cell.get("rowspan") or 1)
+            colspan = int(cell.get("colspan") or 1)
+            for _ in range(colspan):
+                texts.append(text)
+                if rowspan > 1:
+                    next_remainder.append((index, text, rowspan - 1))
+                index += 1
+
+        for prev_index, prev_text, prev_rowspan in remainder:
+            texts.append(prev_text)
+            if prev_rowspan > 1:
+                next_remainder.append((prev_index, prev_text, prev_rowspan - 1))
+        all_texts.append(texts)
+        remainder = next_remainder
+
+    while remainder:
+        next_remainder = []
+        texts = []
+        for prev_index, prev_text, prev_rowspan in remainder:
+            texts.append(prev_text)
+            if prev_rowspan > 1:
+                next_remainder.append((prev_index, prev_text, prev_rowspan - 1))
+        all_texts.append(texts)
+        remainder = next_remainder
+    return all_texts
+
+
+def _header_texts(header_rows: list) -> set:
+    return {text for row in _expand(rows=header_rows, links=False) for text in row}
+
+
+def _to_frame(header_rows: list, body_rows: list, footer_rows: list, extract_links: str | None) -> pandas.DataFrame:
+    head = _expand(rows=header_rows, links=extract_links in ("all", "header"))
+    body = _expand(rows=body_rows, links=extract_links in ("all", "body"))
+    foot = _expand(rows=footer_rows, links=extract_links in ("all", "footer"))
+
+    header = None
+    if head:
+        body = head + body
+        # Infer the header from <thead> or the leading <th>-only rows, ignoring empty rows
+        header = 0 if len(head) == 1 else [i for i, row in enumerate(head) if any(text for text in row)]
+    if foot:
+        body += foot
+
+    # Pad ragged rows to the widest row
+    width = max((len(row) for row in body), default=0)
+    body = [row + [""] * (width - len(row)) for row in body]
+
+    with TextParser(body, header=header, index_col=None, skiprows=0, parse_dates=False, thousands=",", decimal=".", converters=None, na_values=None, keep_default_na=True) as parser:
+        dataframe = parser.read()
+    if extract_links in ("all", "header") and isinstance(dataframe.columns, pandas.MultiIndex):
+        dataframe.columns = pandas.Index(((column[0], None if pandas.isna(column[1]) else column[1]) for column in dataframe.columns), tupleize_cols=False)
+    return dataframe
+
+
+def read_tables(document: str | lxml.html.HtmlElement, match: str = ".+", extract_links: str | None = None, header: list | None = None, index: int | slice | None = None) -> list:
+    """Extract only the requested tables from a parsed page.
+
+    Tables are selected like ``pandas.read_html(..., match=match)[index]``, optionally narrowed
+    to the tables whose header contains every label in ``header``. Only the selected tables are
+    turned into DataFrames, with the same values, types and ``extract_links`` tuples as
+    ``pandas.read_html``.
+    """
+    if isinstance(document, str):
+        document = parse_document(text=document)
+
+    pattern = re.compile(match).pattern
+    tables = document.xpath(f"//table[.//text()[re:test(., {repr(pattern)})]]", namespaces=_RE_NAMESPACE)
+    tables = [table for table in tables if not _is_hidden(table)]
+    if not tables:
+        raise ValueError(f"No tables found matching regex {repr(pattern)}")
+
+    # pandas.read_html skips tables without any cell, so they do not count for `index`
+    candidates = []
+    for table in tables:
+        rows = _rows(table=table)
+        if not any(_cells(row) for section in rows for row in section):
+            continue
+        if header is not None and not set(header).issubset(_header_texts(header_rows=rows[0])):
+            continue
+        candidates.append(rows)
+
+    if isinstance(index, int):
+        candidates = [candidates[index]]
+    elif index is not None:
+        candidates = candidates[index]
+
+    dataframes = []
+    for header_rows, body_rows, footer_rows in candidates:
+        try:
+            dataframes.append(_to_frame(header_rows=header_rows, body_rows=body_rows, footer_rows=footer_rows, extract_links=extract_links))
+        except EmptyDataError:
+            continue
+    return dataframes
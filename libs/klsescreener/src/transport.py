@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import standard libraries
+import threading
+import warnings
+import logging
+
+# Import third-party libraries
+from requests.adapters import HTTPAdapter
+import requests
+import urllib3
+
+# Import internal libraries
+from klsescreener.httpcache import ResponseCache
+from klsescreener.limiter import RateLimiter
+from shared.metrics import metrics
+
+
+# The site is fetched with verify=False, which urllib3 would otherwise warn about on every
+# request. Installed once, when the transport is first loaded rather than on import klsescreener
+warnings.filterwarnings(action="ignore", category=urllib3.exceptions.InsecureRequestWarning)
+
+
+class Transport:
+    """Shared, thread-safe HTTP transport with pooled keep-alive connections.
+
+    Every thread gets its own ``requests.Session`` but all of them are mounted on the same
+    ``HTTPAdapter``, so TCP/TLS connections are pooled and reused across the whole process.
+    With a ``cache`` successful responses are stored on disk and served from there while fresh,
+    with a ``limiter`` requests that reach the network are paced by it.
+    """
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 32, timeout: float | tuple = (10, 30), max_retries: int = 0, cache: ResponseCache | None = None, limiter: RateLimiter | None = None):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.timeout = timeout
+        self.cache = cache
+        self.limiter = limiter
+        self._adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=max_retries)
+        self._local = threading.local()
+
+    @property
+    def session(self) -> requests.Session:
+        """Session bound to the calling thread, sharing the pooled adapter.
+        """
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update({"Accept-Encoding": "gzip, deflate"})
+            session.mount("https://", self._adapter)
+            session.mount("http://", self._adapter)
+            self._local.session = session
+        return session
+
+    def get(self, url: str, headers: dict | None = None, timeout: float | tuple | None = None, **kwargs) -> requests.Response:
+        """Send a GET request through the pooled connections, or answer it from the response cache.
+        """
+        if self.cache is not None:
+            response = self.cache.get(url=url)
+            if response is not None:
+                logging.debug(f"GET {url} (cached)")
+                return response
+        timeout = self.timeout if timeout is None else timeout
+        logging.debug(f"GET {url} (timeout={timeout})")
+        if self.limiter is None:
+            response = self.session.get(url=url, headers=headers, timeout=timeout, **kwargs)
+        else:
+            response = self.limiter.send(url=url, request=lambda: self.session.get(url=url, headers=headers, timeout=timeout, **kwargs))
+        metrics.count("http_requests", status=response.status_code)
+        metrics.count("http_bytes", len(response.content))
+        if self.cache is not None and response.status_code == 200:
+            self.cache.put(url=url, response=response)
+        return response
+
+    def stats(self) -> dict:
+        """Return the number of requests sent and how many used a new or a reused connection.
+        """
+        poolmanager = self._adapter.poolmanager
+        with poolmanager.pools.lock:
+            pools = list(poolmanager.pools._container.values())
+        requests_count = sum(pool.num_requests for pool in pools)
+        new_connections = sum(pool.num_connections for pool in pools)
+        return {
+            "pools": len(pools),
+            "requests": requests_count,
+            "new_connections": new_connections,
+            "reused_connections": max(requests_count - new_connections, 0),
+        }
+
+    def close(self):
+        """Close every pooled connection.
+        """
+        self._adapter.close()
+
+
+_transport = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> Transport:
+    """Return the process-wide transport, creating it on first use.
+    """
+    global _transport
+    with _transport_lock:
+        if _transport is None:
+            _transport = Transport(limiter=RateLimiter())
+        return _transport
+
+
+def configure_transport(transport: Transport | None = None, **kwargs) -> Transport:
+    """Replace the process-wide transport, e.g. to change the pool size or timeouts.
+
+    A ready-made ``transport``, such as a ``ReplayTransport``, is installed as is. Otherwise
+    the new one is paced by a default ``RateLimiter`` unless ``limiter`` is given.
+    """
+    global _transport
+    with _transport_lock:
+        if _transport is not None and _transport is not transport:
+            _transport.close()
+        if transport is None:
+            kwargs.setdefault("limiter", RateLimiter())
+            transport = Transport(**kwargs)
+        _transport = transport
+        return _transport
@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+"""Synthetic OHLCV bars shared by the tests, in the raw layout of the history endpoint."""
+
+# Import third-party libraries
+import numpy
+import pandas
+
+
+DAY = 24 * 60 * 60
+START = 1704067200  # 2024-01-01 00:00:00 UTC, a Monday
+
+
+def minute_bars(days: int, start: int = START) -> pandas.DataFrame:
+    """One bar per minute of both Bursa sessions (09:00-12:30 and 14:30-17:00 local time), oldest first."""
+    local = [start + day * DAY + minute * 60 for day in range(days) for minute in [*range(9 * 60, 12 * 60 + 30), *range(14 * 60 + 30, 17 * 60)]]
+    t = numpy.array(local) - 8 * 60 * 60
+    rng = numpy.random.default_rng(seed=0)
+    c = 1 + rng.random(len(t)).astype("float32")
+    return pandas.DataFrame(data={"t": t, "o": c + 0.01, "h": c + 0.02, "l": c - 0.02, "c": c, "v": rng.integers(0, 1000, len(t))})
+
+
+def daily_bars(days: int, start: int = START, seed: int | None = None, newest_first: bool = False) -> pandas.DataFrame:
+    """One bar per day closing on a line from 1 to 2, or at random with a ``seed``.
+
+    Bars are sorted oldest first, or newest first like ``Stock.historical_data``.
+    """
+    t = start + numpy.arange(days) * DAY
+    if seed is None:
+        c = numpy.linspace(1, 2, days, dtype="float32")
+    else:
+        c = numpy.round(1 + numpy.random.default_rng(seed=seed).random(days), 2).astype("float32")
+    dataframe = pandas.DataFrame(data={"t": t, "o": c, "h": c + 0.1, "l": c - 0.1, "c": c, "v": numpy.arange(days)})
+    return dataframe.iloc[::-1].reset_index(drop=True) if newest_first else dataframe
+
+
+def between(dataframe: pandas.DataFrame, stimestamp: int, etimestamp: int) -> pandas.DataFrame:
+    """Bars with ``stimestamp <= t <= etimestamp``, like the history endpoint returns them."""
+    return dataframe[(dataframe["t"] >= stimestamp) & (dataframe["t"] <= etimestamp)].reset_index(drop=True)
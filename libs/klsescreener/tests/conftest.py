@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import standard libraries
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+import pathlib
+import os
+
+# Import third-party libraries
+import pytest
+
+# Import internal libraries
+from klsescreener.replay import RecordingTransport, ReplayServer, ReplayTransport
+from klsescreener.transport import configure_transport
+from klsescreener import KLSEScreener
+
+
+FIXTURES = pathlib.Path(__file__).parent / "fixtures"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def klsescreener_site():
+    """Serve klsescreener.com from the fixtures, synthetic pages unless recorded from the live site.
+
+    Set KLSESCREENER_FIXTURES=record to refresh the fixtures from the live site, or
+    KLSESCREENER_FIXTURES=live to run against the live site without recording.
+    """
+    mode = os.environ.get("KLSESCREENER_FIXTURES", "replay").strip()
+    KLSEScreener.invalidate_snapshot()
+    if mode == "live":
+        yield None
+    elif mode == "record":
+        yield configure_transport(transport=RecordingTransport(fixtures=FIXTURES))
+    else:
+        with ReplayServer(fixtures=FIXTURES) as server:
+            yield configure_transport(transport=ReplayTransport(target=server.url))
+    configure_transport()
+
+
+class LocalServer:
+    """Local keep-alive HTTP server recording the paths it is asked for.
+
+    Every path answers 200 with a small HTML page, unless it starts with one of the
+    ``statuses`` prefixes.
+    """
+
+    def __init__(self, statuses: dict | None = None):
+        self.statuses = {"/pending": 202} if statuses is None else statuses
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server.requests.append(self.path)
+                status = next((status for prefix, status in server.statuses.items() if self.path.startswith(prefix)), 200)
+                body = f"<html><body>{self.path} {'x' * 2000}</body></html>".encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+
+    def __enter__(self):
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def server(request):
+    """Fixture to run a ``LocalServer``, parametrize it indirectly with a ``{prefix: status}`` dict."""
+    with LocalServer(statuses=getattr(request, "param", None)) as local_server:
+        yield local_server
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import third-party libraries
+import pandas
+import pytest
+
+# Import internal libraries
+from klsescreener.document import Document
+
+
+HTML = """
+<html><body>
+<table><thead><tr><th>Financial Year</th><th>Revenue</th></tr></thead>
+<tbody><tr><td>2024</td><td>100</td></tr><tr><td>2025</td><td>120</td></tr></tbody></table>
+<table><thead><tr><th>Date Change</th><th>Shares</th></tr></thead>
+<tbody><tr><td>2025-01-02</td><td>5</td></tr></tbody></table>
+</body></html>
+"""
+
+
+@pytest.fixture
+def document():
+    """Fixture to create a Document backed by a counting fake download."""
+    calls = []
+
+    def fetch_text(url):
+        calls.append(url)
+        return HTML
+
+    document = Document(url="https://example.com/stocks/view/1818", fetch_text=fetch_text)
+    document.calls = calls
+    return document
+
+
+def test_single_download_and_parse(document):
+    first = document.tables(match="Financial Year")[0]
+    assert document.from_cache is False
+    second = document.tables(match="Financial Year")[0]
+    assert document.from_cache is True
+    assert document.tables(match="Date Change")[0].columns.to_list() == ["Date Change", "Shares"]
+    assert document.tree is not None
+    assert len(document.calls) == 1
+    pandas.testing.assert_frame_equal(first, second)
+
+
+def test_tables_are_copies(document):
+    document.tables()[0].drop(columns=["Revenue"], inplace=True)
+    assert "Revenue" in document.tables()[0].columns
+
+
+def test_refresh(document):
+    document.tables()
+    document.refresh()
+    document.tables()
+    assert document.from_cache is False
+    assert len(document.calls) == 2
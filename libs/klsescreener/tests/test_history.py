@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import standard libraries
+from unittest.mock import patch
+from urllib.parse import urlparse, parse_qs
+
+# Import third-party libraries
+import pandas
+
+# Import internal libraries
+from klsescreener.history import BAR_DTYPES, compact_history, fetch_bars, fetch_history, fetch_range, memory_report, post_process_history, windows
+from klsescreener.resolution import Resolution
+from klsescreener import KLSEScreener
+from .bars import DAY, START, minute_bars
+
+
+def fake_fetch_json(self, url):
+    """History endpoint stand-in returning five daily bars per symbol."""
+    query = parse_qs(urlparse(url).query)
+    symbol = query["symbol"][0]
+    if symbol == "9999":
+        raise ValueError("No data")
+    t = [START + i * DAY for i in range(5)]
+    base = float(int(symbol))
+    return pandas.DataFrame(data={
+        "t": t, "o": base, "h": base + 1, "l": base - 1, "c": base, "v": 1000,
+        "s": "ok", "from": t[0], "to": t[-1], "exact_from": t[0], "server": "", "ip": "", "qt": 0,
+    })
+
+
+@patch.object(KLSEScreener, "fetch_json", autospec=True, side_effect=fake_fetch_json)
+def test_fetch_history_long_format(mock_fetch_json):
+    dataframe, errors = fetch_history(codes=["1818", "0001", "9999"], resolution=Resolution.DAILY, start=START, end=START + 10 * DAY, max_workers=3)
+    assert dataframe.columns.to_list() == ["symbol", "t", "o", "h", "l", "c", "v"]
+    assert dataframe["symbol"].dtype == "category"
+    assert dataframe["o"].dtype == "float32"
+    assert dataframe.groupby("symbol", observed=True).size().to_dict() == {"1818": 5, "0001": 5}
+    assert errors["symbol"].to_list() == ["9999"]
+    assert mock_fetch_json.call_count == 3
+
+
+@patch.object(KLSEScreener, "fetch_json", autospec=True, side_effect=fake_fetch_json)
+def test_fetch_history_multiindex(mock_fetch_json):
+    dataframe, errors = fetch_history(codes=["0001"], resolution="1D", start="2024-01-01", end=START + 10 * DAY, multiindex=True)
+    assert dataframe.index.names == ["symbol", "t"]
+    assert dataframe.loc[("0001", START), "h"] == 2.0
+    assert errors.empty
+
+
+def fake_intraday_fetch_json(self, url):
+    """History endpoint stand-in returning one bar every 5 minutes within the requested range."""
+    query = parse_qs(urlparse(url).query)
+    stimestamp, etimestamp = int(query["from"][0]), int(query["to"][0])
+    t = list(range(stimestamp + -stimestamp % 300, etimestamp + 1, 300))
+    if not t:
+        return pandas.DataFrame(data=[{"s": "no_data"}])
+    return pandas.DataFrame(data={"t": t, "o": 1.0, "h": 2.0, "l": 0.5, "c": 1.5, "v": 10, "s": "ok"})
+
+
+def test_windows_cover_range():
+    spans = windows(resolution=Resolution.MINUTE_5.value, stimestamp=START, etimestamp=START + 200 * DAY)
+    assert len(spans) == 4
+    assert spans[0][0] == START and spans[-1][1] == START + 200 * DAY
+    assert all(end + 1 == start for (_, end), (start, _) in zip(spans, spans[1:]))
+    assert windows(resolution=Resolution.DAILY.value, stimestamp=START, etimestamp=START + 2000 * DAY) == [(START, START + 2000 * DAY)]
+
+
+@patch.object(KLSEScreener, "fetch_json", autospec=True, side_effect=fake_intraday_fetch_json)
+def test_fetch_range_matches_single_request(mock_fetch_json):
+    klsescreener = KLSEScreener()
+    expected = fetch_bars(klsescreener=klsescreener, code="0001", resolution=Resolution.MINUTE_5.value, stimestamp=START, etimestamp=START + 200 * DAY)
+    mock_fetch_json.reset_mock()
+    actual = fetch_range(klsescreener=klsescreener, code="0001", resolution=Resolution.MINUTE_5.value, stimestamp=START, etimestamp=START + 200 * DAY)
+    assert mock_fetch_json.call_count == 4
+    pandas.testing.assert_frame_equal(actual, expected)
+
+
+@patch("klsescreener.history.time.sleep")
+def test_fetch_range_retries_window(mock_sleep):
+    calls = []
+
+    def flaky_fetch_json(self, url):
+        calls.append(url)
+        if len(calls) == 2:
+            raise ConnectionError("Connection reset")
+        return fake_intraday_fetch_json(self, url)
+
+    with patch.object(KLSEScreener, "fetch_json", autospec=True, side_effect=flaky_fetch_json):
+        dataframe = fetch_range(klsescreener=KLSEScreener(), code="0001", resolution=Resolution.MINUTE_1.value, stimestamp=START, etimestamp=START + 30 * DAY)
+    assert len(calls) == 4
+    assert mock_sleep.call_count == 1
+    assert dataframe["t"].is_monotonic_increasing and dataframe["t"].is_unique
+    assert len(dataframe) == 30 * DAY // 300 + 1
+
+
+def test_compact_layout():
+    dataframe = compact_history(dataframe=minute_bars(days=1), resolution=Resolution.MINUTE_1.value)
+    assert dataframe.columns.to_list() == ["Resolution", "t", "o", "h", "l", "c", "v"]
+    assert dataframe.dtypes.drop("Resolution").to_dict() == {column: pandas.api.types.pandas_dtype(dtype) for column, dtype in BAR_DTYPES.items()}
+    assert dataframe["Resolution"].dtype == "category"
+    assert dataframe["t"].is_monotonic_decreasing
+
+
+def test_lazy_calendar_columns_match_full_layout():
+    bars = minute_bars(days=9).astype(dtype=BAR_DTYPES)
+    full = post_process_history(dataframe=bars.copy(), resolution=Resolution.MINUTE_1.value)
+    compact = compact_history(dataframe=bars, resolution=Resolution.MINUTE_1.value)
+    assert compact.bars.Date.to_list() == full["Date"].to_list()
+    assert compact.bars.Day.astype(str).to_list() == full["Day"].to_list()
+    pandas.testing.assert_frame_equal(compact.bars.expand(), full)
+
+
+def test_memory_report():
+    report = memory_report(dataframe=minute_bars(days=28), resolution=Resolution.MINUTE_1.value)
+    assert report.columns.to_list() == ["full", "compact"]
+    assert report.loc["Date", "compact"] == 0
+    assert report.loc["Total", "compact"] * 5 < report.loc["Total", "full"]
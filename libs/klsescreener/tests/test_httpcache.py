@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import standard libraries
+import time
+
+# Import third-party libraries
+import pytest
+
+# Import internal libraries
+from klsescreener.httpcache import OfflineCacheMiss, ResponseCache
+from klsescreener.transport import Transport
+
+
+def test_responses_are_served_from_cache(server, tmp_path):
+    cache = ResponseCache(path=tmp_path / "responses.sqlite")
+    transport = Transport(cache=cache)
+    first = transport.get(url=f"{server.url}/stocks/view/0001")
+    second = transport.get(url=f"{server.url}/stocks/view/0001")
+    assert second.text == first.text and second.status_code == 200
+    assert server.requests == ["/stocks/view/0001"]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["bytes"] < len(first.content)
+
+    # 202 "processing" answers are never stored
+    transport.get(url=f"{server.url}/pending")
+    transport.get(url=f"{server.url}/pending")
+    assert server.requests.count("/pending") == 2
+    transport.close()
+
+
+def test_ttl_per_pattern(server, tmp_path):
+    cache = ResponseCache(path=tmp_path / "responses.sqlite", ttls=[(r"/short", 0.1)], default_ttl=60)
+    transport = Transport(cache=cache)
+    for path in ("/short", "/long"):
+        transport.get(url=f"{server.url}{path}")
+    time.sleep(0.2)
+    for path in ("/short", "/long"):
+        transport.get(url=f"{server.url}{path}")
+    assert server.requests == ["/short", "/long", "/short"]
+    transport.close()
+
+
+def test_lru_eviction(server, tmp_path):
+    cache = ResponseCache(path=tmp_path / "responses.sqlite", max_bytes=100)
+    transport = Transport(cache=cache)
+    for path in ("/a", "/b", "/a", "/c"):
+        transport.get(url=f"{server.url}{path}")
+    # "/b" is the least recently used response once "/c" does not fit
+    assert cache.get(url=f"{server.url}/b") is None
+    assert cache.get(url=f"{server.url}/a") is not None
+    assert cache.stats()["evictions"] >= 1
+    transport.close()
+
+
+def test_offline_mode(server, tmp_path):
+    path = tmp_path / "responses.sqlite"
+    transport = Transport(cache=ResponseCache(path=path, ttls=[], default_ttl=0))
+    transport.get(url=f"{server.url}/page")
+    transport.close()
+
+    offline = Transport(cache=ResponseCache(path=path, offline=True))
+    assert "/page" in offline.get(url=f"{server.url}/page").text
+    with pytest.raises(OfflineCacheMiss):
+        offline.get(url=f"{server.url}/other")
+    assert server.requests == ["/page"]
+    offline.close()
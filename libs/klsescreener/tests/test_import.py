@@ -0,0 +1,32 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import standard libraries
+import subprocess
+import json
+import sys
+
+
+def run(code: str) -> dict:
+    return json.loads(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout)
+
+
+def test_import_is_lazy():
+    """Test that a bare import loads no heavy dependency and leaves the warning filters alone."""
+    result = run(
+        "import sys, json, warnings; filters = list(warnings.filters); import klsescreener; "
+        "print(json.dumps({'modules': [name for name in ('pandas', 'numpy', 'requests', 'urllib3', 'lxml', 'bs4') if name in sys.modules], "
+        "'filters': warnings.filters == filters}))"
+    )
+    assert result == {"modules": [], "filters": True}
+
+
+def test_exports_load_on_access():
+    """Test that the public names still resolve, importing their module on first access."""
+    result = run(
+        "import sys, json, klsescreener; from klsescreener import Resolution; loaded = 'pandas' in sys.modules; "
+        "stock = klsescreener.Stock; print(json.dumps({'resolution': loaded, 'stock': 'pandas' in sys.modules, "
+        "'module': stock.__module__, 'dir': sorted(set(klsescreener.__all__) - set(dir(klsescreener)))}))"
+    )
+    assert result == {"resolution": False, "stock": True, "module": "klsescreener.stock", "dir": []}
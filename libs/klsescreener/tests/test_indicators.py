@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import third-party libraries
+import numpy
+import pandas
+import pytest
+
+# Import internal libraries
+from klsescreener.indicators import IndicatorEngine, indicators
+from klsescreener.stock import Stock
+from .bars import DAY, START
+
+
+def panel(symbols: int = 4, bars: int = 300) -> pandas.DataFrame:
+    """Daily random walk bars of symbols listed on different days, in ``fetch_history`` layout."""
+    rng = numpy.random.default_rng(seed=0)
+    frames = []
+    for index in range(symbols):
+        count = bars - 40 * index
+        c = 10 * numpy.exp(numpy.cumsum(rng.normal(0, 0.02, count)))
+        frames.append(pandas.DataFrame(data={
+            "symbol": f"{index:04d}", "t": START + (40 * index + numpy.arange(count)) * DAY,
+            "o": c, "h": c * (1 + rng.random(count) / 50), "l": c * (1 - rng.random(count) / 50), "c": c, "v": rng.integers(100, 10000, count),
+        }))
+    dataframe = pandas.concat(objs=frames, ignore_index=True)
+    dataframe["symbol"] = dataframe["symbol"].astype("category")
+    return dataframe
+
+
+def reference(dataframe: pandas.DataFrame, vwap: int) -> pandas.DataFrame:
+    """Per-symbol pandas implementation of the default indicators."""
+
+    def compute(bars):
+        c, high, low = bars["c"], bars["h"], bars["l"]
+        change = c.diff()
+        gain = change.clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean()
+        loss = (-change.clip(upper=0)).ewm(alpha=1 / 14, adjust=False).mean()
+        macd = c.ewm(span=12, adjust=False).mean() - c.ewm(span=26, adjust=False).mean()
+        previous = c.shift()
+        tr = pandas.concat(objs=[high - low, (high - previous).abs(), (low - previous).abs()], axis=1).max(axis=1)
+        typical = (high + low + c) / 3
+        return pandas.DataFrame(data={
+            "sma_20": c.rolling(20).mean(),
+            "sma_50": c.rolling(50).mean(),
+            "bb_upper": c.rolling(20).mean() + 2 * c.rolling(20).std(ddof=0),
+            "bb_lower": c.rolling(20).mean() - 2 * c.rolling(20).std(ddof=0),
+            "ema_12": c.ewm(span=12, adjust=False).mean(),
+            "ema_26": c.ewm(span=26, adjust=False).mean(),
+            "rsi_14": 100 - 100 / (1 + gain / loss),
+            "macd": macd,
+            "macd_signal": macd.ewm(span=9, adjust=False).mean(),
+            "atr_14": tr.ewm(alpha=1 / 14, adjust=False).mean(),
+            "vwap": (typical * bars["v"]).rolling(vwap).sum() / bars["v"].rolling(vwap).sum(),
+        }, index=bars.index)
+
+    return pandas.concat(objs=[compute(bars) for _, bars in dataframe.groupby("symbol", observed=True)]).loc[dataframe.index]
+
+
+def test_panel_matches_pandas():
+    dataframe = panel()
+    result = indicators(dataframe=dataframe, vwap=20)
+    expected = reference(dataframe=dataframe, vwap=20)
+    assert result.columns[:7].to_list() == dataframe.columns.to_list()
+    for column in expected.columns:
+        numpy.testing.assert_allclose(result[column], expected[column], rtol=1e-9, atol=1e-9, err_msg=column)
+    numpy.testing.assert_allclose(result["macd_hist"], result["macd"] - result["macd_signal"])
+
+
+def test_multiindex_and_row_order():
+    dataframe = panel()
+    shuffled = dataframe.sample(frac=1, random_state=0)
+    result = indicators(dataframe=shuffled.set_index(keys=["symbol", "t"]))
+    assert result.index.names == ["symbol", "t"]
+    pandas.testing.assert_index_equal(result.index, shuffled.set_index(keys=["symbol", "t"]).index)
+    expected = indicators(dataframe=dataframe).set_index(keys=["symbol", "t"]).loc[result.index]
+    pandas.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize("vwap", [None, 20])
+def test_update_continues_from_state(vwap):
+    dataframe = panel()
+    full = indicators(dataframe=dataframe, vwap=vwap)
+    engine = IndicatorEngine(vwap=vwap)
+    cut = START + 150 * DAY
+    first = engine.compute(dataframe=dataframe[dataframe["t"] < cut])
+    # Overlapping bars are skipped, only the newer ones are computed
+    second = engine.update(dataframe=dataframe[dataframe["t"] >= cut - 10 * DAY])
+    assert len(first) + len(second) == len(dataframe)
+    pandas.testing.assert_frame_equal(pandas.concat(objs=[first, second]).sort_index(), full, rtol=1e-9)
+    assert engine.update(dataframe=dataframe).empty
+
+
+def test_session_vwap_resets_every_day():
+    dataframe = Stock(code="1818").historical_data_1m(stimestamp=START, etimestamp=START + 3 * 365 * DAY, compact=True)
+    result = indicators(dataframe=dataframe)
+    ascending = dataframe.sort_values(by="t")
+    day = (ascending["t"] + 8 * 60 * 60) // DAY
+    typical = (ascending["h"].astype("float64") + ascending["l"] + ascending["c"]) / 3
+    expected = (typical * ascending["v"]).groupby(day).cumsum() / ascending["v"].groupby(day).cumsum()
+    assert day.nunique() > 1
+    assert result["t"].is_monotonic_decreasing
+    numpy.testing.assert_allclose(result["vwap"], expected.loc[result.index], rtol=1e-6)
+
+
+def test_historical_data_layout():
+    stock = Stock(code="1818")
+    dataframe = stock.historical_data_1D(stimestamp=START, etimestamp=START + 365 * DAY)
+    result = indicators(dataframe=dataframe, vwap=10)
+    assert result.columns[:len(dataframe.columns)].to_list() == dataframe.columns.to_list()
+    ascending = dataframe.sort_values(by="t").reset_index(drop=True)
+    numpy.testing.assert_allclose(result["sma_20"].to_numpy()[::-1], ascending["c"].astype("float64").rolling(20).mean(), rtol=1e-9)
+    assert result["rsi_14"].iloc[:-1].between(0, 100).all()
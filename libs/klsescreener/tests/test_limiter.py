@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import standard libraries
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import PropertyMock, patch
+import threading
+import time
+
+# Import third-party libraries
+import pytest
+
+# Import internal libraries
+from klsescreener.limiter import ConcurrencyWindow, RateLimiter, TokenBucket
+from klsescreener.transport import Transport
+
+
+class FakeResponse:
+
+    def __init__(self, status_code: int = 200):
+        self.status_code = status_code
+        self.content = b"{}"
+
+
+def test_token_bucket_paces_after_burst():
+    bucket = TokenBucket(rate=100.0, burst=5)
+    start = time.monotonic()
+    delays = [bucket.acquire() for _ in range(15)]
+    elapsed = time.monotonic() - start
+    assert delays[:5] == [0.0] * 5
+    assert all(delay > 0 for delay in delays[6:])
+    assert 0.08 <= elapsed < 0.5
+
+
+def test_window_grows_while_healthy_and_halves_on_congestion():
+    window = ConcurrencyWindow(initial=4, maximum=8)
+    for _ in range(40):
+        window.acquire()
+        window.release(latency=0.01)
+    assert 6 < window.window <= 8
+    before = window.window
+    window.acquire()
+    window.release(latency=0.01, ok=False)
+    assert window.window == pytest.approx(before / 2)
+    # A second error within the same round trip does not shrink it again
+    window._last_decrease = time.monotonic()
+    window.acquire()
+    window.release(latency=0.01, ok=False)
+    assert window.window == pytest.approx(before / 2)
+    assert (window.errors, window.decreases) == (2, 1)
+
+
+def test_window_shrinks_when_latency_climbs():
+    window = ConcurrencyWindow(initial=10, smoothing=0.5)
+    for latency in (0.05, 0.05, 0.25, 0.25, 0.25):
+        window.acquire()
+        window.release(latency=latency)
+        window._last_decrease = 0.0
+    assert window.window < 10
+    assert window.decreases >= 1
+
+
+def test_window_stays_open_under_healthy_mixed_traffic():
+    window = ConcurrencyWindow(initial=16)
+    for index in range(1000):
+        # Fast history requests interleaved with slower stock pages, with some jitter
+        endpoint, latency = ("history", 0.08) if index % 2 else ("stock", 0.3)
+        window.acquire()
+        window.release(latency=latency * (1 + 0.2 * (index % 5) / 4), endpoint=endpoint)
+        window._last_decrease = 0.0
+    assert window.decreases == 0
+    assert window.window > 16
+    assert set(window.baseline) == {"history", "stock"}
+
+
+def test_history_polls_are_not_congestion():
+    limiter = RateLimiter(window=ConcurrencyWindow(initial=8))
+
+    def request(status_code: int) -> FakeResponse:
+        time.sleep(0.01)
+        return FakeResponse(status_code=status_code)
+
+    for status_code in (202, 200) * 5:
+        limiter.send(url="https://www.klsescreener.com/v2/trading_view/history?symbol=1818", request=lambda: request(status_code=status_code))
+    assert limiter.window.window > 8
+    assert limiter.stats()["errors"] == 0
+
+
+def test_window_caps_requests_in_flight():
+    limiter = RateLimiter(budgets=[], default_rate=1000.0, default_burst=1000, window=ConcurrencyWindow(initial=3, maximum=3))
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def request():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.01)
+        with lock:
+            running.pop()
+        return FakeResponse()
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        list(executor.map(lambda _: limiter.send(url="https://example.com/", request=request), range(30)))
+    assert max(peak) == 3
+    stats = limiter.stats()
+    assert stats["in_flight"] == 0
+    assert stats["rate"] == pytest.approx(30 / limiter.period)
+
+
+def test_rate_rises_above_budget_while_healthy():
+    limiter = RateLimiter(budgets=[(r"/stocks/view/", 10.0, 4)])
+
+    def request():
+        time.sleep(0.005)
+        return FakeResponse()
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: limiter.send(url="https://www.klsescreener.com/v2/stocks/view/1818", request=request), range(100)))
+    elapsed = time.monotonic() - start
+    # A fixed budget of 10 per second would take almost 10 seconds
+    assert 100 / elapsed > 30
+    assert limiter.bucket("https://www.klsescreener.com/v2/stocks/view/1818").rate > 10.0
+
+
+def test_congestion_cuts_the_rate():
+    bucket = TokenBucket(rate=40.0, burst=4, max_rate=100.0)
+    bucket.adapt(healthy=True)
+    assert bucket.rate == pytest.approx(44.0)
+    bucket.adapt(healthy=False)
+    assert bucket.rate == pytest.approx(22.0)
+    # Out of slow start the rate only grows additively
+    bucket.adapt(healthy=True)
+    assert bucket.rate == pytest.approx(22.5)
+    fixed = TokenBucket(rate=40.0, burst=4)
+    fixed.adapt(healthy=True)
+    assert fixed.rate == 40.0
+    assert RateLimiter(adaptive=False).bucket("https://www.klsescreener.com/v2/stocks/view/1818").max_rate is None
+
+
+def test_budgets_are_per_endpoint():
+    limiter = RateLimiter()
+    assert limiter.bucket("https://www.klsescreener.com/v2/trading_view/history?symbol=1818").rate == 20.0
+    assert limiter.bucket("https://www.klsescreener.com/v2/stocks/view/1818").rate == 8.0
+    assert limiter.bucket("https://www.klsescreener.com/v2/screener/quote_results") is limiter.default
+
+
+def test_transport_feeds_the_limiter():
+    limiter = RateLimiter(window=ConcurrencyWindow(initial=8))
+    transport = Transport(limiter=limiter)
+    responses = iter([FakeResponse(status_code=429), FakeResponse(status_code=200)])
+
+    def get(**kwargs):
+        time.sleep(0.02)
+        return next(responses)
+
+    session = PropertyMock()
+    session.return_value.get.side_effect = get
+    with patch.object(Transport, "session", session):
+        assert transport.get(url="https://www.klsescreener.com/v2/stocks/view/1818").status_code == 429
+        assert limiter.window.window == 4
+        assert transport.get(url="https://www.klsescreener.com/v2/stocks/view/1818").status_code == 200
+    assert limiter.window.window == pytest.approx(4.25)
+    assert limiter.stats()["errors"] == 1
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import standard libraries
+import concurrent.futures
+import pathlib
+
+# Import internal libraries
+from klsescreener.replay import Fixtures, RecordingTransport, ReplayServer, ReplayTransport
+from klsescreener.resolution import Resolution
+from klsescreener.stock import Stock
+from klsescreener import KLSEScreener
+
+
+FIXTURES = pathlib.Path(__file__).parent / "fixtures"
+JANUARY_2024 = (1704067200, 1706745599)
+
+
+def test_history_is_filtered_by_range():
+    fixtures = Fixtures(path=FIXTURES)
+    data = fixtures.history(query={"symbol": ["1818"], "resolution": ["1D"], "from": [str(JANUARY_2024[0])], "to": [str(JANUARY_2024[1])]})
+    assert data["s"] == "ok"
+    assert len(data["t"]) == 23
+    assert JANUARY_2024[0] <= min(data["t"]) and max(data["t"]) <= JANUARY_2024[1]
+    assert fixtures.history(query={"symbol": ["1818"], "resolution": ["1D"], "from": ["0"], "to": ["1000"]}) == {"s": "no_data"}
+    assert fixtures.history(query={"symbol": ["0000"], "resolution": ["1D"], "from": ["0"], "to": ["1000"]}) == {"s": "no_data"}
+
+
+def test_coarse_history_is_derived():
+    fixtures = Fixtures(path=FIXTURES)
+    data = fixtures.history(query={"symbol": ["1818"], "resolution": ["1W"], "from": [str(JANUARY_2024[0])], "to": [str(JANUARY_2024[1])]})
+    assert len(data["t"]) == 5
+    assert sum(data["v"]) == sum(fixtures.history(query={"symbol": ["1818"], "resolution": ["1D"], "from": [str(JANUARY_2024[0])], "to": [str(JANUARY_2024[1] + 4 * 86400)]})["v"])
+
+
+def test_record_then_replay(tmp_path):
+    with ReplayServer(fixtures=FIXTURES) as server:
+        # Record from the stand-in server as if it were the live site
+        recorder = RecordingTransport(fixtures=tmp_path, origin=server.url)
+        for path in ("/v2/screener/quote_results", f"/v2/trading_view/history?symbol=1818&resolution=1D&from={JANUARY_2024[0]}&to={JANUARY_2024[1]}&countback=99999999&currencyCode=MYR"):
+            assert recorder.get(url=f"{server.url}{path}").status_code == 200
+        recorder.close()
+
+    recorded = Fixtures(path=tmp_path)
+    assert recorded.page(path="/v2/screener/quote_results") == Fixtures(path=FIXTURES).page(path="/v2/screener/quote_results")
+    assert len(recorded.bars(symbol="1818", resolution="1D")) == 23
+
+
+def test_replay_under_load():
+    with ReplayServer(fixtures=FIXTURES) as server:
+        transport = ReplayTransport(target=server.url, pool_maxsize=16)
+        url = f"{KLSEScreener().url}/stocks/view/1818"
+        with concurrent.futures.ThreadPoolExecutor(max_workers=16) as executor:
+            statuses = list(executor.map(lambda _: transport.get(url=url).status_code, range(400)))
+        assert statuses == [200] * 400
+        assert transport.stats()["new_connections"] <= 16
+        transport.close()
+
+
+def test_stock_is_replayed():
+    stock = Stock(code="1818")
+    assert stock.name == "BURSA"
+    assert stock.listing_date == "2019-04-30"
+    assert not stock.historical_data(resolution=Resolution.DAILY.value, stimestamp=JANUARY_2024[0], etimestamp=JANUARY_2024[1]).empty
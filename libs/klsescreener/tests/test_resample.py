@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import standard libraries
+from unittest.mock import patch
+
+# Import third-party libraries
+import pandas
+import pytest
+
+# Import internal libraries
+from klsescreener.resample import resample
+from klsescreener.resolution import Resolution
+from klsescreener.store import BarStore
+from klsescreener.stock import Stock
+from klsescreener import KLSEScreener
+from .bars import DAY, START, daily_bars, minute_bars
+
+
+def reference(dataframe, rule, **kwargs):
+    """Same aggregation with pandas.resample on local time."""
+    local = dataframe.set_index(pandas.to_datetime(dataframe["t"] + 8 * 60 * 60, unit="s"))
+    result = local.resample(rule, **kwargs).agg({"o": "first", "h": "max", "l": "min", "c": "last", "v": "sum"}).dropna()
+    return result.astype(dtype=dataframe.dtypes.drop("t").to_dict()).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("resolution, rule", [("5", "5min"), ("15", "15min"), ("30", "30min"), ("60", "60min"), ("240", "240min")])
+def test_intraday_matches_pandas(resolution, rule):
+    bars = minute_bars(days=3)
+    actual = resample(dataframe=bars, resolution=resolution)
+    expected = reference(bars, rule, origin=pandas.Timestamp("2024-01-01 09:00"))
+    pandas.testing.assert_frame_equal(actual.drop(columns="t"), expected)
+
+
+def test_four_hour_bars_start_at_session_open():
+    actual = resample(dataframe=minute_bars(days=1), resolution=Resolution.HOUR_4)
+    local = pandas.to_datetime(actual["t"] + 8 * 60 * 60, unit="s")
+    assert local.dt.strftime("%H:%M").to_list() == ["09:00", "13:00"]
+
+
+@pytest.mark.parametrize("resolution, rule", [("1W", "W-SUN"), ("1M", "MS"), ("3M", "QS"), ("6M", "2QS"), ("1Y", "YS")])
+def test_calendar_matches_pandas(resolution, rule):
+    bars = daily_bars(days=800)
+    actual = resample(dataframe=bars, resolution=resolution)
+    expected = reference(bars, rule)
+    pandas.testing.assert_frame_equal(actual.drop(columns="t"), expected)
+    assert (pandas.to_datetime(actual["t"], unit="s").dt.day_name() == "Monday").all() if resolution == "1W" else (pandas.to_datetime(actual["t"], unit="s").dt.day == 1).all()
+
+
+@patch.object(KLSEScreener, "fetch_json", autospec=True)
+def test_stock_derives_from_stored_bars(mock_fetch_json, tmp_path):
+    store = BarStore(path=tmp_path)
+    bars = daily_bars(days=70)
+    store.write(symbol="0001", resolution=Resolution.DAILY.value, dataframe=bars, stimestamp=START, etimestamp=START + 69 * DAY)
+    with patch.object(Stock, "store", store):
+        dataframe = Stock(code="0001").historical_data(resolution=Resolution.WEEKLY.value, stimestamp=START, etimestamp=START + 69 * DAY)
+    mock_fetch_json.assert_not_called()
+    assert len(dataframe) == 10
+    assert dataframe["Resolution"].eq("1W").all()
+    assert dataframe["v"].sum() == bars["v"].sum()
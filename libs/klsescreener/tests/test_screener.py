@@ -2,11 +2,18 @@
 
 # -*- coding: utf-8 -*-
 
+# Import standard libraries
+from unittest.mock import PropertyMock, patch
+import threading
+import time
+
 # Import third-party libraries
 import pandas
 import pytest
 
 # Import internal libraries
+from klsescreener.cache import SingleFlight
+from klsescreener.polling import BackoffPolicy
 from klsescreener import KLSEScreener
 
 
@@ -94,3 +101,168 @@ def test_get_markets(klsescreener):
     markets = klsescreener.get_markets()
     assert isinstance(markets, list)
     assert len(markets) == 4
+
+
+def dummy_screener():
+    return pandas.DataFrame(data={
+        "Code": ["5099", "0001", "1818"],
+        "Name": ["CAPITALA", "SCOMNET", "BURSA"],
+        "Category": ["Transportation", "Technology", "Financial Services"],
+        "Market": ["Main Market", "Ace Market", "Main Market"],
+    })
+
+
+def test_snapshot_shared_across_instances():
+    KLSEScreener.invalidate_snapshot()
+    with patch.object(KLSEScreener, "screener", return_value=dummy_screener()) as mock_screener:
+        assert KLSEScreener().get_stockcodes() == ["0001", "1818", "5099"]
+        assert KLSEScreener().get_stocknames() == ["BURSA", "CAPITALA", "SCOMNET"]
+        assert KLSEScreener().get_categories() == ["Financial Services", "Technology", "Transportation"]
+        assert KLSEScreener().get_markets() == ["Ace Market", "Main Market"]
+        assert mock_screener.call_count == 1
+        KLSEScreener.invalidate_snapshot()
+        KLSEScreener().get_markets()
+        assert mock_screener.call_count == 2
+    KLSEScreener.invalidate_snapshot()
+
+
+def test_snapshot_concurrent_misses_load_once():
+    KLSEScreener.invalidate_snapshot()
+
+    def slow_screener(self):
+        time.sleep(0.2)
+        return dummy_screener()
+
+    with patch.object(KLSEScreener, "screener", autospec=True, side_effect=slow_screener) as mock_screener:
+        threads = [threading.Thread(target=KLSEScreener().get_stockcodes) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert mock_screener.call_count == 1
+    KLSEScreener.invalidate_snapshot()
+
+
+def test_bursa_index(klsescreener):
+    """Test the bursa_index method."""
+    KLSEScreener.invalidate_bursa_index()
+    dataframe = klsescreener.bursa_index()
+    assert dataframe["Code"].to_list() == ["0200I", "0010I", "0300I"]
+    assert dataframe.columns.to_list() == ["Index", "Code", "Link", "Price", "Chart Link", "Open", "High", "Low", "Volume"]
+    assert dataframe.loc[0, "Open"] == "1608.20"
+    KLSEScreener.invalidate_bursa_index()
+
+
+def test_bursa_index_components_cache_components(klsescreener):
+    """Test that bursa_index_components caches the components but not the index prices."""
+    KLSEScreener.invalidate_bursa_index()
+    with patch.object(KLSEScreener, "fetch_text", autospec=True, side_effect=KLSEScreener.fetch_text) as mock_fetch_text, \
+            patch.object(KLSEScreener, "fetch_html", autospec=True, side_effect=KLSEScreener.fetch_html) as mock_fetch_html:
+        dataframe = klsescreener.bursa_index_components()
+        assert dataframe["Components"].to_list()[:2] == ["['MAYBANK', 'PBBANK', 'TENAGA']", "['PADINI', 'NESTLE', 'F&N']"]
+        assert pandas.isna(dataframe.loc[2, "Components"])
+        assert (mock_fetch_text.call_count, mock_fetch_html.call_count) == (2, 4)
+        # The prices are fetched again on every call, the components are not
+        again = KLSEScreener().bursa_index_components()
+        assert (mock_fetch_text.call_count, mock_fetch_html.call_count) == (3, 7)
+        pandas.testing.assert_frame_equal(again, dataframe)
+        klsescreener.bursa_index()
+        assert (mock_fetch_text.call_count, mock_fetch_html.call_count) == (4, 10)
+    KLSEScreener.invalidate_bursa_index()
+
+
+def test_post_process_dataframe(klsescreener):
+    raw = pandas.DataFrame(data={
+        ("Name", None): [("AAA", "/v2/stocks/view/0001"), ("-", None), ("BBB", "/v2/stocks/view/0002")],
+        ("Date", None): [("2025-01-02", None), ("-", None), ("2025-01-03", None)],
+        ("Amount", None): [("0.01", None), ("-", None), ("0.02", None)],
+        ("Type", None): [("Interim", None), ("-", None), ("Final", None)],
+        ("Remarks", None): [("Cash", None), ("-", None), ("Cash", None)],
+        ("", None): [("View", None), ("View", None), ("View", None)],
+    })
+    dataframe = klsescreener._post_process_dataframe(raw)
+    assert dataframe.columns.to_list() == ["index", "NameLink", "Name", "Date", "Amount", "Type", "Remarks"]
+    assert dataframe["index"].to_list() == [0, 2]
+    assert dataframe["NameLink"].to_list() == [f"{klsescreener.url[:-3]}/v2/stocks/view/0001", f"{klsescreener.url[:-3]}/v2/stocks/view/0002"]
+
+
+def test_count_unique_per_row():
+    dataframe = pandas.DataFrame(data={"a": [None, 1, "x"], "b": [float("nan"), 1.0, "x"], "c": [None, True, "y"]})
+    assert KLSEScreener._count_unique_per_row(dataframe).tolist() == [len(row.unique()) for _, row in dataframe.iterrows()]
+
+
+class FakeResponse:
+
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+class FakeTransport:
+    """Answers 202 for the first ``pending`` requests of every url, then the bars."""
+
+    def __init__(self, pending=0, delay=0.0):
+        self.pending = pending
+        self.delay = delay
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def get(self, url, headers=None, **kwargs):
+        if self.delay:
+            time.sleep(self.delay)
+        with self.lock:
+            self.requests.append(url)
+            count = self.requests.count(url)
+        if count <= self.pending:
+            return FakeResponse(status_code=202)
+        return FakeResponse(status_code=200, data={"s": "ok", "t": [1, 2], "c": [1.0, 2.0]})
+
+
+def test_fetch_json_coalesces_identical_requests():
+    transport = FakeTransport(delay=0.2)
+    with patch.object(KLSEScreener, "transport", new_callable=PropertyMock, return_value=transport), \
+            patch.object(KLSEScreener, "json_flight", SingleFlight()):
+        results = [None] * 8
+
+        def fetch(i):
+            results[i] = KLSEScreener().fetch_json(url="https://example.com/history?symbol=0001")
+
+        threads = [threading.Thread(target=fetch, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = KLSEScreener.fetch_json_stats()
+
+    assert len(transport.requests) == 1
+    assert stats["calls"] == 8 and stats["coalesced"] == 7
+    # Every caller gets its own frame
+    results[0].drop(columns=["c"], inplace=True)
+    assert all(result.columns.to_list() == ["s", "t", "c"] for result in results[1:])
+
+
+@patch("klsescreener.screener.time.sleep")
+def test_fetch_json_backoff(mock_sleep):
+    transport = FakeTransport(pending=3)
+    backoff = BackoffPolicy(initial=0.5, factor=2.0, maximum=1.5, jitter=0.0)
+    with patch.object(KLSEScreener, "transport", new_callable=PropertyMock, return_value=transport), \
+            patch.object(KLSEScreener, "backoff", backoff):
+        dataframe = KLSEScreener().fetch_json(url="https://example.com/history?symbol=0002")
+    assert dataframe["t"].to_list() == [1, 2]
+    assert [call.args[0] for call in mock_sleep.call_args_list] == [0.5, 1.0, 1.5]
+    assert backoff.stats()["polls"] == 3 and backoff.stats()["timeouts"] == 0
+    assert backoff.estimate is not None
+
+
+def test_fetch_json_deadline():
+    transport = FakeTransport(pending=1000)
+    backoff = BackoffPolicy(initial=0.05, maximum=0.05, deadline=0.2)
+    with patch.object(KLSEScreener, "transport", new_callable=PropertyMock, return_value=transport), \
+            patch.object(KLSEScreener, "backoff", backoff):
+        with pytest.raises(TimeoutError):
+            KLSEScreener().fetch_json(url="https://example.com/history?symbol=0003")
+    assert backoff.stats()["timeouts"] == 1
+    assert 3 <= len(transport.requests) <= 6
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import standard libraries
+from unittest.mock import patch
+import datetime
+
+# Import internal libraries
+from klsescreener.stats import StatsIndex, merge_stats, price_stats
+from klsescreener.stock import Stock
+from klsescreener import KLSEScreener
+from .bars import DAY, START, between, daily_bars
+
+
+def test_price_stats_matches_pandas():
+    dataframe = daily_bars(days=500, seed=0, newest_first=True)
+    stats = price_stats(dataframe=dataframe)
+    assert stats["ath_price"] == dataframe["h"].max()
+    assert stats["ath_t"] == dataframe[dataframe["h"] == dataframe["h"].max()]["t"].max()
+    assert stats["atl_price"] == dataframe["l"].min()
+    assert stats["atl_t"] == dataframe[dataframe["l"] == dataframe["l"].min()]["t"].max()
+    assert stats["listing_open_price"] == dataframe.iloc[-1]["o"]
+    assert (stats["first_t"], stats["last_t"]) == (START, START + 499 * DAY)
+    assert price_stats(dataframe=dataframe.iloc[0:0]) is None
+
+
+def test_merge_stats_with_overlap():
+    dataframe = daily_bars(days=300, seed=1, newest_first=True)
+    older, newer = dataframe.iloc[100:], dataframe.iloc[:101]
+    assert merge_stats(stats=price_stats(dataframe=older), update=price_stats(dataframe=newer)) == price_stats(dataframe=dataframe)
+
+
+def test_stats_index_incremental(tmp_path):
+    dataframe = daily_bars(days=200, seed=0, newest_first=True)
+    index = StatsIndex(path=tmp_path / "stats.json", max_age=DAY)
+    index.update(code="0001", dataframe=dataframe.iloc[50:], now=START)
+    index.update(code="0001", dataframe=dataframe.iloc[:51], now=START + 150 * DAY)
+
+    reloaded = StatsIndex(path=tmp_path / "stats.json", max_age=DAY)
+    assert reloaded.get(code="0001") == {**price_stats(dataframe=dataframe), "updated": START + 150 * DAY}
+    assert reloaded.is_fresh(code="0001", now=START + 150 * DAY + 60)
+    assert not reloaded.is_fresh(code="0001", now=START + 152 * DAY)
+    assert reloaded.to_frame().loc["0001", "ath_price"] == dataframe["h"].max()
+
+
+def test_stock_uses_stats_index(tmp_path):
+    stats_index = StatsIndex(path=tmp_path / "stats.json")
+    calls = []
+
+    def historical_data_1D(self, stimestamp, etimestamp):
+        calls.append(stimestamp)
+        return between(dataframe=daily_bars(days=100, seed=0, newest_first=True), stimestamp=stimestamp, etimestamp=etimestamp)
+
+    with patch.object(Stock, "stats_index", stats_index), \
+            patch.object(Stock, "get_listing_date", return_value=START) as mock_get_listing_date, \
+            patch.object(Stock, "historical_data_1D", autospec=True, side_effect=historical_data_1D):
+        first = Stock(code="0001")
+        assert first.listed_days == (first.cdt - datetime.datetime(2024, 1, 1, 8)).days
+        second = Stock(code="0001")
+        assert second.ath_price == first.ath_price and second.atl_date == first.atl_date
+        assert second.listing_timestamp == START
+        assert calls == [START]
+        assert mock_get_listing_date.call_count == 1
+
+        # A stale entry only asks for the bars since the last stored one
+        stats_index.max_age = 0
+        third = Stock(code="0001")
+        assert third.last_traded_date == datetime.date(2024, 4, 9)
+        assert calls == [START, START + 99 * DAY]
+
+
+def test_fresh_stats_index_entry_needs_no_history(tmp_path):
+    stats_index = StatsIndex(path=tmp_path / "stats.json")
+    stats_index.update(code="1818", dataframe=daily_bars(days=100, seed=0, newest_first=True), listing_timestamp=START)
+    with patch.object(Stock, "stats_index", stats_index), \
+            patch.object(KLSEScreener, "fetch_json", side_effect=AssertionError("history requested")):
+        stock = Stock(code="1818")
+        info = stock.info(transpose=True, extended_info=True).iloc[0]
+    assert (stock.listing_timestamp, stock.listing_datetime) == (START, datetime.datetime.fromtimestamp(START))
+    assert info["Listed Date"] == str(datetime.datetime.fromtimestamp(START).date())
+    assert info["All Time High"] == stats_index.get(code="1818")["ath_price"]
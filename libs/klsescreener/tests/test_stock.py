@@ -5,13 +5,15 @@
 # Import standard libraries
 from unittest.mock import patch
 import datetime
+import logging
+import asyncio
 
 # Import third-party libraries
 import pandas
 import pytest
 
 # Import internal libraries
-from klsescreener.stock import Stock, generate_dashboard
+from klsescreener.stock import DashboardState, Stock, generate_dashboard, generate_dashboard_async, iter_dashboard, merge_dashboard, refresh_dashboard
 from klsescreener import KLSEScreener
 
 
@@ -173,3 +175,153 @@ def test_generate_dashboard(mock_cls):
     assert dataframe.shape[0] == 1
     assert list(dataframe["Code"]) == [stockcode()]
     assert len(dataframe.columns) > len(dummy_dataframe.columns)
+
+
+def dummy_daily_bars():
+    dataframe = pandas.DataFrame(data={
+        "t": [1704326400, 1704240000, 1704153600],
+        "o": [1.2, 1.1, 1.0],
+        "h": [1.3, 1.5, 1.1],
+        "l": [1.1, 1.0, 0.9],
+        "c": [1.25, 1.2, 1.05],
+        "v": [300, 200, 100],
+    })
+    dataframe.insert(loc=0, column="d", value=pandas.to_datetime(dataframe["t"], unit="s") + pandas.to_timedelta("8 hours"))
+    dataframe.insert(loc=0, column="Date", value=dataframe["d"].dt.date)
+    return dataframe
+
+
+@patch.object(KLSEScreener, "fetch_json", side_effect=AssertionError("Unexpected network access"))
+@patch.object(KLSEScreener, "fetch_text", side_effect=AssertionError("Unexpected network access"))
+def test_lazy_construction(mock_fetch_text, mock_fetch_json):
+    stock = Stock(code=1818)
+    assert stock.code == "1818"
+    assert stock.code_url.endswith("/stocks/view/1818")
+    mock_fetch_text.assert_not_called()
+    mock_fetch_json.assert_not_called()
+
+
+def test_prefetch_loads_once():
+    with patch.object(Stock, "get_listing_date", return_value=1704153600) as mock_listing, \
+            patch.object(Stock, "historical_data_1D", return_value=dummy_daily_bars()) as mock_history:
+        stock = Stock(code="1818").prefetch(fields=["ath_price", "ath_date", "atl_price", "listing_open_price"])
+        assert stock.ath_price == 1.5
+        assert stock.ath_date == datetime.date(2024, 1, 3)
+        assert stock.atl_price == 0.9
+        assert stock.listing_open_price == 1.0
+        assert stock.last_traded_date == datetime.date(2024, 1, 4)
+        assert mock_listing.call_count == 1
+        assert mock_history.call_count == 1
+    with pytest.raises(ValueError):
+        stock.prefetch(fields=["unknown"])
+
+
+def dummy_info(self, extended_info=False):
+    return pandas.DataFrame(data=[["Price", f"1.{self.code}"], ["Long Name", f"STOCK {self.code}"], ["Listed Days", 10], ["Last Trading Date", datetime.date(2025, 12, 31)]])
+
+
+@patch.object(Stock, "prefetch", autospec=True, side_effect=lambda self, fields=None: self)
+@patch.object(Stock, "info", autospec=True, side_effect=dummy_info)
+@patch("klsescreener.stock.KLSEScreener")
+def test_generate_dashboard_async_matches_threaded(mock_cls, mock_info, mock_prefetch, caplog):
+    screener = pandas.DataFrame(data={"Code": ["0001", "1818", "5099"], "Name": ["A", "B", "C"]})
+    mock_cls.return_value.screener.side_effect = lambda: screener.copy()
+
+    threaded = generate_dashboard(thread_count=2)
+    asynchronous = asyncio.run(generate_dashboard_async(concurrency=8))
+
+    pandas.testing.assert_frame_equal(threaded, asynchronous)
+    # The default concurrency fits the default transport
+    with caplog.at_level(logging.WARNING):
+        pandas.testing.assert_frame_equal(asyncio.run(generate_dashboard_async()), asynchronous)
+    assert not [record for record in caplog.records if "concurrency" in record.getMessage()]
+    assert asynchronous["Long Name"].to_list() == ["STOCK 0001", "STOCK 1818", "STOCK 5099"]
+
+
+@patch.object(Stock, "info", autospec=True, side_effect=dummy_info)
+def test_iter_dashboard_resumes_from_checkpoint(mock_info, tmp_path):
+    screener = pandas.DataFrame(data={"Code": ["0001", "1818", "5099"], "Name": ["A", "B", "C"]})
+    checkpoint = tmp_path / "dashboard.jsonl"
+
+    rows = iter_dashboard(dataframe=screener, thread_count=1, checkpoint=checkpoint)
+    first = next(rows)
+    rows.close()
+    assert mock_info.call_count >= 1
+    assert checkpoint.read_text().count("\n") == 1
+
+    mock_info.reset_mock()
+    rows = list(iter_dashboard(dataframe=screener, thread_count=2, checkpoint=checkpoint))
+    assert rows[0] == first
+    assert sorted(row["Code"] for row in rows) == ["0001", "1818", "5099"]
+    assert mock_info.call_count == 2
+
+    # A resumed run builds the same dashboard as a fresh one
+    fresh = list(iter_dashboard(dataframe=screener, thread_count=2))
+    pandas.testing.assert_frame_equal(merge_dashboard(dataframe=screener, rows=rows), merge_dashboard(dataframe=screener, rows=fresh))
+
+
+def failing_info(self, extended_info=False):
+    if self.code == "1818":
+        raise ValueError("Broken stock page")
+    return dummy_info(self, extended_info=extended_info)
+
+
+@patch.object(Stock, "info", autospec=True, side_effect=failing_info)
+@patch("klsescreener.stock.KLSEScreener")
+def test_generate_dashboard_skips_failed_stock(mock_cls, mock_info):
+    mock_cls.return_value.screener.return_value = pandas.DataFrame(data={"Code": ["0001", "1818", "5099"], "Name": ["A", "B", "C"]})
+    dataframe = generate_dashboard(thread_count=2)
+    assert dataframe["Code"].to_list() == ["0001", "1818", "5099"]
+    assert dataframe["Long Name"].isna().to_list() == [False, True, False]
+
+
+@patch.object(Stock, "historical_data")
+def test_historical_data_defaults_at_call_time(mock_historical_data):
+    """Test that the default time range ends when the call is made."""
+    stock = Stock(code=stockcode())
+    now = datetime.datetime(2030, 1, 1)
+    with patch("klsescreener.stock.datetime.datetime") as mock_datetime:
+        mock_datetime.now.return_value = now
+        stock.historical_data_1D()
+    kwargs = mock_historical_data.call_args.kwargs
+    assert kwargs["etimestamp"] == int(now.timestamp())
+    assert kwargs["stimestamp"] == int((now - datetime.timedelta(days=360)).timestamp())
+    stock.historical_data_1W(stimestamp=1, etimestamp=2)
+    assert (mock_historical_data.call_args.kwargs["stimestamp"], mock_historical_data.call_args.kwargs["etimestamp"]) == (1, 2)
+
+
+def fake_dashboard_row(code, stock=None):
+    return {"Code": code, "Long Name": f"Stock {code}", "All Time High": 1000.0, "All Time Low": 0.001, "Listed Days": 100, "Price": -1.0}
+
+
+@patch("klsescreener.stock.dashboard_row", side_effect=fake_dashboard_row)
+def test_refresh_dashboard_enriches_changed_codes(mock_dashboard_row, tmp_path):
+    """Test that an incremental refresh only enriches the stocks that changed."""
+    path = tmp_path / "dashboard"
+    full = refresh_dashboard(path=path, thread_count=4)
+    codes = KLSEScreener().screener()["Code"].astype(str).to_list()
+    assert mock_dashboard_row.call_count == len(codes)
+    assert full["Long Name"].notna().all()
+    assert sorted(file.name for file in path.iterdir()) == ["rows.jsonl", "screener.parquet", "state.json"]
+
+    mock_dashboard_row.reset_mock()
+    again = refresh_dashboard(path=path, thread_count=4)
+    assert mock_dashboard_row.call_count == 0
+    # Carried rows take today's screener values over the enriched ones
+    pandas.testing.assert_frame_equal(again.drop(columns="Price"), full.drop(columns="Price"))
+    assert (full["Price"] == -1.0).all()
+    assert again["Price"].to_list() == KLSEScreener().screener()["Price"].to_list()
+
+    state = DashboardState(path=path)
+    state.date = state.date - datetime.timedelta(days=2)
+    # BURSA has a new dividend, MAYBANK trades above its all time high and PBBANK failed last time
+    state.events["recent_dividends"] = {key: code for key, code in list(state.events["recent_dividends"].items())[1:]}
+    state.rows["1155"]["All Time High"] = 5.0
+    state.pending = {"1295"}
+    state.save()
+    refreshed = refresh_dashboard(path=path, thread_count=4)
+    enriched = sorted(str(call.args[0]) for call in mock_dashboard_row.call_args_list)
+    assert enriched == sorted({"1818", "1155", "1295"})
+    carried = refreshed[~refreshed["Code"].astype(str).isin(enriched)]
+    assert (carried["Listed Days"] == 102).all()
+    assert DashboardState(path=path).pending == set()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import standard libraries
+from unittest.mock import patch
+
+# Import third-party libraries
+import pandas
+import pytest
+
+# Import internal libraries
+from klsescreener.store import BarStore, merge_intervals
+from klsescreener.stock import Stock
+from klsescreener import KLSEScreener
+from .bars import DAY, START, between, daily_bars
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Fixture to create an empty BarStore."""
+    return BarStore(path=tmp_path)
+
+
+def test_merge_intervals():
+    assert merge_intervals([[5, 8], [1, 3], [3, 4], [10, 12]]) == [[1, 4], [5, 8], [10, 12]]
+
+
+def test_fetches_only_gaps(store):
+    calls = []
+
+    def fetch(start, end):
+        calls.append((start, end))
+        return between(dataframe=daily_bars(days=100), stimestamp=start, etimestamp=end)
+
+    first = store.fetch(symbol="1818", resolution="1D", stimestamp=START + 10 * DAY, etimestamp=START + 20 * DAY, fetch=fetch)
+    assert len(first) == 11
+    again = store.fetch(symbol="1818", resolution="1D", stimestamp=START + 12 * DAY, etimestamp=START + 18 * DAY, fetch=fetch)
+    assert len(again) == 7
+    assert len(calls) == 1
+
+    wider = store.fetch(symbol="1818", resolution="1D", stimestamp=START, etimestamp=START + 30 * DAY, fetch=fetch)
+    assert calls[1:] == [(START, START + 10 * DAY), (START + 20 * DAY, START + 30 * DAY)]
+    assert wider["t"].is_unique
+    assert len(wider) == 31
+
+
+def test_stock_historical_data_uses_store(store):
+    raw = between(dataframe=daily_bars(days=100), stimestamp=START, etimestamp=START + 5 * DAY)
+    for column, value in {"s": "ok", "from": 0, "to": 0, "exact_from": 0, "server": "", "ip": "", "qt": 0}.items():
+        raw[column] = value
+    with patch.object(Stock, "store", store), patch.object(KLSEScreener, "fetch_json", side_effect=lambda url: raw.copy()) as mock_fetch_json:
+        stock = Stock(code="1818")
+        first = stock.historical_data(resolution="1D", stimestamp=START, etimestamp=START + 5 * DAY)
+        second = stock.historical_data(resolution="1D", stimestamp=START, etimestamp=START + 5 * DAY)
+        assert mock_fetch_json.call_count == 1
+    pandas.testing.assert_frame_equal(first, second)
+    assert first["t"].to_list() == sorted(raw["t"].to_list(), reverse=True)
+
+
+def test_countback_bypasses_store(store):
+    raw = between(dataframe=daily_bars(days=100), stimestamp=START, etimestamp=START + 5 * DAY)
+    for column, value in {"s": "ok", "from": 0, "to": 0, "exact_from": 0, "server": "", "ip": "", "qt": 0}.items():
+        raw[column] = value
+
+    def fetch_json(url):
+        # The endpoint only returns the newest ``countback`` bars of the range
+        countback = int(url.split("countback=")[1].split("&")[0])
+        return raw.tail(countback).reset_index(drop=True)
+
+    with patch.object(Stock, "store", store), patch.object(KLSEScreener, "fetch_json", side_effect=fetch_json) as mock_fetch_json:
+        stock = Stock(code="1818")
+        assert len(stock.historical_data(resolution="1D", stimestamp=START, etimestamp=START + 5 * DAY, countback=2)) == 2
+        assert store.coverage(symbol="1818", resolution="1D") == []
+        assert len(stock.historical_data(resolution="1D", stimestamp=START, etimestamp=START + 5 * DAY)) == 6
+        assert mock_fetch_json.call_count == 2
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import standard libraries
+from io import StringIO
+
+# Import third-party libraries
+import pandas
+import pytest
+
+# Import internal libraries
+from klsescreener.tables import parse_document, read_tables
+
+
+HTML = """
+<html><body>
+<div><h2>Stock</h2><span>Long name<br>second line</span></div>
+<table><tr><td></td></tr></table>
+<table>
+  <thead><tr><th>Financial Year</th><th>Revenue</th><th>Announced</th></tr></thead>
+  <tbody>
+    <tr><td><a href="/v2/reports/1">2024</a></td><td>1,200</td><td>2024-05-30</td></tr>
+    <tr><td rowspan="2">2025</td><td>1,350.5</td><td>2025-05-29</td></tr>
+    <tr><td>-</td><td style="display: none">hidden</td><td>2025-08-28</td></tr>
+  </tbody>
+</table>
+<table>
+  <tr><th colspan="2">Ratio</th><th>Date</th></tr>
+  <tr><td>1</td><td>2</td><td><a href="/v2/capital/9">2023-01-01</a></td></tr>
+  <tr><td colspan="3">N/A</td></tr>
+</table>
+<table style="display:none"><tr><th>Ratio</th></tr><tr><td>hidden</td></tr></table>
+<table>
+  <tr><th>Date Change</th><th>Shares</th></tr>
+  <tr><td>2025-01-02</td><td>5,000</td></tr>
+  <tfoot><tr><td>Total</td><td>5,000</td></tr></tfoot>
+</table>
+</body></html>
+"""
+
+
+@pytest.mark.parametrize("match", [".+", "Financial Year", "Ratio", "Date Change"])
+@pytest.mark.parametrize("extract_links", [None, "all", "body"])
+def test_same_as_read_html(match, extract_links):
+    expected = pandas.read_html(StringIO(HTML), match=match, extract_links=extract_links)
+    actual = read_tables(document=HTML, match=match, extract_links=extract_links)
+    assert len(actual) == len(expected)
+    for left, right in zip(actual, expected):
+        pandas.testing.assert_frame_equal(left, right)
+
+
+@pytest.mark.parametrize("index", [0, 1, -1, -2, slice(1, None)])
+def test_index_selection(index):
+    expected = pandas.read_html(StringIO(HTML), extract_links="all")
+    expected = expected[index] if isinstance(index, slice) else [expected[index]]
+    actual = read_tables(document=parse_document(text=HTML), extract_links="all", index=index)
+    assert len(actual) == len(expected)
+    for left, right in zip(actual, expected):
+        pandas.testing.assert_frame_equal(left, right)
+
+
+def test_header_signature():
+    dataframes = read_tables(document=HTML, header=["Announced", "Revenue"])
+    assert len(dataframes) == 1
+    assert dataframes[0].columns.to_list() == ["Financial Year", "Revenue", "Announced"]
+
+
+def test_no_match():
+    with pytest.raises(ValueError):
+        read_tables(document=HTML, match="Nothing like this")
@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import standard libraries
+import threading
+import warnings
+
+# Import internal libraries
+from klsescreener.transport import Transport
+
+
+def test_connections_are_reused(server):
+    transport = Transport(pool_maxsize=2)
+    for _ in range(5):
+        response = transport.get(url=f"{server.url}/page")
+        assert response.status_code == 200
+    stats = transport.stats()
+    assert stats["requests"] == 5
+    assert stats["new_connections"] == 1
+    assert stats["reused_connections"] == 4
+    transport.close()
+
+
+def test_sessions_are_per_thread(server):
+    transport = Transport()
+    sessions = []
+    thread = threading.Thread(target=lambda: sessions.append(transport.session))
+    thread.start()
+    thread.join()
+    assert sessions[0] is not transport.session
+    transport.close()
+
+
+def test_transports_leave_warning_filters_alone():
+    filters = list(warnings.filters)
+    for _ in range(3):
+        Transport().close()
+    assert warnings.filters == filters
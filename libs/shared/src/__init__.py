@@ -3,4 +3,5 @@
 # -*- coding: utf-8 -*-
 
 from .decorators import performance
+from .metrics import Metrics, metrics, span
 from .logger import get_logger
@@ -3,22 +3,75 @@
 # -*- coding: utf-8 -*-
 
 # Import standard libraries
-from datetime import datetime
 import functools
+import inspect
 import logging
+import time
+import os
 
+# Import internal libraries
+from shared.metrics import _current_span, metrics
 
-def performance(log=logging.debug):
+
+# Profiler of shared.profiling, which is only imported once profiling is enabled
+profiler = None
+
+
+def performance(log=logging.debug, registry=metrics):
     def decorator(func):
         """Decorator to measure the performance of a function.
+
+        Every call is timed with ``time.perf_counter_ns`` as a span nested in the calling one
+        and recorded in ``registry``, then the elapsed time is sent to ``log``. The call is also
+        profiled when ``shared.profiling`` selects the function.
         """
+        name = func.__qualname__
+
+        def start():
+            parent = _current_span.get()
+            active = profiler
+            handle = None if active is None else active.enter(func)
+            return _current_span.set(name if parent is None else f"{parent} > {name}"), (active, handle), time.perf_counter_ns()
+
+        def finish(token, profile, stime, error):
+            elapsed_ns = time.perf_counter_ns() - stime
+            path = _current_span.get()
+            _current_span.reset(token)
+            if profile[1] is not None:
+                profile[0].exit(profile[1])
+            if registry.enabled is True:
+                registry.observe(name=name, path=path, duration_ns=elapsed_ns, error=error)
+            # Skip formatting the message when debug logging is off
+            if error is False and (log is not logging.debug or logging.root.isEnabledFor(logging.DEBUG)):
+                log(f"Elapsed time {elapsed_ns / 1e9} seconds on function \"{func.__name__}\".")
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                token, profile, stime = start()
+                error = True
+                try:
+                    result = await func(*args, **kwargs)
+                    error = False
+                    return result
+                finally:
+                    finish(token=token, profile=profile, stime=stime, error=error)
+            return async_wrapper
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            stime = datetime.now()
-            args = func(*args, **kwargs)
-            etime = datetime.now()
-            elapsed_time = etime - stime
-            log(f"Elapsed time {elapsed_time.total_seconds()} seconds on function \"{func.__name__}\".")
-            return args
+            token, profile, stime = start()
+            error = True
+            try:
+                result = func(*args, **kwargs)
+                error = False
+                return result
+            finally:
+                finish(token=token, profile=profile, stime=stime, error=error)
         return wrapper
     return decorator
+
+
+if os.environ.get("MYSTOCKTRADE_PROFILE"):
+    from shared import profiling
+    profiling.enable_from_env()
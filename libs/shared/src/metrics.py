@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import standard libraries
+from bisect import bisect_left
+import contextlib
+import contextvars
+import threading
+import time
+import json
+
+
+# Upper bounds of the latency histogram buckets, in seconds
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+_BUCKETS_NS = tuple(int(bound * 1e9) for bound in BUCKETS)
+
+# Path of the innermost running span, e.g. "get_stockcodes > screener > fetch_html"
+_current_span = contextvars.ContextVar("span", default=None)
+
+
+class Histogram:
+    """Latency histogram with fixed buckets, plus call and error counts.
+    """
+
+    __slots__ = ["counts", "count", "errors", "sum_ns", "min_ns", "max_ns"]
+
+    def __init__(self):
+        self.counts = [0] * (len(_BUCKETS_NS) + 1)
+        self.count = 0
+        self.errors = 0
+        self.sum_ns = 0
+        self.min_ns = None
+        self.max_ns = 0
+
+    def observe(self, duration_ns: int, error: bool = False):
+        self.counts[bisect_left(_BUCKETS_NS, duration_ns)] += 1
+        self.count += 1
+        self.sum_ns += duration_ns
+        self.min_ns = duration_ns if self.min_ns is None else min(self.min_ns, duration_ns)
+        self.max_ns = max(self.max_ns, duration_ns)
+        if error is True:
+            self.errors += 1
+
+    def quantile(self, q: float) -> float:
+        """Upper bound in seconds of the bucket holding the ``q`` quantile, capped by the slowest call.
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return min(bound, self.max_ns / 1e9)
+        return self.max_ns / 1e9
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.count,
+            "errors": self.errors,
+            "sum_seconds": self.sum_ns / 1e9,
+            "mean_seconds": self.sum_ns / self.count / 1e9 if self.count else 0.0,
+            "min_seconds": (self.min_ns or 0) / 1e9,
+            "max_seconds": self.max_ns / 1e9,
+            "p50_seconds": self.quantile(0.5),
+            "p95_seconds": self.quantile(0.95),
+            "p99_seconds": self.quantile(0.99),
+            "buckets": {str(bound): count for bound, count in zip((*BUCKETS, "+Inf"), self.counts)},
+        }
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(labels: dict) -> str:
+    return "{" + ",".join(f"{key}=\"{_escape(value)}\"" for key, value in labels.items()) + "}" if labels else ""
+
+
+class Metrics:
+    """Process-wide registry of function latencies, nested span timings and counters.
+
+    Function latencies are keyed by function name, span timings by the path of nested spans
+    so that parent and child timings can be told apart, and counters by name and labels.
+    """
+
+    def __init__(self, namespace: str = "mystocktrade"):
+        self.namespace = namespace
+        self.enabled = True
+        self._functions = {}
+        self._spans = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, path: str, duration_ns: int, error: bool = False):
+        """Record one call of ``name`` that ran as span ``path``.
+        """
+        with self._lock:
+            histogram = self._functions.get(name)
+            if histogram is None:
+                histogram = self._functions[name] = Histogram()
+            histogram.observe(duration_ns=duration_ns, error=error)
+            span = self._spans.get(path)
+            if span is None:
+                span = self._spans[path] = Histogram()
+            span.observe(duration_ns=duration_ns, error=error)
+
+    def count(self, name: str, value: int | float = 1, **labels):
+        """Add ``value`` to the counter ``name`` with the given labels, e.g. ``count("cache_hits", cache="document")``.
+        """
+        if self.enabled is False:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def counter(self, name: str, **labels) -> int | float:
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def function(self, name: str) -> dict | None:
+        with self._lock:
+            histogram = self._functions.get(name)
+            return None if histogram is None else histogram.to_dict()
+
+    def reset(self):
+        with self._lock:
+            self._functions.clear()
+            self._spans.clear()
+            self._counters.clear()
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "functions": {name: histogram.to_dict() for name, histogram in self._functions.items()},
+                "spans": {path: {"calls": span.count, "errors": span.errors, "sum_seconds": span.sum_ns / 1e9} for path, span in self._spans.items()},
+                "counters": [{"name": name, "labels": dict(labels), "value": value} for (name, labels), value in self._counters.items()],
+            }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_prometheus(self) -> str:
+        """Export every metric in the Prometheus text exposition format.
+        """
+        prefix = self.namespace
+        lines = [f"# TYPE {prefix}_function_duration_seconds histogram"]
+        with self._lock:
+            functions = list(self._functions.items())
+            spans = list(self._spans.items())
+            counters = list(self._counters.items())
+        for name, histogram in functions:
+            cumulative = 0
+            for bound, count in zip((*BUCKETS, "+Inf"), histogram.counts):
+                cumulative += count
+                lines.append(f"{prefix}_function_duration_seconds_bucket{_labels({'function': name, 'le': bound})} {cumulative}")
+            lines.append(f"{prefix}_function_duration_seconds_sum{_labels({'function': name})} {histogram.sum_ns / 1e9}")
+            lines.append(f"{prefix}_function_duration_seconds_count{_labels({'function': name})} {histogram.count}")
+        lines.append(f"# TYPE {prefix}_function_errors_total counter")
+        lines.extend(f"{prefix}_function_errors_total{_labels({'function': name})} {histogram.errors}" for name, histogram in functions)
+        lines.append(f"# TYPE {prefix}_span_duration_seconds summary")
+        for path, span in spans:
+            lines.append(f"{prefix}_span_duration_seconds_sum{_labels({'path': path})} {span.sum_ns / 1e9}")
+            lines.append(f"{prefix}_span_duration_seconds_count{_labels({'path': path})} {span.count}")
+        for name in dict.fromkeys(name for (name, _), _ in counters):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.extend(f"{prefix}_{name}_total{_labels(dict(labels))} {value}" for (counter_name, labels), value in counters if counter_name == name)
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+def current_span() -> str | None:
+    """Return the path of the innermost running span.
+    """
+    return _current_span.get()
+
+
+@contextlib.contextmanager
+def span(name: str, registry: Metrics = metrics):
+    """Time a block as a span nested in the current one.
+    """
+    parent = _current_span.get()
+    token = _current_span.set(name if parent is None else f"{parent} > {name}")
+    error = False
+    start = time.perf_counter_ns()
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        duration_ns = time.perf_counter_ns() - start
+        path = _current_span.get()
+        _current_span.reset(token)
+        if registry.enabled is True:
+            registry.observe(name=name, path=path, duration_ns=duration_ns, error=error)
@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+"""On-demand profiling of ``@performance`` decorated functions.
+
+This module is only imported when profiling is enabled, either through the environment
+
+    MYSTOCKTRADE_PROFILE=fetch_html,screener    # comma separated function names, or "*" for all
+    MYSTOCKTRADE_PROFILE_MODE=sampling          # "deterministic" (default) or "sampling"
+    MYSTOCKTRADE_PROFILE_INTERVAL=0.005         # seconds between samples
+    MYSTOCKTRADE_PROFILE_DIR=profiles           # where the profiles are dumped at exit
+
+or through ``enable``/``disable``/``profile``. Deterministic profiles are collected with
+``cProfile`` and dumped as ``<function>.pstats``; sampling profiles are collected by a
+background thread reading the stack of every thread running a selected function and dumped
+as ``<function>.collapsed`` stacks for flamegraph.pl or speedscope. Both are aggregated per
+function across threads.
+"""
+
+# Import standard libraries
+from collections import Counter
+import contextlib
+import threading
+import cProfile
+import pathlib
+import logging
+import atexit
+import pstats
+import sys
+import os
+import re
+
+# Import internal libraries
+from shared import decorators
+
+
+MODES = ("deterministic", "sampling")
+
+
+def _filename(name: str) -> str:
+    return re.sub(r"[^\w.-]", "_", name)
+
+
+class Profiler:
+    """Profile the calls of the ``@performance`` decorated functions named in ``functions``.
+
+    A name matches a function by qualified name or plain name, ``"*"`` matches every function.
+    Calls nested in a call that is already being profiled in the same thread are part of the
+    outer profile. ``cProfile`` can only run one profile at a time since Python 3.12, so in
+    deterministic mode calls made while another thread is being profiled are skipped; prefer
+    the sampling mode for functions run in thread pools.
+    """
+
+    def __init__(self, functions: str | list = "*", mode: str = "deterministic", interval: float = 0.005, output: str | os.PathLike | None = None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode \"{mode}\", expected one of {MODES}.")
+        self.functions = {name.strip() for name in (functions.split(",") if isinstance(functions, str) else functions) if name.strip()}
+        self.mode = mode
+        self.interval = interval
+        self.output = None if output is None else pathlib.Path(output)
+        self.skipped = 0
+        self._matches = {}
+        self._stats = {}
+        self._stacks = {}
+        self._active = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._sampler = None
+
+    def matches(self, func) -> bool:
+        matched = self._matches.get(func)
+        if matched is None:
+            matched = self._matches[func] = "*" in self.functions or func.__qualname__ in self.functions or func.__name__ in self.functions
+        return matched
+
+    def start(self):
+        if self.mode == "sampling" and self._sampler is None:
+            self._stopped.clear()
+            self._sampler = threading.Thread(target=self._sample, name="profiler-sampler", daemon=True)
+            self._sampler.start()
+
+    def stop(self):
+        if self._sampler is not None:
+            self._stopped.set()
+            self._sampler.join()
+            self._sampler = None
+
+    def enter(self, func):
+        """Start profiling a call of ``func``, returning the handle to pass to ``exit`` or None.
+        """
+        if not self.matches(func):
+            return None
+        if self.mode == "sampling":
+            ident = threading.get_ident()
+            with self._lock:
+                if ident in self._active:
+                    return None
+                self._active[ident] = func
+            return func, ident
+        if getattr(self._local, "profile", None) is not None:
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another thread is being profiled
+            with self._lock:
+                self.skipped += 1
+            return None
+        self._local.profile = profile
+        return func, profile
+
+    def exit(self, handle):
+        func, value = handle
+        if self.mode == "sampling":
+            with self._lock:
+                self._active.pop(value, None)
+            return
+        value.disable()
+        self._local.profile = None
+        with self._lock:
+            stats = self._stats.get(func.__qualname__)
+            if stats is None:
+                self._stats[func.__qualname__] = pstats.Stats(value)
+            else:
+                stats.add(value)
+
+    def _sample(self):
+        while not self._stopped.wait(self.interval):
+            with self._lock:
+                active = list(self._active.items())
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for ident, func in active:
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    if code is func.__code__:
+                        break
+                    frame = frame.f_back
+                # Skip samples taken in the decorator, just before or after the function runs
+                if frame is not None:
+                    with self._lock:
+                        self._stacks.setdefault(func.__qualname__, Counter())[";".join(reversed(stack))] += 1
+
+    def stats(self, name: str) -> pstats.Stats | None:
+        """Return the aggregated deterministic profile of the function with qualified name ``name``.
+        """
+        with self._lock:
+            return self._stats.get(name)
+
+    def stacks(self, name: str) -> Counter:
+        """Return the sample count of every collapsed stack of the function with qualified name ``name``.
+        """
+        with self._lock:
+            return Counter(self._stacks.get(name, {}))
+
+    def dump(self, directory: str | os.PathLike) -> list:
+        """Write one ``.pstats`` or ``.collapsed`` file per profiled function into ``directory``.
+        """
+        directory = pathlib.Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        paths = []
+        with self._lock:
+            for name, stats in self._stats.items():
+                path = directory / f"{_filename(name)}.pstats"
+                stats.dump_stats(path)
+                paths.append(path)
+            for name, stacks in self._stacks.items():
+                path = directory / f"{_filename(name)}.collapsed"
+                path.write_text("".join(f"{stack} {count}\n" for stack, count in stacks.most_common()))
+                paths.append(path)
+        logging.debug(f"Dumped {len(paths)} profiles to {directory}.")
+        return paths
+
+
+def enable(functions: str | list = "*", mode: str = "deterministic", interval: float = 0.005, output: str | os.PathLike | None = None) -> Profiler:
+    """Start profiling the selected ``@performance`` decorated functions, replacing any running profiler.
+    """
+    disable()
+    profiler = Profiler(functions=functions, mode=mode, interval=interval, output=output)
+    profiler.start()
+    decorators.profiler = profiler
+    return profiler
+
+
+def disable() -> Profiler | None:
+    """Stop profiling, dump the profiles to the output directory if any and return the profiler.
+    """
+    profiler, decorators.profiler = decorators.profiler, None
+    if profiler is not None:
+        profiler.stop()
+        if profiler.output is not None:
+            profiler.dump(directory=profiler.output)
+    return profiler
+
+
+@contextlib.contextmanager
+def profile(functions: str | list = "*", mode: str = "deterministic", interval: float = 0.005, output: str | os.PathLike | None = None):
+    """Profile the selected functions while the block runs.
+    """
+    profiler = enable(functions=functions, mode=mode, interval=interval, output=output)
+    try:
+        yield profiler
+    finally:
+        disable()
+
+
+def enable_from_env() -> Profiler | None:
+    """Enable profiling from the ``MYSTOCKTRADE_PROFILE*`` environment variables and dump it at exit.
+    """
+    functions = os.environ.get("MYSTOCKTRADE_PROFILE", "").strip()
+    if not functions:
+        return None
+    profiler = enable(
+        functions=functions,
+        mode=os.environ.get("MYSTOCKTRADE_PROFILE_MODE", "deterministic").strip(),
+        interval=float(os.environ.get("MYSTOCKTRADE_PROFILE_INTERVAL", 0.005)),
+        output=os.environ.get("MYSTOCKTRADE_PROFILE_DIR", "profiles").strip(),
+    )
+    atexit.register(disable)
+    return profiler
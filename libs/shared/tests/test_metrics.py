@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import standard libraries
+import asyncio
+import json
+import time
+
+# Import third-party libraries
+import pytest
+
+# Import internal libraries
+from shared.decorators import performance
+from shared.metrics import Metrics, span
+
+
+@pytest.fixture
+def registry():
+    """Fixture to create an empty metrics registry."""
+    return Metrics(namespace="test")
+
+
+def test_nested_spans(registry):
+
+    @performance(registry=registry)
+    def fetch():
+        time.sleep(0.001)
+
+    @performance(registry=registry)
+    def screener():
+        fetch()
+        fetch()
+
+    @performance(registry=registry)
+    def get_stockcodes():
+        screener()
+
+    get_stockcodes()
+    fetch()
+    metrics = registry.to_dict()
+    spans = {path.replace("test_nested_spans.<locals>.", ""): value["calls"] for path, value in metrics["spans"].items()}
+    assert spans == {"get_stockcodes > screener > fetch": 2, "get_stockcodes > screener": 1, "get_stockcodes": 1, "fetch": 1}
+    fetch_metrics = next(value for name, value in metrics["functions"].items() if name.endswith("fetch"))
+    assert fetch_metrics["calls"] == 3
+    assert fetch_metrics["min_seconds"] >= 0.001
+    assert metrics["functions"][get_stockcodes.__qualname__]["sum_seconds"] >= 0.002
+
+
+def test_errors_and_async(registry):
+
+    @performance(registry=registry)
+    def failing():
+        raise ValueError("boom")
+
+    @performance(registry=registry)
+    async def waiting():
+        with span(name="inner", registry=registry):
+            await asyncio.sleep(0.001)
+        return 42
+
+    with pytest.raises(ValueError):
+        failing()
+    assert asyncio.run(waiting()) == 42
+    assert registry.function(failing.__qualname__)["errors"] == 1
+    assert registry.function(waiting.__qualname__)["calls"] == 1
+    assert f"{waiting.__qualname__} > inner" in registry.to_dict()["spans"]
+
+
+def test_export(registry):
+    registry.observe(name="fetch_html", path="fetch_html", duration_ns=3_000_000)
+    registry.count("http_bytes", 1024)
+    registry.count("cache_hits", cache="document")
+    registry.count("cache_hits", cache="document")
+    assert registry.counter("cache_hits", cache="document") == 2
+
+    exported = json.loads(registry.to_json())
+    assert exported["functions"]["fetch_html"]["p50_seconds"] == 0.003
+    text = registry.to_prometheus()
+    assert 'test_function_duration_seconds_bucket{function="fetch_html",le="0.0025"} 0' in text
+    assert 'test_function_duration_seconds_bucket{function="fetch_html",le="0.005"} 1' in text
+    assert 'test_function_duration_seconds_count{function="fetch_html"} 1' in text
+    assert 'test_cache_hits_total{cache="document"} 2' in text
+    assert "test_http_bytes_total 1024" in text
+
+
+def test_overhead(registry):
+
+    def noop():
+        return None
+
+    decorated = performance(registry=registry)(noop)
+    calls = 20000
+    start = time.perf_counter()
+    for _ in range(calls):
+        decorated()
+    per_call = (time.perf_counter() - start) / calls
+    assert per_call < 20e-6
+    assert registry.function(noop.__qualname__)["calls"] == calls
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+
+# -*- coding: utf-8 -*-
+
+# Import standard libraries
+from concurrent.futures import ThreadPoolExecutor
+import subprocess
+import pstats
+import time
+import sys
+import os
+
+# Import internal libraries
+from shared.decorators import performance
+from shared.metrics import Metrics
+from shared import profiling
+
+
+registry = Metrics()
+
+
+def parse(rows: int) -> int:
+    return sum(int(str(row)) for row in range(rows))
+
+
+@performance(registry=registry)
+def fetch_html(rows: int = 20000) -> int:
+    return parse(rows=rows)
+
+
+@performance(registry=registry)
+def busy(seconds: float = 0.05) -> float:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        parse(rows=100)
+    return seconds
+
+
+def test_not_loaded_when_off():
+    code = "import sys, shared; print('shared.profiling' in sys.modules, 'cProfile' in sys.modules)"
+    environ = {key: value for key, value in os.environ.items() if not key.startswith("MYSTOCKTRADE_PROFILE")}
+    assert subprocess.run([sys.executable, "-c", code], env=environ, capture_output=True, text=True, check=True).stdout.split() == ["False", "False"]
+    environ["MYSTOCKTRADE_PROFILE"] = "fetch_html"
+    environ["MYSTOCKTRADE_PROFILE_DIR"] = os.devnull
+    code = "import sys, shared; from shared import decorators; print('shared.profiling' in sys.modules, decorators.profiler.functions)"
+    assert subprocess.run([sys.executable, "-c", code], env=environ, capture_output=True, text=True, check=True).stdout.split() == ["True", "{'fetch_html'}"]
+
+
+def test_deterministic(tmp_path):
+    with profiling.profile(functions="fetch_html", output=tmp_path) as profiler:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(fetch_html, [1000] * 8))
+        busy(seconds=0.001)
+    assert profiling.disable() is None
+    stats = profiler.stats(fetch_html.__qualname__)
+    calls = {function[2]: values[1] for function, values in stats.stats.items()}
+    assert calls["parse"] == 8 - profiler.skipped
+    assert profiler.stats(busy.__qualname__) is None
+    assert [path.name for path in tmp_path.iterdir()] == ["fetch_html.pstats"]
+    assert pstats.Stats(str(tmp_path / "fetch_html.pstats")).total_calls > 0
+
+
+def test_sampling(tmp_path):
+    with profiling.profile(functions=["busy"], mode="sampling", interval=0.001, output=tmp_path) as profiler:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(busy, [0.1, 0.1]))
+    stacks = profiler.stacks(busy.__qualname__)
+    assert sum(stacks.values()) >= 5
+    assert all(stack.startswith("busy (test_profiling.py:") for stack in stacks)
+    assert any(";parse (test_profiling.py:" in stack for stack in stacks)
+    lines = (tmp_path / "busy.collapsed").read_text().splitlines()
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)